@@ -1,31 +1,201 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 import json
+import logging
 import os
 import sqlite3
 from typing import Any, Literal
 
-from fastapi import FastAPI, HTTPException, Query, status
+from fastapi import FastAPI, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
-from . import db
-from .config import get_settings
-from .github import GitHubClient, GitHubError, ReactionContent
-from .keychain import (
-    KeychainCommandError,
-    KeychainUnavailableError,
+from . import db, metrics, tracing
+from .changes import build_change_page, change_from_row
+from .content_encoding import CompressionMiddleware
+from .config import get_settings, reload_settings, settings_service
+from .content_store import (
+    BlobIntegrityError,
+    ContentNotFoundError,
+    blob_store_for,
+    read_pull_file,
+)
+from .credentials import (
+    CredentialStoreCommandError,
+    CredentialStoreError,
+    CredentialStoreUnavailableError,
     delete_github_token,
     get_github_token,
-    has_github_token,
+    github_token_accounts,
     set_github_token,
 )
+from .diff_index import get_pull_diff_index
+from .etags import data_etag, etag_matches
+from .events import EventBroadcaster, change_event_type, stream_events
+from .git_mirror import GitMirror, GitMirrorError, build_git_remote_url
+from .github import GitHubClient, GitHubError, ReactionContent
+from .review_threads import inbox_item_from_row
+from .sync import load_pull_request_commits, resolve_commit, sync_pull_request_commits
+from .sync import load_review_threads, refresh_unresolved_review_threads, sync_review_threads
 from .sync import sync_repository, validate_repo_full_name
 from .sync import upsert_pull_request_from_github
+from .outbox import drain_review_publish_outbox
+from .pagination import InvalidCursorError, decode_cursor, split_page
+from .review_import import ReviewImportBatch, ReviewImportError, parse_review_import
+from .search import SEARCH_KINDS, search
+from .summary import build_summary
+from .timestamps import to_epoch_ms
+from .pool import DatabasePools
+from .responses import FastJSONResponse
+from .workers import PeriodicWorker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THREAD_REFRESH_INTERVAL = 300.0
+PUBLISH_OUTBOX_INTERVAL = 30.0
+DEFAULT_COMPRESSION_MIN_SIZE = 1024
+MAX_BATCH_PULLS = 100
+PULLS_PAGE_SIZE = 100
+EVENT_FEED_INTERVAL = 1.0
+EVENT_FEED_BATCH = 500
+
+
+def _load_thread_refresh_interval() -> float:
+    raw = os.getenv("SQUIRE_THREAD_REFRESH_INTERVAL")
+    if raw is None or not raw.strip():
+        return DEFAULT_THREAD_REFRESH_INTERVAL
+    try:
+        return max(float(raw), 0.0)
+    except ValueError:
+        return DEFAULT_THREAD_REFRESH_INTERVAL
+
+
+def _load_compression_min_size() -> int:
+    raw = os.getenv("SQUIRE_COMPRESSION_MIN_SIZE")
+    if raw is None or not raw.strip():
+        return DEFAULT_COMPRESSION_MIN_SIZE
+    try:
+        return max(int(raw), 0)
+    except ValueError:
+        return DEFAULT_COMPRESSION_MIN_SIZE
+
+
+def _refresh_thread_inbox() -> None:
+    with open_connection() as conn:
+        refresh_unresolved_review_threads(
+            conn,
+            open_github_client_for_repo,
+            on_error=lambda repo, exc: logger.warning(
+                "%s: review thread refresh failed - %s", repo, exc
+            ),
+        )
+
+
+def _drain_publish_outbox() -> None:
+    with open_connection() as conn:
+        result = drain_review_publish_outbox(
+            conn,
+            open_github_client_for_repo,
+            notify=logger.info,
+        )
+    for error in result.errors:
+        logger.warning("review publish outbox: %s", error)
+    for delivery in result.deliveries:
+        event_broadcaster.publish(
+            "publish.delivered",
+            {
+                "repo": delivery.repo_full_name,
+                "number": delivery.number,
+                "local_review_ids": delivery.local_review_ids,
+                "delivery_kind": delivery.delivery_kind,
+                "github_id": delivery.github_id,
+                "github_url": delivery.github_url,
+            },
+        )
+
+
+def _publish_change_events() -> None:
+    """Turn new `change_log` rows into events, including writes made by the CLI."""
+
+    global _event_feed_after
 
-app = FastAPI(title="Squire API", version="0.1.0")
+    with open_read_connection() as conn:
+        if _event_feed_after is None:
+            # Start at the tip: the replay buffer only covers this process's lifetime.
+            _event_feed_after = db.get_latest_change_seq(conn)
+            return
+        while True:
+            rows = db.list_changes(conn, after=_event_feed_after, limit=EVENT_FEED_BATCH)
+            for row in rows:
+                change = change_from_row(row)
+                event_type = change_event_type(change)
+                if event_type is not None:
+                    event_broadcaster.publish(event_type, change)
+                _event_feed_after = int(change["seq"])
+            if len(rows) < EVENT_FEED_BATCH:
+                return
+
+
+def _wake_event_feed() -> None:
+    if _event_feed_worker is not None:
+        _event_feed_worker.wake()
+
+
+event_broadcaster = EventBroadcaster()
+_event_feed_after: int | None = None
+_event_feed_worker: PeriodicWorker | None = None
+_publish_worker: PeriodicWorker | None = None
+_db_pools: DatabasePools | None = None
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    global _db_pools, _event_feed_after, _event_feed_worker, _publish_worker
+
+    _db_pools = DatabasePools(get_settings())
+
+    workers: list[PeriodicWorker] = []
+    interval = _load_thread_refresh_interval()
+    if interval > 0:
+        workers.append(
+            PeriodicWorker(
+                "squire-thread-refresh",
+                interval=interval,
+                target=_refresh_thread_inbox,
+            )
+        )
+    _publish_worker = PeriodicWorker(
+        "squire-publish-outbox",
+        interval=PUBLISH_OUTBOX_INTERVAL,
+        target=_drain_publish_outbox,
+    )
+    workers.append(_publish_worker)
+    _event_feed_worker = PeriodicWorker(
+        "squire-event-feed",
+        interval=EVENT_FEED_INTERVAL,
+        target=_publish_change_events,
+    )
+    workers.append(_event_feed_worker)
+
+    for worker in workers:
+        worker.start()
+    try:
+        yield
+    finally:
+        event_broadcaster.close()
+        for worker in workers:
+            worker.stop()
+        _publish_worker = None
+        _event_feed_worker = None
+        _event_feed_after = None
+        _db_pools.close()
+        _db_pools = None
+
+
+app = FastAPI(title="Squire API", version="0.1.0", lifespan=lifespan)
 
 
 def _load_allowed_origins() -> list[str]:
@@ -49,12 +219,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=_load_compression_min_size())
+# Added last so they are outermost and their timings include compression.
+app.add_middleware(tracing.TracingMiddleware)
+app.add_middleware(metrics.RequestMetricsMiddleware)
 
 PRState = Literal["open", "closed", "all"]
 Severity = Literal["info", "warning", "error"]
 ReviewStatus = Literal["pending", "in-progress", "done"]
 ReactionTarget = Literal["issue", "review"]
+ContentSide = Literal["base", "head"]
+DeliveryState = Literal["pending", "sending", "delivered", "failed"]
+ReviewImportFormat = Literal["auto", "ndjson", "sarif"]
+SearchKind = Literal["pull_request", "local_review", "thread_comment"]
 
 
 class RepoAddRequest(BaseModel):
@@ -68,7 +247,8 @@ class RepoAddRequest(BaseModel):
         description=(
             "Optional repository-specific GitHub token. "
             "If omitted, the global `GITHUB_TOKEN` is used. "
-            "When provided, token is stored in macOS Keychain."
+            "When provided, token is stored in the credential store "
+            "(macOS Keychain by default)."
         ),
     )
     github_base_url: str | None = Field(
@@ -112,6 +292,8 @@ class PullRequestSummary(BaseModel):
     changed_files: int
     updated_at: str
     review_status: str
+    local_review_count: int = 0
+    local_error_count: int = 0
 
 
 class PullRequestDetail(BaseModel):
@@ -155,6 +337,17 @@ class LocalReviewCreateRequest(BaseModel):
     agent: str = "codex"
 
 
+class LocalReviewImportError(BaseModel):
+    index: int
+    error: str
+
+
+class LocalReviewImportResponse(BaseModel):
+    total: int
+    inserted: int
+    errors: list[LocalReviewImportError]
+
+
 class LocalReviewResponse(BaseModel):
     id: int
     file_path: str | None
@@ -170,10 +363,58 @@ class LocalReviewListResponse(BaseModel):
     items: list[LocalReviewResponse]
 
 
+class LocalReviewPublishRequest(BaseModel):
+    review_ids: list[int] | None = Field(
+        default=None,
+        description="Local review ids to publish; omit to publish every local review of the PR",
+    )
+    prefix: str = "[AI Review]"
+    batch: bool = Field(
+        False,
+        description="Deliver inline items as one COMMENT review plus one summary comment",
+    )
+
+
+class LocalReviewDeliveryResponse(BaseModel):
+    ai_review_id: int
+    state: DeliveryState
+    attempts: int
+    next_attempt_at: str | None
+    last_error: str | None
+    delivery_kind: str | None
+    github_id: int | None
+    github_url: str | None
+    delivered_at: str | None
+
+
+class LocalReviewDeliveryListResponse(BaseModel):
+    items: list[LocalReviewDeliveryResponse]
+
+
 class ReviewStatusUpdateRequest(BaseModel):
     status: ReviewStatus
 
 
+class ReviewStatusBatchItem(BaseModel):
+    number: int
+    status: ReviewStatus
+
+
+class ReviewStatusBatchRequest(BaseModel):
+    items: list[ReviewStatusBatchItem] = Field(..., min_length=1, max_length=MAX_BATCH_PULLS)
+
+
+class PullRequestBatchItem(BaseModel):
+    pull_request: PullRequestDetail
+    review_status: ReviewStatus
+    local_reviews: list[LocalReviewResponse] | None = None
+
+
+class PullRequestBatchResponse(BaseModel):
+    items: list[PullRequestBatchItem]
+    missing: list[int]
+
+
 class CommentReactionCreateRequest(BaseModel):
     comment_id: int
     comment_type: ReactionTarget
@@ -188,12 +429,32 @@ class CommentReactionResponse(BaseModel):
 
 @contextmanager
 def open_connection():
-    settings = get_settings()
-    conn = db.connect(settings)
-    try:
+    pools = _db_pools
+    if pools is None:
+        # Outside the application lifespan (scripts, tests): one-off connection.
+        conn = db.connect(get_settings())
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    with pools.writer.connection() as conn:
+        yield conn
+
+
+@contextmanager
+def open_read_connection():
+    """Borrow a read-only connection that never waits on sync writes."""
+
+    pools = _db_pools
+    if pools is None:
+        with open_connection() as conn:
+            yield conn
+        return
+
+    with pools.reader.connection() as conn:
         yield conn
-    finally:
-        conn.close()
 
 
 def _normalize_optional_text(value: str | None) -> str | None:
@@ -240,13 +501,53 @@ def open_github_client_for_repo(conn: sqlite3.Connection, repo: str):
         client.close()
 
 
-def _to_repo_response(conn: sqlite3.Connection, row: sqlite3.Row) -> RepoResponse:
-    full_name = str(row["full_name"])
+def _open_pull_mirror(
+    conn: sqlite3.Connection, repo: str, number: int
+) -> tuple[GitMirror, sqlite3.Row] | None:
+    settings = get_settings()
+    if settings.git_mirror_dir is None:
+        return None
+    pull_request = db.get_pull_request_by_repo_and_number(conn, repo, number)
+    if pull_request is None or not pull_request["base_branch"]:
+        return None
+
+    token, base_url = _resolve_repo_github_config(conn, repo)
+    mirror = GitMirror(
+        settings.git_mirror_dir,
+        repo,
+        remote_url=build_git_remote_url(base_url, repo),
+        token=token,
+    )
+    return mirror, pull_request
+
+
+def _list_pull_files(
+    conn: sqlite3.Connection, repo: str, number: int
+) -> list[dict[str, Any]]:
+    pull_mirror = _open_pull_mirror(conn, repo, number)
     try:
-        has_keychain_token = has_github_token(full_name)
-    except KeychainCommandError:
-        has_keychain_token = False
-    has_custom_token = has_keychain_token or bool(
+        if pull_mirror is not None:
+            mirror, pull_request = pull_mirror
+            return mirror.list_pull_files(
+                number,
+                str(pull_request["base_branch"]),
+                head_sha=pull_request["head_sha"],
+                base_sha=pull_request["base_sha"],
+            )
+        with open_github_client_for_repo(conn, repo) as github:
+            return github.list_pull_files(repo, number)
+    except (GitHubError, GitMirrorError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=str(exc),
+        ) from exc
+
+
+def _to_repo_response(
+    conn: sqlite3.Connection, row: sqlite3.Row, *, token_accounts: set[str]
+) -> RepoResponse:
+    full_name = str(row["full_name"])
+    has_custom_token = full_name in token_accounts or bool(
         db.get_repository_legacy_github_token(conn, full_name)
     )
     return RepoResponse(
@@ -261,18 +562,26 @@ def _to_repo_response(conn: sqlite3.Connection, row: sqlite3.Row) -> RepoRespons
     )
 
 
-def _to_pull_summary(row: sqlite3.Row) -> PullRequestSummary:
-    return PullRequestSummary(
-        id=int(row["id"]),
-        repo=str(row["repo_full_name"]),
-        number=int(row["number"]),
-        title=str(row["title"]),
-        author=str(row["author"]),
-        state=str(row["state"]),
-        changed_files=int(row["changed_files"]),
-        updated_at=str(row["updated_at"]),
-        review_status=str(row["review_status"]),
-    )
+def _pull_summary_item(row: sqlite3.Row) -> dict[str, Any]:
+    """`PullRequestSummary` fields straight from a `list_pull_requests` row.
+
+    The columns already have the model's types, so the list endpoint serializes
+    these dicts directly instead of building and re-validating models.
+    """
+
+    return {
+        "id": row["id"],
+        "repo": row["repo_full_name"],
+        "number": row["number"],
+        "title": row["title"],
+        "author": row["author"],
+        "state": row["state"],
+        "changed_files": row["changed_files"],
+        "updated_at": row["updated_at"],
+        "review_status": row["review_status"],
+        "local_review_count": row["local_review_count"],
+        "local_error_count": row["local_error_count"],
+    }
 
 
 def _to_pull_detail(row: sqlite3.Row) -> PullRequestDetail:
@@ -317,6 +626,26 @@ def _to_local_review(row: sqlite3.Row) -> LocalReviewResponse:
     )
 
 
+def _to_local_review_delivery(row: sqlite3.Row) -> LocalReviewDeliveryResponse:
+    return LocalReviewDeliveryResponse(
+        ai_review_id=int(row["ai_review_id"]),
+        state=row["state"],
+        attempts=int(row["attempts"]),
+        next_attempt_at=row["next_attempt_at"],
+        last_error=row["last_error"],
+        delivery_kind=row["delivery_kind"],
+        github_id=row["github_id"],
+        github_url=row["github_url"],
+        delivered_at=row["delivered_at"],
+    )
+
+
+def _not_modified(request: Request, etag: str) -> Response | None:
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
 def _require_repository(conn: sqlite3.Connection, repo: str) -> sqlite3.Row:
     row = db.get_repository(conn, repo)
     if row is None:
@@ -342,29 +671,50 @@ def _require_pull_request(
     return row
 
 
+def _publish_sync_progress(repo: str, phase: str, done: int = 0, total: int = 0) -> None:
+    event_broadcaster.publish(
+        "sync.progress",
+        {"repo": repo, "phase": phase, "done": done, "total": total},
+    )
+
+
 def _sync_single_repository(
     conn: sqlite3.Connection, repo: str, *, full_sync: bool
 ) -> SyncResult:
+    _publish_sync_progress(repo, "started")
     try:
         with open_github_client_for_repo(conn, repo) as github:
-            synced = sync_repository(conn, github, repo, full_sync=full_sync)
+            synced = sync_repository(
+                conn,
+                github,
+                repo,
+                full_sync=full_sync,
+                on_progress=lambda done, total: _publish_sync_progress(
+                    repo, "running", done, total
+                ),
+            )
         conn.commit()
     except HTTPException:
         conn.rollback()
+        _publish_sync_progress(repo, "failed")
         raise
     except GitHubError as exc:
         conn.rollback()
+        _publish_sync_progress(repo, "failed")
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"{repo}: sync failed - {exc}",
         ) from exc
     except Exception as exc:
         conn.rollback()
+        _publish_sync_progress(repo, "failed")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"{repo}: sync failed - {exc}",
         ) from exc
 
+    _publish_sync_progress(repo, "finished", synced, synced)
+    _wake_event_feed()
     return SyncResult(repo=repo, synced_pull_requests=synced)
 
 
@@ -382,15 +732,15 @@ def _apply_repo_github_overrides(
                 set_github_token(repo, token)
             else:
                 delete_github_token(repo)
-        except KeychainUnavailableError as exc:
+        except CredentialStoreUnavailableError as exc:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Repository token override requires macOS Keychain: {exc}",
+                detail=f"Repository token override requires a writable credential store: {exc}",
             ) from exc
-        except KeychainCommandError as exc:
+        except CredentialStoreCommandError as exc:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to update macOS Keychain token for `{repo}`: {exc}",
+                detail=f"Failed to update the stored token for `{repo}`: {exc}",
             ) from exc
 
         db.clear_repository_legacy_github_token(conn, repo)
@@ -409,11 +759,43 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/config")
+def get_config() -> dict[str, Any]:
+    """Resolved settings and where they came from; secrets are never included."""
+
+    return settings_service.describe()
+
+
+@app.post("/config/reload")
+def reload_config() -> dict[str, Any]:
+    reload_settings()
+    return settings_service.describe()
+
+
+# ETags are read before the data. A write in between can only make the body
+# newer than its tag, which costs the client one extra fetch, never a stale 304.
 @app.get("/repos", response_model=list[RepoResponse])
-def list_repos() -> list[RepoResponse]:
-    with open_connection() as conn:
+def list_repos(request: Request, response: Response) -> list[RepoResponse] | Response:
+    with open_read_connection() as conn:
         rows = db.list_repositories(conn)
-        return [_to_repo_response(conn, row) for row in rows]
+        try:
+            token_accounts = github_token_accounts([str(row["full_name"]) for row in rows])
+        except CredentialStoreError:
+            token_accounts = set()
+        # Token presence lives in the credential store (and its TTL cache), not in the
+        # data versions, so it has to be part of the validator as well.
+        etag = data_etag(conn, ["repos"], *sorted(token_accounts))
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+        repos = [_to_repo_response(conn, row, token_accounts=token_accounts) for row in rows]
+    response.headers["ETag"] = etag
+    return repos
 
 
 @app.post("/repos", response_model=RepoAddResponse)
@@ -442,7 +824,7 @@ def add_repo(request: RepoAddRequest) -> RepoAddResponse:
                 if created_with_new_token:
                     try:
                         delete_github_token(repo)
-                    except KeychainCommandError:
+                    except CredentialStoreCommandError:
                         pass
             raise
 
@@ -467,10 +849,10 @@ def remove_repo(repo_full_name: str) -> dict[str, Any]:
         )
     try:
         delete_github_token(repo)
-    except KeychainCommandError as exc:
+    except CredentialStoreCommandError as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Repository row removed, but failed to delete Keychain token: {exc}",
+            detail=f"Repository row removed, but failed to delete the stored token: {exc}",
         ) from exc
     return {"removed": True, "repo": repo}
 
@@ -497,27 +879,231 @@ def sync(
         return results
 
 
+@app.get("/events")
+async def stream_server_events(
+    request: Request,
+    last_event_id: str | None = Query(
+        None,
+        description="Resume after this event id (the Last-Event-ID header takes precedence)",
+    ),
+) -> StreamingResponse:
+    return StreamingResponse(
+        stream_events(
+            event_broadcaster,
+            last_event_id=request.headers.get("last-event-id") or last_event_id,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/pulls", response_model=list[PullRequestSummary])
 def list_pulls(
+    request: Request,
     repo: str | None = Query(None, description="Filter by owner/repo"),
     state: PRState = Query("open", description="open, closed, all"),
-) -> list[PullRequestSummary]:
-    with open_connection() as conn:
+    author: str | None = Query(None, description="Filter by PR author login"),
+    reviewer: list[str] = Query(
+        [],
+        description="PRs awaiting review from these logins or team:<slug> values",
+    ),
+    review_status: ReviewStatus | None = Query(None),
+    base: str | None = Query(None, description="Filter by base branch"),
+    updated_since: str | None = Query(None, description="ISO 8601 lower bound on updated_at"),
+    limit: int | None = Query(
+        None,
+        ge=1,
+        le=500,
+        description="Page size; without `limit` or `cursor` every matching PR is returned",
+    ),
+    cursor: str | None = Query(None, description="Value of a previous X-Next-Cursor header"),
+) -> Response:
+    updated_since_ms: int | None = None
+    if updated_since:
+        updated_since_ms = to_epoch_ms(updated_since)
+        if updated_since_ms is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="`updated_since` must be an ISO 8601 timestamp.",
+            )
+
+    after: tuple[int, int] | None = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursorError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        if limit is None:
+            limit = PULLS_PAGE_SIZE
+
+    with open_read_connection() as conn:
+        scopes = ["repos", "pulls"]
+        if repo:
+            repository = _require_repository(conn, repo)
+            scopes = ["repos", f"repo:{repository['id']}"]
+        query = sorted(f"{key}={value}" for key, value in request.query_params.multi_items())
+        etag = data_etag(conn, scopes, *query)
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        rows = db.list_pull_requests(
+            conn,
+            repo_full_name=repo,
+            state=state,
+            author=author,
+            reviewers=reviewer,
+            review_status=review_status,
+            base_branch=base,
+            updated_since_ms=updated_since_ms,
+            after=after,
+            limit=None if limit is None else limit + 1,
+        )
+    rows, next_cursor = split_page(rows, limit)
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return FastJSONResponse([_pull_summary_item(row) for row in rows], headers=headers)
+
+
+@app.get("/changes", response_class=FastJSONResponse)
+def list_changes(
+    after: int = Query(0, ge=0, description="Return changes with seq greater than this"),
+    repo: str | None = Query(None, description="Filter by owner/repo"),
+    limit: int = Query(500, ge=1, le=5000),
+) -> FastJSONResponse:
+    with open_read_connection() as conn:
         if repo:
             _require_repository(conn, repo)
+        page = build_change_page(
+            db.list_changes(conn, after=after, repo_full_name=repo, limit=limit),
+            after=after,
+            limit=limit,
+            latest_seq=db.get_latest_change_seq(conn, repo_full_name=repo),
+            pruned_seq=db.get_pruned_change_seq(conn),
+        )
+    return FastJSONResponse(page)
 
-        rows = db.list_pull_requests(conn, repo_full_name=repo, state=state)
-    return [_to_pull_summary(row) for row in rows]
+
+@app.get("/summary")
+def get_summary(
+    repo: str | None = Query(None, description="Filter by owner/repo"),
+) -> dict[str, Any]:
+    with open_read_connection() as conn:
+        if repo:
+            _require_repository(conn, repo)
+        rows = db.list_pull_request_counts(conn, repo_full_name=repo)
+    return build_summary(rows)
 
 
 @app.get("/pulls/{number}", response_model=PullRequestDetail)
-def get_pull(number: int, repo: str = Query(..., description="owner/repo")) -> PullRequestDetail:
-    with open_connection() as conn:
-        _require_repository(conn, repo)
+def get_pull(
+    number: int,
+    request: Request,
+    response: Response,
+    repo: str = Query(..., description="owner/repo"),
+) -> PullRequestDetail | Response:
+    with open_read_connection() as conn:
+        repository = _require_repository(conn, repo)
+        etag = data_etag(conn, [f"pr:{repository['id']}:{number}"])
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
         row = _require_pull_request(conn, repo, number)
+    response.headers["ETag"] = etag
     return _to_pull_detail(row)
 
 
+@app.get("/pulls:batchGet", response_model=PullRequestBatchResponse)
+def batch_get_pulls(
+    request: Request,
+    response: Response,
+    repo: str = Query(..., description="owner/repo"),
+    number: list[int] = Query(..., description="PR numbers (repeat the parameter)"),
+    local_reviews: bool = Query(True, description="Include each PR's local reviews"),
+) -> PullRequestBatchResponse | Response:
+    numbers = list(dict.fromkeys(number))
+    if len(numbers) > MAX_BATCH_PULLS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_PULLS} PR numbers per batch.",
+        )
+
+    with open_read_connection() as conn:
+        repository = _require_repository(conn, repo)
+        etag = data_etag(
+            conn,
+            [f"pr:{repository['id']}:{item}" for item in numbers],
+            f"local_reviews={local_reviews}",
+        )
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        rows = {
+            int(row["number"]): row
+            for row in db.get_pull_requests_by_numbers(conn, repo, numbers)
+        }
+        reviews_by_pull: dict[int, list[LocalReviewResponse]] = {}
+        if local_reviews:
+            for review in db.list_ai_reviews_for_pull_requests(
+                conn, [int(row["id"]) for row in rows.values()]
+            ):
+                reviews_by_pull.setdefault(int(review["pull_request_id"]), []).append(
+                    _to_local_review(review)
+                )
+
+    response.headers["ETag"] = etag
+    return PullRequestBatchResponse(
+        items=[
+            PullRequestBatchItem(
+                pull_request=_to_pull_detail(rows[item]),
+                review_status=rows[item]["review_status"],
+                local_reviews=(
+                    reviews_by_pull.get(int(rows[item]["id"]), []) if local_reviews else None
+                ),
+            )
+            for item in numbers
+            if item in rows
+        ],
+        missing=[item for item in numbers if item not in rows],
+    )
+
+
+@app.put("/pulls:batchReviewStatus")
+def batch_update_review_status(
+    request: ReviewStatusBatchRequest,
+    repo: str = Query(..., description="owner/repo"),
+) -> dict[str, Any]:
+    """Set the review status of several PRs in one transaction; all or nothing."""
+
+    statuses = {item.number: item.status for item in request.items}
+    with open_connection() as conn:
+        _require_repository(conn, repo)
+        rows = {
+            int(row["number"]): row
+            for row in db.get_pull_requests_by_numbers(conn, repo, list(statuses))
+        }
+        missing = [item for item in statuses if item not in rows]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"PR(s) {', '.join(f'#{item}' for item in missing)} for `{repo}` "
+                "not found in local DB.",
+            )
+        db.set_review_statuses(
+            conn,
+            [(int(rows[item]["id"]), value) for item, value in statuses.items()],
+        )
+        conn.commit()
+    _wake_event_feed()
+
+    return {
+        "repo": repo,
+        "items": [{"number": item, "status": value} for item, value in statuses.items()],
+    }
+
+
 @app.post(
     "/pulls",
     response_model=PullRequestCreateResponse,
@@ -578,6 +1164,7 @@ def create_pull(
         )
         conn.commit()
         row = _require_pull_request(conn, repo, created_number)
+    _wake_event_feed()
 
     pull_detail = _to_pull_detail(row)
     return PullRequestCreateResponse(
@@ -587,21 +1174,14 @@ def create_pull(
     )
 
 
-@app.get("/pulls/{number}/files")
+@app.get("/pulls/{number}/files", response_class=FastJSONResponse)
 def get_pull_files(
     number: int,
     repo: str = Query(..., description="owner/repo"),
-) -> list[dict[str, Any]]:
-    with open_connection() as conn:
+) -> FastJSONResponse:
+    with open_read_connection() as conn:
         _require_repository(conn, repo)
-        with open_github_client_for_repo(conn, repo) as github:
-            try:
-                files = github.list_pull_files(repo, number)
-            except GitHubError as exc:
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=str(exc),
-                ) from exc
+        files = _list_pull_files(conn, repo, number)
 
     normalized: list[dict[str, Any]] = []
     for item in files:
@@ -614,7 +1194,7 @@ def get_pull_files(
                 "changes": item.get("changes"),
             }
         )
-    return normalized
+    return FastJSONResponse(normalized)
 
 
 @app.get("/pulls/{number}/diff", response_class=PlainTextResponse)
@@ -623,43 +1203,125 @@ def get_pull_diff(
     repo: str = Query(..., description="owner/repo"),
     file: str | None = Query(None, description="Return patch for a specific file"),
 ) -> str:
-    with open_connection() as conn:
+    with open_read_connection() as conn:
         _require_repository(conn, repo)
-        with open_github_client_for_repo(conn, repo) as github:
-            try:
-                if file:
-                    files = github.list_pull_files(repo, number)
-                    for item in files:
-                        if item.get("filename") == file:
-                            patch = item.get("patch")
-                            if patch:
-                                return str(patch)
-                            return f"No text diff available for `{file}`."
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"`{file}` is not part of PR #{number}.",
-                    )
+        if file:
+            for item in _list_pull_files(conn, repo, number):
+                if item.get("filename") == file:
+                    patch = item.get("patch")
+                    if patch:
+                        return str(patch)
+                    return f"No text diff available for `{file}`."
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"`{file}` is not part of PR #{number}.",
+            )
 
+        pull_mirror = _open_pull_mirror(conn, repo, number)
+        try:
+            if pull_mirror is not None:
+                mirror, pull_request = pull_mirror
+                return mirror.get_pull_diff(
+                    number,
+                    str(pull_request["base_branch"]),
+                    head_sha=pull_request["head_sha"],
+                    base_sha=pull_request["base_sha"],
+                )
+            with open_github_client_for_repo(conn, repo) as github:
                 return github.get_pull_diff(repo, number)
-            except HTTPException:
-                raise
+        except (GitHubError, GitMirrorError) as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=str(exc),
+            ) from exc
+
+
+@app.get("/pulls/{number}/diff-index")
+def get_pull_diff_hunks(
+    number: int,
+    repo: str = Query(..., description="owner/repo"),
+) -> dict[str, Any]:
+    with open_read_connection() as conn:
+        _require_repository(conn, repo)
+        files = _list_pull_files(conn, repo, number)
+        with open_github_client_for_repo(conn, repo) as github:
+            try:
+                pull_request = github.get_pull_request(repo, number)
             except GitHubError as exc:
                 raise HTTPException(
                     status_code=status.HTTP_502_BAD_GATEWAY,
                     detail=str(exc),
                 ) from exc
 
+    diff_index = get_pull_diff_index(pull_request, files)
+    if diff_index is None:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"PR #{number} payload has no head commit SHA.",
+        )
+    return diff_index.to_dict()
 
-@app.get("/pulls/{number}/comments")
-def get_pull_comments(
+
+@app.get("/pulls/{number}/contents")
+def get_pull_file_contents(
     number: int,
     repo: str = Query(..., description="owner/repo"),
-) -> list[dict[str, Any]]:
+    path: str = Query(..., description="File path in the repository"),
+    side: ContentSide = Query("head", description="base or head"),
+) -> Response:
     with open_connection() as conn:
+        repository = _require_repository(conn, repo)
+        with open_github_client_for_repo(conn, repo) as github:
+            try:
+                file_content = read_pull_file(
+                    conn,
+                    github,
+                    blob_store_for(get_settings()),
+                    repo_id=int(repository["id"]),
+                    repo_full_name=repo,
+                    number=number,
+                    path=path,
+                    side=side,
+                )
+            except ContentNotFoundError as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=str(exc),
+                ) from exc
+            except (GitHubError, BlobIntegrityError) as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=str(exc),
+                ) from exc
+        conn.commit()
+
+    try:
+        file_content.content.decode("utf-8")
+        media_type = "text/plain; charset=utf-8"
+    except UnicodeDecodeError:
+        media_type = "application/octet-stream"
+
+    return Response(
+        content=file_content.content,
+        media_type=media_type,
+        headers={
+            "ETag": f'"{file_content.blob_sha}"',
+            "X-Squire-Blob-Sha": file_content.blob_sha,
+            "X-Squire-Commit-Sha": file_content.commit_sha,
+        },
+    )
+
+
+@app.get("/pulls/{number}/comments", response_class=FastJSONResponse)
+def get_pull_comments(
+    number: int,
+    repo: str = Query(..., description="owner/repo"),
+) -> FastJSONResponse:
+    with open_read_connection() as conn:
         _require_repository(conn, repo)
         with open_github_client_for_repo(conn, repo) as github:
             try:
-                return github.list_issue_comments(repo, number)
+                return FastJSONResponse(github.list_issue_comments(repo, number))
             except GitHubError as exc:
                 raise HTTPException(
                     status_code=status.HTTP_502_BAD_GATEWAY,
@@ -667,16 +1329,16 @@ def get_pull_comments(
                 ) from exc
 
 
-@app.get("/pulls/{number}/github-reviews")
+@app.get("/pulls/{number}/github-reviews", response_class=FastJSONResponse)
 def get_pull_github_reviews(
     number: int,
     repo: str = Query(..., description="owner/repo"),
-) -> list[dict[str, Any]]:
-    with open_connection() as conn:
+) -> FastJSONResponse:
+    with open_read_connection() as conn:
         _require_repository(conn, repo)
         with open_github_client_for_repo(conn, repo) as github:
             try:
-                return github.list_pull_reviews(repo, number)
+                return FastJSONResponse(github.list_pull_reviews(repo, number))
             except GitHubError as exc:
                 raise HTTPException(
                     status_code=status.HTTP_502_BAD_GATEWAY,
@@ -684,6 +1346,227 @@ def get_pull_github_reviews(
                 ) from exc
 
 
+@app.get("/pulls/{number}/review-threads", response_class=FastJSONResponse)
+def list_pull_review_threads(
+    number: int,
+    repo: str = Query(..., description="owner/repo"),
+    author: str | None = Query(None, description="Root comment author login"),
+    unresolved: bool = Query(False, description="Only unresolved threads"),
+    file: str | None = Query(None, description="Filter by file path"),
+    since: str | None = Query(None, description="ISO timestamp lower bound on thread updates"),
+    refresh: bool = Query(
+        False,
+        description="Incrementally refresh the local store from GitHub before reading",
+    ),
+) -> FastJSONResponse:
+    updated_since_ms: int | None = None
+    if since:
+        updated_since_ms = to_epoch_ms(since)
+        if updated_since_ms is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="`since` must be an ISO 8601 timestamp.",
+            )
+
+    with open_connection() as conn:
+        repository = _require_repository(conn, repo)
+        repo_id = int(repository["id"])
+        if refresh:
+            with open_github_client_for_repo(conn, repo) as github:
+                try:
+                    sync_review_threads(conn, github, repo, repo_id=repo_id, number=number)
+                except GitHubError as exc:
+                    conn.rollback()
+                    raise HTTPException(
+                        status_code=status.HTTP_502_BAD_GATEWAY,
+                        detail=str(exc),
+                    ) from exc
+            conn.commit()
+
+        thread_sync = db.get_review_thread_sync(conn, repo_id=repo_id, pull_number=number)
+        threads = load_review_threads(
+            conn,
+            repo_id=repo_id,
+            number=number,
+            author=author,
+            unresolved_only=unresolved,
+            file_path=file,
+            updated_since_ms=updated_since_ms,
+        )
+
+    return FastJSONResponse(
+        {
+            "repo": repo,
+            "number": number,
+            "viewer_login": thread_sync["viewer_login"] if thread_sync else None,
+            "synced_at": thread_sync["synced_at"] if thread_sync else None,
+            "items": threads,
+        }
+    )
+
+
+@app.get("/pulls/{number}/commits")
+def list_pull_commits(
+    number: int,
+    repo: str = Query(..., description="owner/repo"),
+    since: str | None = Query(
+        None,
+        description="Only commits after this SHA (PR order, or committer time if outside the PR)",
+    ),
+    refresh: bool = Query(
+        False,
+        description="Incrementally refresh the commit cache from GitHub before reading",
+    ),
+) -> dict[str, Any]:
+    with open_connection() as conn:
+        repository = _require_repository(conn, repo)
+        repo_id = int(repository["id"])
+        commit_sync = db.get_pull_request_commit_sync(
+            conn, repo_id=repo_id, pull_number=number
+        )
+        since_commit: dict[str, Any] | None = None
+        with open_github_client_for_repo(conn, repo) as github:
+            try:
+                if refresh or commit_sync is None:
+                    sync_pull_request_commits(
+                        conn, github, repo, repo_id=repo_id, number=number
+                    )
+                if since:
+                    since_commit = resolve_commit(
+                        conn, github, repo, repo_id=repo_id, ref=since
+                    )
+            except GitHubError as exc:
+                conn.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=str(exc),
+                ) from exc
+        conn.commit()
+
+        commit_sync = db.get_pull_request_commit_sync(
+            conn, repo_id=repo_id, pull_number=number
+        )
+        items = load_pull_request_commits(
+            conn,
+            repo_id=repo_id,
+            number=number,
+            since_commit=since_commit,
+        )
+
+    return {
+        "repo": repo,
+        "number": number,
+        "head_sha": commit_sync["head_sha"] if commit_sync else None,
+        "synced_at": commit_sync["synced_at"] if commit_sync else None,
+        "items": items,
+    }
+
+
+@app.get("/inbox", response_class=FastJSONResponse)
+def get_inbox(
+    user: list[str] = Query(
+        [],
+        description="Login(s) to collect threads for; defaults to known viewer logins",
+    ),
+    repo: str | None = Query(None, description="Filter by owner/repo"),
+    limit: int = Query(200, ge=1, le=1000),
+) -> FastJSONResponse:
+    with open_read_connection() as conn:
+        if repo:
+            _require_repository(conn, repo)
+        logins = user or db.list_review_thread_viewer_logins(conn)
+        rows = db.list_inbox_threads(
+            conn,
+            logins=logins,
+            repo_full_name=repo,
+            limit=limit,
+        )
+
+    return FastJSONResponse(
+        {
+            "logins": logins,
+            "items": [inbox_item_from_row(row) for row in rows],
+        }
+    )
+
+
+@app.get("/search", response_class=FastJSONResponse)
+def search_documents(
+    q: str = Query(..., min_length=1, description="Words to find; a trailing * matches a prefix"),
+    repo: str | None = Query(None, description="Filter by owner/repo"),
+    state: PRState = Query("all"),
+    kind: list[SearchKind] = Query([], description="Only search these document kinds"),
+    limit: int = Query(20, ge=1, le=200),
+) -> FastJSONResponse:
+    with open_read_connection() as conn:
+        if repo:
+            _require_repository(conn, repo)
+        hits = search(
+            conn,
+            q,
+            repo_full_name=repo,
+            state=state,
+            kinds=tuple(kind) or SEARCH_KINDS,
+            limit=limit,
+        )
+
+    return FastJSONResponse({"query": q, "items": hits})
+
+
+def _import_local_reviews(repo: str, number: int, batch: ReviewImportBatch, strict: bool) -> int:
+    with open_connection() as conn:
+        _require_repository(conn, repo)
+        pull_request = _require_pull_request(conn, repo, number)
+        if strict and batch.errors:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail={"message": "Import rejected: invalid rows.", "errors": batch.errors},
+            )
+        if not batch.reviews:
+            return 0
+        inserted = db.insert_ai_reviews(
+            conn,
+            pull_request_id=int(pull_request["id"]),
+            reviews=batch.reviews,
+        )
+        conn.commit()
+    _wake_event_feed()
+    return inserted
+
+
+@app.post(
+    "/pulls/{number}/local-reviews:batch",
+    response_model=LocalReviewImportResponse,
+)
+async def import_local_reviews(
+    number: int,
+    request: Request,
+    repo: str = Query(..., description="owner/repo"),
+    format: ReviewImportFormat = Query(
+        "auto",
+        description="ndjson (one review per line) or a SARIF 2.1 log",
+    ),
+    agent: str = Query("codex", description="Agent for rows that do not name one"),
+    strict: bool = Query(False, description="Reject the whole batch if any row is invalid"),
+) -> LocalReviewImportResponse:
+    raw_body = await request.body()
+    try:
+        batch = parse_review_import(
+            raw_body.decode("utf-8"),
+            import_format=format,
+            default_agent=agent,
+        )
+    except (ReviewImportError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    inserted = await run_in_threadpool(_import_local_reviews, repo, number, batch, strict)
+    return LocalReviewImportResponse(
+        total=batch.total,
+        inserted=inserted,
+        errors=[LocalReviewImportError(**error) for error in batch.errors],
+    )
+
+
 @app.post("/pulls/{number}/local-reviews", response_model=LocalReviewResponse)
 def create_local_review(
     number: int,
@@ -713,16 +1596,23 @@ def create_local_review(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to load created review record.",
             )
+    _wake_event_feed()
     return _to_local_review(row)
 
 
 @app.get("/pulls/{number}/local-reviews", response_model=LocalReviewListResponse)
 def list_local_reviews(
     number: int,
+    request: Request,
+    response: Response,
     repo: str = Query(..., description="owner/repo"),
-) -> LocalReviewListResponse:
-    with open_connection() as conn:
-        _require_repository(conn, repo)
+) -> LocalReviewListResponse | Response:
+    with open_read_connection() as conn:
+        repository = _require_repository(conn, repo)
+        etag = data_etag(conn, [f"pr:{repository['id']}:{number}"])
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
         pull_request = _require_pull_request(conn, repo, number)
         pull_request_id = int(pull_request["id"])
 
@@ -732,12 +1622,79 @@ def list_local_reviews(
         )
         rows = db.list_ai_reviews(conn, pull_request_id=pull_request_id)
 
+    response.headers["ETag"] = etag
     return LocalReviewListResponse(
         review_status=review_status,
         items=[_to_local_review(row) for row in rows],
     )
 
 
+@app.post(
+    "/pulls/{number}/local-reviews/publish",
+    response_model=LocalReviewDeliveryListResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def publish_local_reviews(
+    number: int,
+    request: LocalReviewPublishRequest,
+    repo: str = Query(..., description="owner/repo"),
+) -> LocalReviewDeliveryListResponse:
+    with open_connection() as conn:
+        _require_repository(conn, repo)
+        pull_request = _require_pull_request(conn, repo, number)
+        pull_request_id = int(pull_request["id"])
+        known_ids = {
+            int(row["id"])
+            for row in db.list_ai_reviews(conn, pull_request_id=pull_request_id)
+        }
+        wanted = set(request.review_ids) if request.review_ids is not None else known_ids
+        missing = sorted(wanted - known_ids)
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Some review id(s) were not found for this PR: "
+                + ", ".join(str(item) for item in missing),
+            )
+
+        db.enqueue_review_publish(
+            conn,
+            ai_review_ids=sorted(wanted),
+            prefix=request.prefix,
+            batch=request.batch,
+        )
+        conn.commit()
+        rows = [
+            row
+            for row in db.list_review_publish_outbox(conn, pull_request_id=pull_request_id)
+            if int(row["ai_review_id"]) in wanted
+        ]
+
+    if _publish_worker is not None:
+        _publish_worker.wake()
+    return LocalReviewDeliveryListResponse(
+        items=[_to_local_review_delivery(row) for row in rows]
+    )
+
+
+@app.get(
+    "/pulls/{number}/local-reviews/deliveries",
+    response_model=LocalReviewDeliveryListResponse,
+)
+def list_local_review_deliveries(
+    number: int,
+    repo: str = Query(..., description="owner/repo"),
+) -> LocalReviewDeliveryListResponse:
+    with open_read_connection() as conn:
+        _require_repository(conn, repo)
+        pull_request = _require_pull_request(conn, repo, number)
+        rows = db.list_review_publish_outbox(
+            conn, pull_request_id=int(pull_request["id"])
+        )
+    return LocalReviewDeliveryListResponse(
+        items=[_to_local_review_delivery(row) for row in rows]
+    )
+
+
 @app.put("/pulls/{number}/review-status")
 def update_local_review_status(
     number: int,
@@ -753,6 +1710,7 @@ def update_local_review_status(
             status=request.status,
         )
         conn.commit()
+    _wake_event_feed()
 
     return {
         "repo": repo,
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+import os
+from typing import Any
+
+DEFAULT_CHANGE_LOG_RETENTION_DAYS = 30.0
+
+
+def load_change_log_retention_days() -> float:
+    """`SQUIRE_CHANGE_LOG_RETENTION_DAYS`; 0 keeps the change log forever."""
+
+    raw = os.getenv("SQUIRE_CHANGE_LOG_RETENTION_DAYS")
+    if raw is None or not raw.strip():
+        return DEFAULT_CHANGE_LOG_RETENTION_DAYS
+    try:
+        return max(float(raw), 0.0)
+    except ValueError:
+        return DEFAULT_CHANGE_LOG_RETENTION_DAYS
+
+
+def change_from_row(row: Mapping[str, Any]) -> dict[str, Any]:
+    return {
+        "seq": row["seq"],
+        "entity": row["entity"],
+        "op": row["op"],
+        "repo": row["repo_full_name"],
+        "number": row["pull_number"],
+        "pull_request_id": row["pull_request_id"],
+        "entity_id": row["entity_id"],
+        "changed_at": row["changed_at"],
+    }
+
+
+def build_change_page(
+    rows: list[Mapping[str, Any]],
+    *,
+    after: int,
+    limit: int,
+    latest_seq: int,
+    pruned_seq: int = 0,
+) -> dict[str, Any]:
+    """Page of changes plus the cursor to pass as `after` next time.
+
+    With no new rows the cursor stays at `after`, so a client that polls with
+    `next_after` never skips or repeats an entry. `latest_seq` must use the
+    same repo filter as `rows`. `truncated` means entries after `after` were
+    already pruned, so the client has to reload its full state.
+    """
+
+    items = [change_from_row(row) for row in rows]
+    next_after = items[-1]["seq"] if items else after
+    return {
+        "items": items,
+        "next_after": next_after,
+        "latest_seq": latest_seq,
+        "has_more": len(items) >= limit and next_after < latest_seq,
+        "truncated": after < pruned_seq,
+    }
+
+
+def format_change(change: dict[str, Any]) -> str:
+    target = f"{change['repo'] or '-'}#{change['number']}"
+    if change["entity"] == "local_review":
+        target += f" review={change['entity_id']}"
+    return f"{change['seq']} {change['changed_at']} {change['entity']}.{change['op']} {target}"
@@ -3,25 +3,51 @@ from __future__ import annotations
 from contextlib import contextmanager
 from enum import StrEnum
 import json
+import sqlite3
+import sys
 
 import typer
 
-from . import db
-from .config import get_settings
-from .github import GitHubClient, GitHubError
-from .keychain import (
-    KeychainCommandError,
-    KeychainUnavailableError,
+from . import db, tracing
+from .changes import build_change_page, format_change
+from .commits import format_commit
+from .config import get_settings, reload_settings, settings_service
+from .credentials import (
+    CredentialStoreCommandError,
+    CredentialStoreError,
+    CredentialStoreUnavailableError,
     delete_github_token,
     get_github_token,
-    has_github_token,
+    github_token_accounts,
     set_github_token,
 )
-from .review_comments import resolve_inline_comment_target
-from .review_threads import filter_review_threads, format_review_thread, parse_iso_datetime
+from .git_mirror import GitMirror, GitMirrorError, build_git_remote_url
+from .github import GitHubClient, GitHubError
+from .content_store import (
+    BlobIntegrityError,
+    ContentNotFoundError,
+    blob_store_for,
+    read_pull_file,
+)
+from .outbox import drain_review_publish_outbox
+from .pagination import InvalidCursorError, decode_cursor, split_page
+from .review_import import ReviewImportError, parse_review_import
+from .search import format_search_hit, search
+from .summary import build_summary, format_summary
+from .timestamps import parse_iso_datetime, to_epoch_ms
+from .review_threads import (
+    format_inbox_item,
+    format_review_thread,
+    inbox_item_from_row,
+    review_thread_from_row,
+)
+from .sync import load_pull_request_commits, resolve_commit, sync_pull_request_commits
+from .sync import load_review_threads, refresh_unresolved_review_threads, sync_review_threads
 from .sync import sync_repository, validate_repo_full_name
 from .sync import upsert_pull_request_from_github
 
+LIST_PAGE_SIZE = 50
+
 app = typer.Typer(no_args_is_help=True, help="Squire CLI")
 repo_app = typer.Typer(no_args_is_help=True, help="Manage target repositories")
 review_app = typer.Typer(
@@ -32,10 +58,12 @@ review_thread_app = typer.Typer(
     no_args_is_help=True,
     help="Inspect GitHub pull request review threads",
 )
+config_app = typer.Typer(no_args_is_help=True, help="Inspect and reload settings")
 
 app.add_typer(repo_app, name="repo")
 app.add_typer(review_app, name="review")
 app.add_typer(review_thread_app, name="review-thread")
+app.add_typer(config_app, name="config")
 
 
 class PRState(StrEnum):
@@ -44,6 +72,18 @@ class PRState(StrEnum):
     ALL = "all"
 
 
+class ReviewImportFormat(StrEnum):
+    AUTO = "auto"
+    NDJSON = "ndjson"
+    SARIF = "sarif"
+
+
+class SearchKind(StrEnum):
+    PULL_REQUEST = "pull_request"
+    LOCAL_REVIEW = "local_review"
+    THREAD_COMMENT = "thread_comment"
+
+
 class Severity(StrEnum):
     INFO = "info"
     WARNING = "warning"
@@ -56,6 +96,11 @@ class ReviewStatus(StrEnum):
     DONE = "done"
 
 
+class ContentSide(StrEnum):
+    BASE = "base"
+    HEAD = "head"
+
+
 class ReactionTarget(StrEnum):
     ISSUE = "issue"
     REVIEW = "review"
@@ -112,6 +157,49 @@ def _open_github_client_for_repo(conn, repo_full_name: str) -> GitHubClient:
         _exit_with_error(str(exc))
 
 
+def _open_git_mirror(conn, repo_full_name: str) -> GitMirror | None:
+    settings = get_settings()
+    if settings.git_mirror_dir is None:
+        return None
+    token, base_url = _resolve_repo_github_config(conn, repo_full_name)
+    return GitMirror(
+        settings.git_mirror_dir,
+        repo_full_name,
+        remote_url=build_git_remote_url(base_url, repo_full_name),
+        token=token,
+    )
+
+
+def _open_pull_mirror(
+    conn, repo_full_name: str, number: int
+) -> tuple[GitMirror, sqlite3.Row] | None:
+    mirror = _open_git_mirror(conn, repo_full_name)
+    if mirror is None:
+        return None
+    pull_request = db.get_pull_request_by_repo_and_number(conn, repo_full_name, number)
+    if pull_request is None or not pull_request["base_branch"]:
+        return None
+    return mirror, pull_request
+
+
+def _list_pull_files(conn, repo_full_name: str, number: int) -> list[dict[str, object]]:
+    pull_mirror = _open_pull_mirror(conn, repo_full_name, number)
+    if pull_mirror is not None:
+        mirror, pull_request = pull_mirror
+        try:
+            return mirror.list_pull_files(
+                number,
+                str(pull_request["base_branch"]),
+                head_sha=pull_request["head_sha"],
+                base_sha=pull_request["base_sha"],
+            )
+        except GitMirrorError as exc:
+            _exit_with_error(str(exc))
+
+    with _open_github_client_for_repo(conn, repo_full_name) as github:
+        return github.list_pull_files(repo_full_name, number)
+
+
 def _exit_with_error(message: str, code: int = 1) -> None:
     typer.secho(message, fg=typer.colors.RED, err=True)
     raise typer.Exit(code=code)
@@ -138,19 +226,20 @@ def _require_pull_request(conn, repo_full_name: str, number: int):
 
 
 def _resolve_since_timestamp(
+    conn,
     github: GitHubClient,
     repo_full_name: str,
     since_ref: str | None,
+    *,
+    repo_id: int,
 ):
     if since_ref is None:
         return None
 
-    commit = github.get_commit(repo_full_name, since_ref)
-    commit_data = commit.get("commit") or {}
-    committer = commit_data.get("committer") or {}
-    author = commit_data.get("author") or {}
-    timestamp = committer.get("date") or author.get("date")
-    parsed = parse_iso_datetime(str(timestamp) if timestamp else None)
+    commit = resolve_commit(
+        conn, github, repo_full_name, repo_id=repo_id, ref=since_ref
+    )
+    parsed = parse_iso_datetime(commit.get("committed_at"))
     if parsed is None:
         _exit_with_error(
             f"Failed to resolve an approximate timestamp for commit `{since_ref}`."
@@ -165,7 +254,8 @@ def repo_add(
         None,
         "--github-token",
         help=(
-            "Repository-specific token (stored in macOS Keychain). "
+            "Repository-specific token (stored in the credential store, "
+            "macOS Keychain by default). "
             "If omitted, keep existing/global. Pass empty string to clear."
         ),
     ),
@@ -192,9 +282,9 @@ def repo_add(
                     set_github_token(repo_full_name, token)
                 else:
                     delete_github_token(repo_full_name)
-            except (KeychainCommandError, KeychainUnavailableError) as exc:
+            except (CredentialStoreCommandError, CredentialStoreUnavailableError) as exc:
                 _exit_with_error(
-                    f"Failed to update macOS Keychain token for `{repo_full_name}`: {exc}"
+                    f"Failed to update the stored token for `{repo_full_name}`: {exc}"
                 )
             db.clear_repository_legacy_github_token(conn, repo_full_name)
 
@@ -221,7 +311,7 @@ def repo_add(
                 if _normalize_optional_text(github_token):
                     try:
                         delete_github_token(repo_full_name)
-                    except KeychainCommandError:
+                    except CredentialStoreCommandError:
                         pass
             _exit_with_error(f"Failed to sync `{repo_full_name}`: {exc}")
 
@@ -236,17 +326,18 @@ def repo_list() -> None:
             typer.echo("No repositories registered.")
             return
 
+        try:
+            token_accounts = github_token_accounts([str(repo["full_name"]) for repo in repos])
+        except CredentialStoreError:
+            token_accounts = set()
+
         for repo in repos:
             status = "active" if int(repo["is_active"]) == 1 else "inactive"
             last_synced_at = repo["last_synced_at"] or "-"
             repo_name = str(repo["full_name"])
-            try:
-                has_keychain_token = has_github_token(repo_name)
-            except KeychainCommandError:
-                has_keychain_token = False
             token_scope = (
                 "repo"
-                if has_keychain_token
+                if repo_name in token_accounts
                 or bool(db.get_repository_legacy_github_token(conn, repo_name))
                 else "global"
             )
@@ -272,20 +363,20 @@ def repo_remove(repo_full_name: str) -> None:
 
         try:
             delete_github_token(repo_full_name)
-        except KeychainCommandError as exc:
+        except CredentialStoreCommandError as exc:
             _exit_with_error(
-                f"Removed repository row but failed to delete Keychain token: {exc}"
+                f"Removed repository row but failed to delete the stored token: {exc}"
             )
         typer.echo(f"Removed repository `{repo_full_name}`.")
 
 
 @repo_app.command("migrate-legacy-tokens")
 def repo_migrate_legacy_tokens() -> None:
-    """Move legacy DB tokens into macOS Keychain and clear DB copies."""
+    """Move legacy DB tokens into the credential store and clear DB copies."""
 
     with _open_connection() as conn:
-        if not db.repository_has_column(conn, "github_token"):
-            typer.echo("No legacy DB token column detected. Nothing to migrate.")
+        if not db.has_legacy_github_tokens(conn):
+            typer.echo("No legacy DB tokens found. Nothing to migrate.")
             return
 
         repos = db.list_repositories(conn)
@@ -302,7 +393,7 @@ def repo_migrate_legacy_tokens() -> None:
                 set_github_token(repo_name, legacy_token)
                 db.clear_repository_legacy_github_token(conn, repo_name)
                 migrated += 1
-            except (KeychainCommandError, KeychainUnavailableError) as exc:
+            except (CredentialStoreCommandError, CredentialStoreUnavailableError) as exc:
                 failed += 1
                 typer.secho(
                     f"{repo_name}: token migration failed - {exc}",
@@ -312,7 +403,7 @@ def repo_migrate_legacy_tokens() -> None:
 
         conn.commit()
 
-    typer.echo(f"Migrated {migrated} legacy token(s) to macOS Keychain.")
+    typer.echo(f"Migrated {migrated} legacy token(s) to the credential store.")
     if failed:
         raise typer.Exit(code=1)
 
@@ -350,6 +441,7 @@ def sync(
                     synced = sync_repository(conn, github, target, full_sync=full)
                 conn.commit()
                 typer.echo(f"{target}: synced {synced} pull request(s).")
+                _fetch_git_mirror(conn, target)
             except (GitHubError, Exception) as exc:
                 conn.rollback()
                 errors += 1
@@ -363,6 +455,20 @@ def sync(
             raise typer.Exit(code=1)
 
 
+def _fetch_git_mirror(conn, repo_full_name: str) -> None:
+    mirror = _open_git_mirror(conn, repo_full_name)
+    if mirror is None:
+        return
+    try:
+        mirror.fetch_all()
+    except GitMirrorError as exc:
+        typer.secho(
+            f"{repo_full_name}: git mirror fetch failed - {exc}",
+            fg=typer.colors.YELLOW,
+            err=True,
+        )
+
+
 @app.command("serve")
 def serve(
     host: str = typer.Option("127.0.0.1", "--host"),
@@ -389,8 +495,47 @@ def list_pull_requests(
         help="Filter by repository (owner/repo)",
     ),
     state: PRState = typer.Option(PRState.OPEN, "--state"),
+    author: str | None = typer.Option(None, "--author", help="Filter by PR author login"),
+    reviewers: list[str] = typer.Option(
+        [],
+        "--reviewer",
+        help="PRs awaiting review from this login or team:<slug> (repeatable)",
+    ),
+    review_status: ReviewStatus | None = typer.Option(None, "--review-status"),
+    base_branch: str | None = typer.Option(None, "--base", help="Filter by base branch"),
+    since: str | None = typer.Option(
+        None,
+        "--since",
+        help="Only PRs updated at or after this ISO 8601 timestamp",
+    ),
+    limit: int | None = typer.Option(
+        None,
+        "--limit",
+        min=1,
+        help=f"Page size (every PR without --limit/--cursor, {LIST_PAGE_SIZE} with --cursor)",
+    ),
+    cursor: str | None = typer.Option(
+        None,
+        "--cursor",
+        help="Continue after the cursor printed by a previous page",
+    ),
 ) -> None:
-    """List locally cached pull requests."""
+    """List locally cached pull requests, most recently updated first."""
+
+    updated_since_ms: int | None = None
+    if since:
+        updated_since_ms = to_epoch_ms(since)
+        if updated_since_ms is None:
+            _exit_with_error("`--since` must be an ISO 8601 timestamp.")
+
+    after: tuple[int, int] | None = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursorError as exc:
+            _exit_with_error(str(exc))
+        if limit is None:
+            limit = LIST_PAGE_SIZE
 
     with _open_connection() as conn:
         if repo_full_name:
@@ -400,7 +545,15 @@ def list_pull_requests(
             conn,
             repo_full_name=repo_full_name,
             state=state.value,
+            author=author,
+            reviewers=reviewers,
+            review_status=review_status.value if review_status else None,
+            base_branch=base_branch,
+            updated_since_ms=updated_since_ms,
+            after=after,
+            limit=None if limit is None else limit + 1,
         )
+        rows, next_cursor = split_page(rows, limit)
 
         if not rows:
             typer.echo("No pull requests found.")
@@ -412,9 +565,88 @@ def list_pull_requests(
                 f"[{row['state']}] [review:{row['review_status']}] "
                 f"files={row['changed_files']} "
                 f"by={row['author']} "
+                f"reviews={row['local_review_count']} "
                 f"title={row['title']}"
             )
 
+        if next_cursor:
+            typer.echo(f"next: --cursor {next_cursor}")
+
+
+@app.command("changes")
+def changes(
+    after: int = typer.Option(
+        0,
+        "--after",
+        min=0,
+        help="Only changes with a sequence number greater than this",
+    ),
+    repo_full_name: str | None = typer.Option(
+        None,
+        "--repo",
+        help="Limit to one repository (owner/repo)",
+    ),
+    limit: int = typer.Option(500, "--limit", min=1),
+    json_output: bool = typer.Option(
+        False,
+        "--json",
+        help="Output structured JSON instead of text",
+    ),
+) -> None:
+    """Show PR, review status and local review changes since a sequence number."""
+
+    with _open_connection() as conn:
+        if repo_full_name:
+            _require_registered_repo(conn, repo_full_name)
+        page = build_change_page(
+            db.list_changes(conn, after=after, repo_full_name=repo_full_name, limit=limit),
+            after=after,
+            limit=limit,
+            latest_seq=db.get_latest_change_seq(conn, repo_full_name=repo_full_name),
+            pruned_seq=db.get_pruned_change_seq(conn),
+        )
+
+    if json_output:
+        typer.echo(json.dumps(page, indent=2, ensure_ascii=False))
+        return
+
+    if page["truncated"]:
+        typer.echo(
+            f"warning: changes after {after} were pruned; re-read the full state.",
+            err=True,
+        )
+    for item in page["items"]:
+        typer.echo(format_change(item))
+    typer.echo(f"next: --after {page['next_after']}")
+
+
+@app.command("stats")
+def stats(
+    repo_full_name: str | None = typer.Option(
+        None,
+        "--repo",
+        help="Limit to one repository (owner/repo)",
+    ),
+    json_output: bool = typer.Option(
+        False,
+        "--json",
+        help="Output structured JSON instead of text",
+    ),
+) -> None:
+    """Show PR counts per repository, state and review status."""
+
+    with _open_connection() as conn:
+        if repo_full_name:
+            _require_registered_repo(conn, repo_full_name)
+        summary = build_summary(db.list_pull_request_counts(conn, repo_full_name=repo_full_name))
+
+    if json_output:
+        typer.echo(json.dumps(summary, indent=2, ensure_ascii=False))
+        return
+
+    for line in format_summary(summary):
+        typer.echo(line)
+
 
 @app.command("show")
 def show_pull_request(
@@ -456,12 +688,11 @@ def files(
     number: int,
     repo_full_name: str = typer.Option(..., "--repo"),
 ) -> None:
-    """Show changed file list from GitHub API."""
+    """Show changed file list from the git mirror or GitHub API."""
 
     with _open_connection() as conn:
         _require_registered_repo(conn, repo_full_name)
-        with _open_github_client_for_repo(conn, repo_full_name) as github:
-            files_data = github.list_pull_files(repo_full_name, number)
+        files_data = _list_pull_files(conn, repo_full_name, number)
 
     if not files_data:
         typer.echo("No changed files found.")
@@ -482,24 +713,137 @@ def diff(
     repo_full_name: str = typer.Option(..., "--repo"),
     file_path: str | None = typer.Option(None, "--file"),
 ) -> None:
-    """Show PR diff from GitHub API."""
+    """Show PR diff from the git mirror or GitHub API."""
 
     with _open_connection() as conn:
         _require_registered_repo(conn, repo_full_name)
+        if file_path:
+            for file_data in _list_pull_files(conn, repo_full_name, number):
+                if file_data.get("filename") == file_path:
+                    patch = file_data.get("patch")
+                    if patch:
+                        typer.echo(patch)
+                    else:
+                        typer.echo(f"No text diff available for `{file_path}`.")
+                    return
+            _exit_with_error(f"`{file_path}` is not part of PR #{number}.")
+
+        pull_mirror = _open_pull_mirror(conn, repo_full_name, number)
+        if pull_mirror is not None:
+            mirror, pull_request = pull_mirror
+            try:
+                diff_text = mirror.get_pull_diff(
+                    number,
+                    str(pull_request["base_branch"]),
+                    head_sha=pull_request["head_sha"],
+                    base_sha=pull_request["base_sha"],
+                )
+            except GitMirrorError as exc:
+                _exit_with_error(str(exc))
+            typer.echo(diff_text)
+            return
+
         with _open_github_client_for_repo(conn, repo_full_name) as github:
-            if file_path:
-                files_data = github.list_pull_files(repo_full_name, number)
-                for file_data in files_data:
-                    if file_data.get("filename") == file_path:
-                        patch = file_data.get("patch")
-                        if patch:
-                            typer.echo(patch)
-                        else:
-                            typer.echo(f"No text diff available for `{file_path}`.")
-                        return
-                _exit_with_error(f"`{file_path}` is not part of PR #{number}.")
-            else:
-                typer.echo(github.get_pull_diff(repo_full_name, number))
+            typer.echo(github.get_pull_diff(repo_full_name, number))
+
+
+@app.command("cat")
+def cat(
+    path: str,
+    number: int = typer.Option(..., "--pr", help="Pull request number"),
+    repo_full_name: str = typer.Option(..., "--repo"),
+    side: ContentSide = typer.Option(ContentSide.HEAD, "--side"),
+) -> None:
+    """Print a file at the PR head or base commit via the local blob cache."""
+
+    with _open_connection() as conn:
+        repository = _require_registered_repo(conn, repo_full_name)
+        try:
+            with _open_github_client_for_repo(conn, repo_full_name) as github:
+                file_content = read_pull_file(
+                    conn,
+                    github,
+                    blob_store_for(get_settings()),
+                    repo_id=int(repository["id"]),
+                    repo_full_name=repo_full_name,
+                    number=number,
+                    path=path,
+                    side=side.value,
+                )
+            conn.commit()
+        except (ContentNotFoundError, BlobIntegrityError, GitHubError) as exc:
+            _exit_with_error(str(exc))
+
+    typer.echo(file_content.content, nl=False)
+
+
+@app.command("commits")
+def commits(
+    number: int,
+    repo_full_name: str = typer.Option(..., "--repo"),
+    since: str | None = typer.Option(
+        None,
+        "--since",
+        help="Only commits after this SHA (by PR order, or committer time if outside the PR)",
+    ),
+    refresh: bool = typer.Option(
+        False,
+        "--refresh",
+        help="Re-list all PR commits even if the head SHA has not moved",
+    ),
+    json_output: bool = typer.Option(
+        False,
+        "--json",
+        help="Output structured JSON instead of text",
+    ),
+) -> None:
+    """Show the commit history of a PR from the local commit cache."""
+
+    try:
+        with _open_connection() as conn:
+            repository = _require_registered_repo(conn, repo_full_name)
+            repo_id = int(repository["id"])
+            with _open_github_client_for_repo(conn, repo_full_name) as github:
+                sync_pull_request_commits(
+                    conn,
+                    github,
+                    repo_full_name,
+                    repo_id=repo_id,
+                    number=number,
+                    force=refresh,
+                )
+                since_commit = (
+                    resolve_commit(conn, github, repo_full_name, repo_id=repo_id, ref=since)
+                    if since is not None
+                    else None
+                )
+                conn.commit()
+
+            items = load_pull_request_commits(
+                conn,
+                repo_id=repo_id,
+                number=number,
+                since_commit=since_commit,
+            )
+    except GitHubError as exc:
+        _exit_with_error(str(exc))
+
+    if json_output:
+        typer.echo(
+            json.dumps(
+                {"repo": repo_full_name, "number": number, "items": items},
+                indent=2,
+                ensure_ascii=False,
+            )
+        )
+        return
+
+    if not items:
+        typer.echo("No commits found.")
+        return
+
+    for item in items:
+        typer.echo(format_commit(item))
 
 
 @app.command("comments")
@@ -598,6 +942,11 @@ def review_threads(
         "--json",
         help="Output structured JSON instead of text",
     ),
+    refresh: bool = typer.Option(
+        False,
+        "--refresh",
+        help="Refetch all threads even if the PR has not changed since the last fetch",
+    ),
 ) -> None:
     """Show GitHub inline review threads for a PR."""
 
@@ -606,39 +955,49 @@ def review_threads(
 
     try:
         with _open_connection() as conn:
-            _require_registered_repo(conn, repo_full_name)
+            repository = _require_registered_repo(conn, repo_full_name)
+            repo_id = int(repository["id"])
             with _open_github_client_for_repo(conn, repo_full_name) as github:
-                payload = github.list_pull_review_threads(repo_full_name, number)
-                author_filter = author
-                if mine:
-                    viewer_login = payload.get("viewer_login")
-                    if not isinstance(viewer_login, str) or not viewer_login:
-                        _exit_with_error("Failed to resolve the authenticated viewer login.")
-                    author_filter = viewer_login
-
-                since_timestamp = _resolve_since_timestamp(github, repo_full_name, since)
+                sync_review_threads(
+                    conn,
+                    github,
+                    repo_full_name,
+                    repo_id=repo_id,
+                    number=number,
+                    force=refresh,
+                )
+                since_timestamp = _resolve_since_timestamp(
+                    conn, github, repo_full_name, since, repo_id=repo_id
+                )
+                conn.commit()
+
+            thread_sync = db.get_review_thread_sync(conn, repo_id=repo_id, pull_number=number)
+            viewer_login = thread_sync["viewer_login"] if thread_sync else None
+            author_filter = author
+            if mine:
+                if not isinstance(viewer_login, str) or not viewer_login:
+                    _exit_with_error("Failed to resolve the authenticated viewer login.")
+                author_filter = viewer_login
+
+            threads = load_review_threads(
+                conn,
+                repo_id=repo_id,
+                number=number,
+                author=author_filter,
+                unresolved_only=unresolved,
+                file_path=file_path,
+                updated_since_ms=to_epoch_ms(since_timestamp),
+            )
     except GitHubError as exc:
         _exit_with_error(str(exc))
 
-    threads = filter_review_threads(
-        list(payload.get("threads") or []),
-        author=author_filter,
-        unresolved_only=unresolved,
-        file_path=file_path,
-        since_timestamp=since_timestamp,
-    )
-    threads.sort(
-        key=lambda item: (str(item.get("updated_at") or ""), str(item.get("id") or "")),
-        reverse=True,
-    )
-
     if json_output:
         typer.echo(
             json.dumps(
                 {
                     "repo": repo_full_name,
                     "number": number,
-                    "viewer_login": payload.get("viewer_login"),
+                    "viewer_login": viewer_login,
                     "items": threads,
                 },
                 indent=2,
@@ -657,6 +1016,136 @@ def review_threads(
         typer.echo(format_review_thread(thread))
 
 
+@app.command("inbox")
+def inbox(
+    users: list[str] = typer.Option(
+        [],
+        "--user",
+        help=(
+            "Login whose threads to collect (repeatable). "
+            "Defaults to the viewer logins recorded while fetching threads."
+        ),
+    ),
+    repo_full_name: str | None = typer.Option(
+        None,
+        "--repo",
+        help="Limit to one repository (owner/repo)",
+    ),
+    refresh: bool = typer.Option(
+        False,
+        "--refresh",
+        help="Refresh threads of open PRs and PRs with unresolved threads first",
+    ),
+    limit: int = typer.Option(200, "--limit", min=1),
+    json_output: bool = typer.Option(
+        False,
+        "--json",
+        help="Output structured JSON instead of text",
+    ),
+) -> None:
+    """Show unresolved review threads you started or were mentioned in, across repos."""
+
+    with _open_connection() as conn:
+        if repo_full_name:
+            _require_registered_repo(conn, repo_full_name)
+
+        if refresh:
+            refresh_unresolved_review_threads(
+                conn,
+                _open_github_client_for_repo,
+                on_error=lambda repo, exc: typer.secho(
+                    f"{repo}: thread refresh failed - {exc}",
+                    fg=typer.colors.RED,
+                    err=True,
+                ),
+            )
+
+        logins = users or db.list_review_thread_viewer_logins(conn)
+        rows = db.list_inbox_threads(
+            conn,
+            logins=logins,
+            repo_full_name=repo_full_name,
+            limit=limit,
+        )
+
+    items = [inbox_item_from_row(row) for row in rows]
+    if json_output:
+        typer.echo(
+            json.dumps(
+                {"logins": logins, "items": items},
+                indent=2,
+                ensure_ascii=False,
+            )
+        )
+        return
+
+    if not logins:
+        _exit_with_error(
+            "No viewer login known yet. Pass `--user <login>` or run `squire review-threads` first."
+        )
+    if not items:
+        typer.echo("Inbox is empty.")
+        return
+
+    for item in items:
+        typer.echo(format_inbox_item(item))
+
+
+@app.command("search")
+def search_command(
+    query: str = typer.Argument(..., help="Words to find; a trailing * matches a prefix"),
+    repo_full_name: str | None = typer.Option(
+        None,
+        "--repo",
+        help="Limit to one repository (owner/repo)",
+    ),
+    state: PRState = typer.Option(PRState.ALL, "--state"),
+    kinds: list[SearchKind] = typer.Option(
+        [],
+        "--kind",
+        help="Only search this kind of document (repeatable)",
+    ),
+    limit: int = typer.Option(20, "--limit", min=1),
+    rebuild_index: bool = typer.Option(
+        False,
+        "--rebuild-index",
+        help="Rebuild the full-text index from stored rows before searching",
+    ),
+    json_output: bool = typer.Option(
+        False,
+        "--json",
+        help="Output structured JSON instead of text",
+    ),
+) -> None:
+    """Full-text search over PRs, local reviews and review thread comments."""
+
+    with _open_connection() as conn:
+        if repo_full_name:
+            _require_registered_repo(conn, repo_full_name)
+        if rebuild_index:
+            db.rebuild_search_index(conn)
+            conn.commit()
+        hits = search(
+            conn,
+            query,
+            repo_full_name=repo_full_name,
+            state=state.value,
+            kinds=tuple(kind.value for kind in kinds) or tuple(SearchKind),
+            limit=limit,
+        )
+
+    if json_output:
+        typer.echo(json.dumps({"query": query, "items": hits}, indent=2, ensure_ascii=False))
+        return
+
+    if not hits:
+        typer.echo("No matches.")
+        return
+
+    for hit in hits:
+        typer.echo(format_search_hit(hit))
+
+
 @review_thread_app.command("show")
 def review_thread_show(
     thread_id: str,
@@ -666,14 +1155,47 @@ def review_thread_show(
         "--json",
         help="Output structured JSON instead of text",
     ),
+    refresh: bool = typer.Option(
+        False,
+        "--refresh",
+        help="Fetch the thread from GitHub even if it is stored locally",
+    ),
 ) -> None:
     """Show one GitHub inline review thread."""
 
+    payload: dict[str, object] | None = None
     try:
         with _open_connection() as conn:
-            _require_registered_repo(conn, repo_full_name)
-            with _open_github_client_for_repo(conn, repo_full_name) as github:
-                payload = github.get_pull_review_thread(thread_id)
+            repository = _require_registered_repo(conn, repo_full_name)
+            stored = db.get_review_thread(conn, thread_id)
+            if stored is not None and int(stored["repo_id"]) != int(repository["id"]):
+                stored = None
+
+            if stored is not None and not refresh:
+                comments = db.list_review_thread_comments(conn, [thread_id])
+                thread_sync = db.get_review_thread_sync(
+                    conn,
+                    repo_id=int(stored["repo_id"]),
+                    pull_number=int(stored["pull_number"]),
+                )
+                payload = {
+                    "viewer_login": thread_sync["viewer_login"] if thread_sync else None,
+                    "thread": review_thread_from_row(stored, comments[thread_id]),
+                }
+            else:
+                with _open_github_client_for_repo(conn, repo_full_name) as github:
+                    payload = github.get_pull_review_thread(thread_id)
+                if stored is not None:
+                    thread = dict(payload["thread"])
+                    thread["head_ref_oid"] = stored["head_ref_oid"]
+                    db.upsert_review_thread(
+                        conn,
+                        repo_id=int(stored["repo_id"]),
+                        pull_number=int(stored["pull_number"]),
+                        thread=thread,
+                        synced_at=db.utcnow_iso(),
+                    )
+                    conn.commit()
     except GitHubError as exc:
         _exit_with_error(str(exc))
 
@@ -807,41 +1329,6 @@ def _publish_github_comment(
     return created
 
 
-def _publish_inline_github_comment(
-    *,
-    github: GitHubClient,
-    repo_full_name: str,
-    number: int,
-    body: str,
-    prefix: str,
-    commit_id: str,
-    path: str,
-    line: int,
-    side: str,
-) -> dict[str, object]:
-    text = body.strip()
-    if not text:
-        _exit_with_error("Comment body must not be empty.")
-
-    comment_body = f"{prefix}\n\n{text}" if prefix else text
-    created = github.create_pull_review_comment(
-        repo_full_name,
-        number,
-        body=comment_body,
-        commit_id=commit_id,
-        path=path,
-        line=line,
-        side=side,
-    )
-    comment_id = created.get("id", "-")
-    comment_url = created.get("html_url", "-")
-    typer.echo(
-        f"Posted GitHub inline comment id={comment_id} url={comment_url} "
-        f"path={path} line={line} side={side}"
-    )
-    return created
-
-
 @review_app.command("publish")
 def review_publish(
     number: int,
@@ -882,6 +1369,19 @@ def review_publish_local(
         "--prefix",
         help="Prefix added before comment body",
     ),
+    batch: bool = typer.Option(
+        False,
+        "--batch",
+        help=(
+            "Send inline comments as one COMMENT review and the rest as one "
+            "summary comment (two API calls in total)"
+        ),
+    ),
+    no_wait: bool = typer.Option(
+        False,
+        "--no-wait",
+        help="Only enqueue; the API server's outbox worker delivers in the background",
+    ),
 ) -> None:
     """Publish local AI review comments to GitHub PR without changing PR state."""
 
@@ -910,67 +1410,46 @@ def review_publish_local(
 
     with _open_connection() as conn:
         _require_registered_repo(conn, repo_full_name)
-        _require_pull_request(conn, repo_full_name, number)
-        with _open_github_client_for_repo(conn, repo_full_name) as github:
-            pull_request = github.get_pull_request(repo_full_name, number)
-            pull_files = github.list_pull_files(repo_full_name, number)
-
-            for item in selected:
-                file_path = item["file_path"]
-                line_number = item["line_number"]
-                inline_body = (
-                    f"[{item['severity']}] {item['body']}\n\n"
-                    f"(agent={item['agent']}, local_review_id={item['id']})"
-                )
-                fallback_target = "PR"
-                if file_path:
-                    fallback_target = f"{file_path}:{line_number or '-'}"
-                fallback_body = (
-                    f"[{item['severity']}] {fallback_target}\n\n"
-                    f"{item['body']}\n\n"
-                    f"(agent={item['agent']}, local_review_id={item['id']})"
-                )
+        pr = _require_pull_request(conn, repo_full_name, number)
+        db.enqueue_review_publish(
+            conn,
+            ai_review_ids=[int(item["id"]) for item in selected],
+            prefix=prefix,
+            batch=batch,
+        )
+        conn.commit()
 
-                inline_target = None
-                if file_path and line_number is not None:
-                    inline_target = resolve_inline_comment_target(
-                        pull_request,
-                        pull_files,
-                        file_path=str(file_path),
-                        line_number=int(line_number),
-                    )
+        if no_wait:
+            typer.echo(
+                f"Queued {len(selected)} local review comment(s) for GitHub PR #{number}."
+            )
+            return
 
-                if inline_target is not None:
-                    try:
-                        _publish_inline_github_comment(
-                            github=github,
-                            repo_full_name=repo_full_name,
-                            number=number,
-                            body=inline_body,
-                            prefix=prefix,
-                            commit_id=inline_target.commit_id,
-                            path=inline_target.path,
-                            line=inline_target.line,
-                            side=inline_target.side,
-                        )
-                        continue
-                    except GitHubError as exc:
-                        if exc.status_code != 422:
-                            raise
-                        typer.echo(
-                            "Inline publish failed validation; falling back to a PR comment."
-                        )
-
-                created = github.create_issue_comment(
-                    repo_full_name,
-                    number,
-                    f"{prefix}\n\n{fallback_body}" if prefix else fallback_body,
-                )
-                comment_id = created.get("id", "-")
-                comment_url = created.get("html_url", "-")
-                typer.echo(
-                    f"Posted GitHub fallback comment id={comment_id} url={comment_url}"
-                )
+        try:
+            result = drain_review_publish_outbox(
+                conn,
+                _open_github_client_for_repo,
+                pull_request_id=int(pr["id"]),
+                notify=typer.echo,
+            )
+        except GitHubError as exc:
+            _exit_with_error(str(exc))
+
+        selected_ids = {int(item["id"]) for item in selected}
+        states = [
+            str(row["state"])
+            for row in db.list_review_publish_outbox(conn, pull_request_id=int(pr["id"]))
+            if int(row["ai_review_id"]) in selected_ids
+        ]
+
+    undelivered = len(states) - states.count("delivered")
+    if undelivered:
+        for error in result.errors:
+            typer.secho(error, fg=typer.colors.RED, err=True)
+        _exit_with_error(
+            f"{undelivered} of {len(selected)} local review comment(s) are not delivered yet; "
+            "rerun to retry (already delivered comments are never re-sent)."
+        )
 
     typer.echo(f"Published {len(selected)} local review comment(s) to GitHub PR #{number}.")
 
@@ -1004,6 +1483,71 @@ def review_add(
     typer.echo(f"Added AI review comment id={review_id}.")
 
 
+@review_app.command("import")
+def review_import(
+    number: int,
+    repo_full_name: str = typer.Option(..., "--repo"),
+    source: typer.FileText = typer.Option(
+        "-",
+        "--file",
+        help="NDJSON or SARIF file to read (`-` for stdin)",
+    ),
+    import_format: ReviewImportFormat = typer.Option(ReviewImportFormat.AUTO, "--format"),
+    agent: str = typer.Option("codex", "--agent", help="Agent for rows that do not name one"),
+    strict: bool = typer.Option(
+        False,
+        "--strict",
+        help="Import nothing if any row is invalid",
+    ),
+    json_output: bool = typer.Option(
+        False,
+        "--json",
+        help="Output structured JSON instead of text",
+    ),
+) -> None:
+    """Import many local AI review comments in one transaction."""
+
+    try:
+        batch = parse_review_import(
+            source.read(),
+            import_format=import_format.value,
+            default_agent=agent,
+        )
+    except ReviewImportError as exc:
+        _exit_with_error(str(exc))
+
+    inserted = 0
+    with _open_connection() as conn:
+        _require_registered_repo(conn, repo_full_name)
+        pr = _require_pull_request(conn, repo_full_name, number)
+        if batch.reviews and not (strict and batch.errors):
+            inserted = db.insert_ai_reviews(
+                conn,
+                pull_request_id=int(pr["id"]),
+                reviews=batch.reviews,
+            )
+            conn.commit()
+
+    if json_output:
+        typer.echo(
+            json.dumps(
+                {"total": batch.total, "inserted": inserted, "errors": batch.errors},
+                indent=2,
+                ensure_ascii=False,
+            )
+        )
+    else:
+        for error in batch.errors:
+            typer.secho(f"row {error['index']}: {error['error']}", fg=typer.colors.RED, err=True)
+        typer.echo(
+            f"Imported {inserted} of {batch.total} AI review comments"
+            f" ({len(batch.errors)} invalid)."
+        )
+
+    if batch.errors:
+        raise typer.Exit(code=1)
+
+
 @review_app.command("list")
 def review_list(
     number: int,
@@ -1036,27 +1580,108 @@ def review_list(
 
 @review_app.command("status")
 def review_status(
-    number: int,
+    numbers: list[int] = typer.Argument(..., help="One or more PR numbers"),
     repo_full_name: str = typer.Option(..., "--repo"),
     set_status: ReviewStatus = typer.Option(..., "--set"),
 ) -> None:
-    """Set local review workflow status for a PR."""
+    """Set local review workflow status for one or more PRs in one transaction."""
 
+    numbers = list(dict.fromkeys(numbers))
     with _open_connection() as conn:
         _require_registered_repo(conn, repo_full_name)
-        pr = _require_pull_request(conn, repo_full_name, number)
-        db.set_review_status(
+        rows = {
+            int(row["number"]): row
+            for row in db.get_pull_requests_by_numbers(conn, repo_full_name, numbers)
+        }
+        missing = [number for number in numbers if number not in rows]
+        if missing:
+            _exit_with_error(
+                f"PR(s) {', '.join(f'#{number}' for number in missing)} for "
+                f"`{repo_full_name}` not found in local DB. "
+                f"Run `squire sync --repo {repo_full_name}` first."
+            )
+        db.set_review_statuses(
             conn,
-            pull_request_id=pr["id"],
-            status=set_status.value,
+            [(int(rows[number]["id"]), set_status.value) for number in numbers],
         )
         conn.commit()
 
-    typer.echo(f"Set review status to `{set_status.value}` for PR #{number}.")
+    targets = ", ".join(f"#{number}" for number in numbers)
+    typer.echo(f"Set review status to `{set_status.value}` for PR {targets}.")
+
+
+def _echo_config(data: dict, json_output: bool) -> None:
+    if json_output:
+        typer.echo(json.dumps(data, indent=2, ensure_ascii=False))
+        return
+    for key in ("github_base_url", "github_token", "db_path", "git_mirror_dir"):
+        typer.echo(f"{key}: {data[key] if data[key] is not None else '-'}")
+    for env_file in data["env_files"]:
+        state = "loaded" if env_file["mtime_ns"] is not None else "missing"
+        typer.echo(f"env_file: {env_file['path']} ({state})")
+
+
+@config_app.command("show")
+def config_show(
+    json_output: bool = typer.Option(False, "--json", help="Print JSON"),
+) -> None:
+    """Show resolved settings (the GitHub token is shown only as set/unset)."""
+
+    _echo_config(settings_service.describe(), json_output)
+
+
+@config_app.command("reload")
+def config_reload(
+    url: str = typer.Option(
+        "http://127.0.0.1:8484",
+        "--url",
+        help="Running `squire serve` instance to reload",
+    ),
+    json_output: bool = typer.Option(False, "--json", help="Print JSON"),
+) -> None:
+    """Re-read `.env` files and ask a running server to do the same."""
+
+    import httpx
+
+    reload_settings()
+    try:
+        response = httpx.post(f"{url.rstrip('/')}/config/reload", timeout=5.0)
+        response.raise_for_status()
+    except httpx.HTTPError as exc:
+        _exit_with_error(f"Could not reload server settings at {url}: {exc}")
+    if not json_output:
+        typer.echo(f"Reloaded settings on {url}.")
+    _echo_config(response.json(), json_output)
+
+
+def _trace_name(argv: list[str]) -> str:
+    """`squire review list 12 --repo o/r` -> `squire review list`; arguments are left out."""
+
+    groups = {group.name for group in app.registered_groups}
+    words = [word for word in argv if not word.startswith("-")][:2]
+    if words and words[0] not in groups:
+        words = words[:1]
+    return " ".join(["squire", *words])
 
 
 def main() -> None:
-    app()
+    if not tracing.cli_tracing_enabled():
+        app()
+        return
+
+    # Print the breakdown for every command, not only slow ones, and wait for export.
+    tracer = tracing.Tracer(
+        exporter=tracing.create_exporter(),
+        slow_threshold_ms=0,
+    )
+    trace = None
+    try:
+        with tracer.trace(_trace_name(sys.argv[1:])) as trace:
+            app()
+    finally:
+        if trace is not None:
+            typer.echo(tracing.format_breakdown(trace), err=True)
+        tracer.flush()
 
 
 if __name__ == "__main__":
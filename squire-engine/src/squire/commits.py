@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+import json
+from typing import Any
+
+_SHA_PREFIX_MIN_LENGTH = 7
+_HEX_DIGITS = frozenset("0123456789abcdef")
+
+
+def looks_like_sha_prefix(ref: str) -> bool:
+    lowered = ref.lower()
+    return (
+        _SHA_PREFIX_MIN_LENGTH <= len(lowered) <= 40
+        and all(char in _HEX_DIGITS for char in lowered)
+    )
+
+
+def normalize_commit(payload: dict[str, Any]) -> dict[str, Any]:
+    """Flatten a REST commit payload (`commits/{ref}` or `pulls/{n}/commits` item)."""
+
+    commit_data = payload.get("commit") or {}
+    author = commit_data.get("author") or {}
+    committer = commit_data.get("committer") or {}
+    author_user = payload.get("author") or {}
+
+    return {
+        "sha": str(payload.get("sha") or ""),
+        "parents": [
+            str(parent.get("sha"))
+            for parent in payload.get("parents") or []
+            if isinstance(parent, dict) and parent.get("sha")
+        ],
+        "author_name": str(author.get("name") or "") or None,
+        "author_login": str(author_user.get("login") or "") or None,
+        "authored_at": str(author.get("date") or "") or None,
+        "committer_name": str(committer.get("name") or "") or None,
+        "committed_at": str(committer.get("date") or author.get("date") or "") or None,
+        "message": str(commit_data.get("message") or ""),
+    }
+
+
+def commit_from_row(row: Mapping[str, Any]) -> dict[str, Any]:
+    return {
+        "sha": row["sha"],
+        "parents": json.loads(row["parent_shas"] or "[]"),
+        "author_name": row["author_name"],
+        "author_login": row["author_login"],
+        "authored_at": row["authored_at"],
+        "committer_name": row["committer_name"],
+        "committed_at": row["committed_at"],
+        "message": row["message"],
+    }
+
+
+def format_commit(commit: dict[str, Any]) -> str:
+    headline = (commit.get("message") or "").splitlines()[0:1]
+    author = commit.get("author_login") or commit.get("author_name") or "-"
+    return (
+        f"{commit['sha'][:12]} {commit.get('committed_at') or '-'} "
+        f"{author} {headline[0] if headline else ''}"
+    ).rstrip()
@@ -1,22 +1,58 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
 import os
+import threading
+from typing import Any
 
-from dotenv import load_dotenv
+from dotenv import dotenv_values
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_GITHUB_BASE_URL = "https://api.github.com"
+SETTINGS_ENV_KEYS = (
+    "GITHUB_TOKEN",
+    "GITHUB_BASE_URL",
+    "SQUIRE_DB_PATH",
+    "SQUIRE_GIT_MIRROR_DIR",
+)
 
+# Values this process copied from `.env` files, so a reload can replace or drop them
+# without touching variables that came from the real environment.
+_dotenv_applied: dict[str, str] = {}
+_dotenv_lock = threading.Lock()
 
-def load_environment() -> None:
+
+def env_files() -> list[Path]:
     project_env = PROJECT_ROOT / ".env"
     cwd_env = Path.cwd() / ".env"
+    return [project_env] if cwd_env == project_env else [project_env, cwd_env]
 
-    load_dotenv(project_env, override=False)
-    if cwd_env != project_env:
-        load_dotenv(cwd_env, override=False)
+
+def load_environment() -> None:
+    """Apply `.env` values (project first, then cwd) without overriding the real environment."""
+
+    values: dict[str, str] = {}
+    for path in env_files():
+        if path.is_file():
+            for key, value in dotenv_values(path).items():
+                if value is not None:
+                    values.setdefault(key, value)
+
+    with _dotenv_lock:
+        for key, applied in list(_dotenv_applied.items()):
+            if os.environ.get(key) != applied:
+                # Changed by someone else since; it is no longer ours to manage.
+                del _dotenv_applied[key]
+            elif key not in values:
+                del os.environ[key]
+                del _dotenv_applied[key]
+        for key, value in values.items():
+            if key in os.environ and key not in _dotenv_applied:
+                continue
+            os.environ[key] = value
+            _dotenv_applied[key] = value
 
 
 @dataclass(frozen=True)
@@ -24,6 +60,7 @@ class Settings:
     github_token: str | None
     github_base_url: str
     db_path: Path
+    git_mirror_dir: Path | None = None
 
 
 def _find_git_root(start: Path) -> Path | None:
@@ -41,9 +78,7 @@ def _default_db_path() -> Path:
     return PROJECT_ROOT / "data" / "squire.db"
 
 
-def get_settings() -> Settings:
-    load_environment()
-
+def _resolve_settings() -> Settings:
     raw_db_path = os.getenv("SQUIRE_DB_PATH")
     db_path = (
         Path(raw_db_path).expanduser()
@@ -55,8 +90,95 @@ def get_settings() -> Settings:
     base_url = os.getenv("GITHUB_BASE_URL")
     normalized_base_url = (base_url or "").strip() or DEFAULT_GITHUB_BASE_URL
 
+    raw_mirror_dir = (os.getenv("SQUIRE_GIT_MIRROR_DIR") or "").strip()
+    git_mirror_dir = Path(raw_mirror_dir).expanduser() if raw_mirror_dir else None
+
     return Settings(
         github_token=token.strip() if token else None,
         github_base_url=normalized_base_url.rstrip("/"),
         db_path=db_path,
+        git_mirror_dir=git_mirror_dir,
     )
+
+
+def _file_mtime(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class SettingsService:
+    """Resolved `Settings`, rebuilt only when their inputs change.
+
+    A lookup costs two `stat` calls and a few environment reads. `.env` files are
+    re-read when their mtime changes (or on `reload()`), and the `.git` walk for
+    the default DB path reruns only when the working directory or a settings
+    variable changes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._settings: Settings | None = None
+        self._files_key: tuple[Any, ...] | None = None
+        self._env_key: tuple[str | None, ...] | None = None
+        self.loaded_at: str | None = None
+        self.loads = 0
+
+    @staticmethod
+    def _current_files_key() -> tuple[Any, ...]:
+        return tuple((str(path), _file_mtime(path)) for path in env_files())
+
+    @staticmethod
+    def _current_env_key() -> tuple[str | None, ...]:
+        return (str(Path.cwd()), *(os.environ.get(key) for key in SETTINGS_ENV_KEYS))
+
+    def get(self) -> Settings:
+        files_key = self._current_files_key()
+        with self._lock:
+            if files_key != self._files_key:
+                return self._load(files_key)
+            if self._settings is not None and self._current_env_key() == self._env_key:
+                return self._settings
+            return self._load(files_key, reread_files=False)
+
+    def reload(self) -> Settings:
+        with self._lock:
+            return self._load(self._current_files_key())
+
+    def _load(self, files_key: tuple[Any, ...], *, reread_files: bool = True) -> Settings:
+        if reread_files:
+            load_environment()
+        self._settings = _resolve_settings()
+        self._files_key = files_key
+        self._env_key = self._current_env_key()
+        self.loaded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.loads += 1
+        return self._settings
+
+    def describe(self) -> dict[str, Any]:
+        """Current settings for debugging; the GitHub token is reported only as set/unset."""
+
+        settings = self.get()
+        return {
+            "github_token": "set" if settings.github_token else None,
+            "github_base_url": settings.github_base_url,
+            "db_path": str(settings.db_path),
+            "git_mirror_dir": str(settings.git_mirror_dir) if settings.git_mirror_dir else None,
+            "env_files": [
+                {"path": path, "mtime_ns": mtime} for path, mtime in self._files_key or ()
+            ],
+            "loaded_at": self.loaded_at,
+            "loads": self.loads,
+        }
+
+
+settings_service = SettingsService()
+
+
+def get_settings() -> Settings:
+    return settings_service.get()
+
+
+def reload_settings() -> Settings:
+    return settings_service.reload()
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import gzip
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from compression import zstd as _zstd  # Python 3.14+
+except ImportError:
+    _zstd = None
+
+try:
+    import zstandard
+except ImportError:  # optional: `pip install 'squire-engine[fast]'`
+    zstandard = None
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/csv")
+
+
+def _zstd_available() -> bool:
+    return _zstd is not None or zstandard is not None
+
+
+def compress_body(body: bytes, encoding: str, *, level: int | None = None) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6 if level is None else level, mtime=0)
+    if encoding == "zstd":
+        zstd_level = 3 if level is None else level
+        if _zstd is not None:
+            return _zstd.compress(body, level=zstd_level)
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=zstd_level).compress(body)
+    raise ValueError(f"Unsupported content encoding `{encoding}`.")
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick `zstd` or `gzip` from an `Accept-Encoding` header, honouring q-values.
+
+    On equal weight zstd wins, as it is both faster and smaller than gzip.
+    """
+
+    if not accept_encoding:
+        return None
+
+    supported = ["zstd", "gzip"] if _zstd_available() else ["gzip"]
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if name:
+            weights[name] = weight
+
+    best: str | None = None
+    best_weight = 0.0
+    for encoding in supported:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CompressionMiddleware:
+    """Compress complete JSON/text responses of at least `minimum_size` bytes.
+
+    Streamed responses (SSE, file downloads) pass through untouched, so events are
+    never held back waiting for a compression block to fill.
+    """
+
+    def __init__(self, app: ASGIApp, *, minimum_size: int) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        streaming = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, streaming
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            if streaming or message.get("more_body", False):
+                if not streaming:
+                    streaming = True
+                    await send(start)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body: bytes = message.get("body", b"")
+            if self._compressible(headers):
+                headers.add_vary_header("Accept-Encoding")
+                if len(body) >= self.minimum_size:
+                    body = compress_body(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressible(headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type.startswith(_COMPRESSIBLE_TYPES)
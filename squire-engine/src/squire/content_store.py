@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+import os
+from pathlib import Path
+import sqlite3
+import tempfile
+from typing import Literal
+import zlib
+
+from . import db
+from .config import Settings
+from .github import GitHubClient
+
+ContentSide = Literal["base", "head"]
+
+
+class ContentNotFoundError(LookupError):
+    """Raised when a path does not exist as a file at the requested commit."""
+
+
+class BlobIntegrityError(RuntimeError):
+    """Raised when fetched content does not hash to the expected blob SHA."""
+
+
+def git_blob_sha(content: bytes) -> str:
+    header = f"blob {len(content)}\0".encode()
+    return hashlib.sha1(header + content).hexdigest()
+
+
+class BlobStore:
+    """Content-addressed, zlib-compressed blob files keyed by git blob SHA.
+
+    Layout mirrors git's loose objects (`<root>/ab/cdef...`), so identical file
+    contents from any PR or revision share a single stored copy.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def path_for(self, sha: str) -> Path:
+        return self.root / sha[:2] / sha[2:]
+
+    def has(self, sha: str) -> bool:
+        return self.path_for(sha).exists()
+
+    def get(self, sha: str) -> bytes | None:
+        try:
+            compressed = self.path_for(sha).read_bytes()
+        except FileNotFoundError:
+            return None
+        return zlib.decompress(compressed)
+
+    def put(self, content: bytes, *, expected_sha: str | None = None) -> str:
+        sha = git_blob_sha(content)
+        if expected_sha is not None and sha != expected_sha:
+            raise BlobIntegrityError(
+                f"Blob content hashes to `{sha}`, expected `{expected_sha}`."
+            )
+
+        target = self.path_for(sha)
+        if target.exists():
+            return sha
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(zlib.compress(content))
+            os.replace(temp_name, target)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+        return sha
+
+
+def blob_store_for(settings: Settings) -> BlobStore:
+    return BlobStore(settings.db_path.parent / "blobs")
+
+
+@dataclass(frozen=True)
+class FileContent:
+    path: str
+    side: ContentSide
+    commit_sha: str
+    blob_sha: str
+    content: bytes
+
+
+def read_pull_file(
+    conn: sqlite3.Connection,
+    github: GitHubClient,
+    store: BlobStore,
+    *,
+    repo_id: int,
+    repo_full_name: str,
+    number: int,
+    path: str,
+    side: ContentSide = "head",
+) -> FileContent:
+    """Load one file of a PR at its head or base commit through the blob store.
+
+    Only the PR payload is always fetched. The `(commit, path) -> blob` mapping is
+    kept in SQLite and blob bytes are downloaded only when the store lacks them.
+    """
+
+    pull_request = github.get_pull_request(repo_full_name, number)
+    commit_sha = str((pull_request.get(side) or {}).get("sha") or "").strip()
+    if not commit_sha:
+        raise ContentNotFoundError(f"PR #{number} has no {side} commit SHA.")
+
+    blob_sha = db.get_file_blob_sha(
+        conn, repo_id=repo_id, commit_sha=commit_sha, path=path
+    )
+    if blob_sha is None:
+        blob_sha = github.get_blob_oid(repo_full_name, commit_sha, path)
+        if blob_sha is None:
+            raise ContentNotFoundError(
+                f"`{path}` is not a file at {side} commit `{commit_sha}`."
+            )
+        db.upsert_file_blob_ref(
+            conn,
+            repo_id=repo_id,
+            commit_sha=commit_sha,
+            path=path,
+            blob_sha=blob_sha,
+        )
+
+    content = store.get(blob_sha)
+    if content is None:
+        content = github.get_git_blob(repo_full_name, blob_sha)
+        store.put(content, expected_sha=blob_sha)
+
+    return FileContent(
+        path=path,
+        side=side,
+        commit_sha=commit_sha,
+        blob_sha=blob_sha,
+        content=content,
+    )
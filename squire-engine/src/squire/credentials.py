@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Collection
+import json
+import os
+from pathlib import Path
+import re
+import threading
+import time
+from typing import Protocol
+
+from . import keychain, tracing
+from .config import get_settings
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # optional: `pip install 'squire-engine[credentials]'`
+    Fernet = None
+    InvalidToken = None
+
+DEFAULT_CACHE_TTL = 60.0
+CREDENTIAL_STORES = ("keychain", "env", "file", "memory")
+_ENV_PREFIX = "SQUIRE_GITHUB_TOKEN_"
+
+
+class CredentialStoreError(RuntimeError):
+    """Base error for repository token storage."""
+
+
+class CredentialStoreUnavailableError(CredentialStoreError):
+    """Raised when the configured store cannot hold tokens here (missing tool, read-only)."""
+
+
+class CredentialStoreCommandError(CredentialStoreError):
+    """Raised when reading or writing the store fails."""
+
+
+def _normalize_token(token: str | None) -> str | None:
+    if token is None:
+        return None
+    normalized = token.strip()
+    return normalized or None
+
+
+class CredentialProvider(Protocol):
+    name: str
+
+    def get(self, account: str) -> str | None: ...
+
+    def find_accounts(self, accounts: Collection[str]) -> set[str]:
+        """Subset of `accounts` that have a token, in as few backend calls as possible."""
+        ...
+
+    def set(self, account: str, token: str) -> None: ...
+
+    def delete(self, account: str) -> None: ...
+
+
+class KeychainCredentialProvider:
+    """macOS Keychain via the `security` CLI; one subprocess per call."""
+
+    name = "keychain"
+
+    def get(self, account: str) -> str | None:
+        try:
+            return keychain.get_github_token(account)
+        except keychain.KeychainCommandError as exc:
+            raise CredentialStoreCommandError(str(exc)) from exc
+
+    def find_accounts(self, accounts: Collection[str]) -> set[str]:
+        try:
+            return keychain.list_github_token_accounts() & set(accounts)
+        except keychain.KeychainCommandError as exc:
+            raise CredentialStoreCommandError(str(exc)) from exc
+
+    def set(self, account: str, token: str) -> None:
+        try:
+            keychain.set_github_token(account, token)
+        except keychain.KeychainUnavailableError as exc:
+            raise CredentialStoreUnavailableError(str(exc)) from exc
+        except keychain.KeychainCommandError as exc:
+            raise CredentialStoreCommandError(str(exc)) from exc
+
+    def delete(self, account: str) -> None:
+        try:
+            keychain.delete_github_token(account)
+        except keychain.KeychainCommandError as exc:
+            raise CredentialStoreCommandError(str(exc)) from exc
+
+
+def env_var_for_account(account: str) -> str:
+    """`owner/my-repo` -> `SQUIRE_GITHUB_TOKEN_OWNER_MY_REPO`."""
+
+    return _ENV_PREFIX + re.sub(r"[^A-Za-z0-9]", "_", account).upper()
+
+
+class EnvCredentialProvider:
+    """Read-only tokens from `SQUIRE_GITHUB_TOKEN_<OWNER>_<REPO>` variables (CI, containers)."""
+
+    name = "env"
+
+    def get(self, account: str) -> str | None:
+        return _normalize_token(os.getenv(env_var_for_account(account)))
+
+    def find_accounts(self, accounts: Collection[str]) -> set[str]:
+        return {account for account in accounts if self.get(account) is not None}
+
+    def set(self, account: str, token: str) -> None:
+        raise CredentialStoreUnavailableError(
+            f"The environment credential store is read-only; "
+            f"set `{env_var_for_account(account)}` instead."
+        )
+
+    def delete(self, account: str) -> None:
+        # Nothing Squire owns to remove; the variable belongs to the caller's environment.
+        return None
+
+
+class EncryptedFileCredentialProvider:
+    """Fernet-encrypted JSON map of account -> token, for hosts without a keychain.
+
+    The key comes from `SQUIRE_CREDENTIALS_KEY` or a `0600` key file created next to
+    the store on first write; keep the key elsewhere for protection beyond file modes.
+    """
+
+    name = "file"
+
+    def __init__(self, path: Path, *, key: bytes | None = None) -> None:
+        if Fernet is None:
+            raise CredentialStoreUnavailableError(
+                "The encrypted file credential store requires `cryptography` "
+                "(install the `credentials` extra)."
+            )
+        self.path = path
+        self._key = key
+        self._lock = threading.Lock()
+
+    def _fernet(self, *, create: bool) -> Fernet | None:
+        if self._key is None:
+            raw = (os.getenv("SQUIRE_CREDENTIALS_KEY") or "").strip()
+            key_path = self.path.with_suffix(".key")
+            if raw:
+                self._key = raw.encode("ascii")
+            elif key_path.exists():
+                self._key = key_path.read_bytes().strip()
+            elif create:
+                self._key = Fernet.generate_key()
+                key_path.parent.mkdir(parents=True, exist_ok=True)
+                _write_private(key_path, self._key)
+            else:
+                return None
+        return Fernet(self._key)
+
+    def _load(self) -> dict[str, str]:
+        if not self.path.exists():
+            return {}
+        fernet = self._fernet(create=False)
+        if fernet is None:
+            raise CredentialStoreCommandError(
+                f"No key available to decrypt `{self.path}` (set SQUIRE_CREDENTIALS_KEY)."
+            )
+        try:
+            payload = json.loads(fernet.decrypt(self.path.read_bytes()))
+        except (InvalidToken, ValueError) as exc:
+            raise CredentialStoreCommandError(f"Cannot decrypt `{self.path}`.") from exc
+        return {str(account): str(token) for account, token in payload.items()}
+
+    def _save(self, tokens: dict[str, str]) -> None:
+        fernet = self._fernet(create=True)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        encrypted = fernet.encrypt(json.dumps(tokens, sort_keys=True).encode("utf-8"))
+        _write_private(self.path, encrypted)
+
+    def get(self, account: str) -> str | None:
+        with self._lock:
+            return self._load().get(account)
+
+    def find_accounts(self, accounts: Collection[str]) -> set[str]:
+        with self._lock:
+            return set(self._load()) & set(accounts)
+
+    def set(self, account: str, token: str) -> None:
+        normalized = _normalize_token(token)
+        if not normalized:
+            raise CredentialStoreCommandError("GitHub token must not be empty.")
+        with self._lock:
+            tokens = self._load()
+            tokens[account] = normalized
+            self._save(tokens)
+
+    def delete(self, account: str) -> None:
+        with self._lock:
+            tokens = self._load()
+            if tokens.pop(account, None) is not None:
+                self._save(tokens)
+
+
+def _write_private(path: Path, data: bytes) -> None:
+    temp_path = path.with_name(f".{path.name}.tmp")
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(data)
+    os.replace(temp_path, path)
+
+
+class MemoryCredentialProvider:
+    """Process-local tokens; for tests and throwaway servers."""
+
+    name = "memory"
+
+    def __init__(self, tokens: dict[str, str] | None = None) -> None:
+        self.tokens = dict(tokens or {})
+
+    def get(self, account: str) -> str | None:
+        return self.tokens.get(account)
+
+    def find_accounts(self, accounts: Collection[str]) -> set[str]:
+        return set(self.tokens) & set(accounts)
+
+    def set(self, account: str, token: str) -> None:
+        normalized = _normalize_token(token)
+        if not normalized:
+            raise CredentialStoreCommandError("GitHub token must not be empty.")
+        self.tokens[account] = normalized
+
+    def delete(self, account: str) -> None:
+        self.tokens.pop(account, None)
+
+
+class CachedCredentialStore:
+    """Process-level TTL cache in front of a provider.
+
+    Lookups (including "no token") are cached per account for `ttl` seconds, and
+    bulk presence checks share one cached provider scan. Writes through this store
+    invalidate the affected entries immediately; changes made by another process
+    are picked up once the TTL expires.
+    """
+
+    def __init__(
+        self,
+        provider: CredentialProvider,
+        *,
+        ttl: float = DEFAULT_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.provider = provider
+        self.ttl = ttl
+        self._clock = clock
+        self._tokens: dict[str, tuple[float, str | None]] = {}
+        self._present: dict[str, tuple[float, bool]] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, stored_at: float) -> bool:
+        return self._clock() - stored_at < self.ttl
+
+    def get_token(self, account: str) -> str | None:
+        with self._lock:
+            cached = self._tokens.get(account)
+            if cached is not None and self._fresh(cached[0]):
+                return cached[1]
+        with tracing.span("credentials.get", provider=self.provider.name):
+            token = self.provider.get(account)
+        with self._lock:
+            now = self._clock()
+            self._tokens[account] = (now, token)
+            self._present[account] = (now, token is not None)
+        return token
+
+    def accounts_with_tokens(self, accounts: Collection[str]) -> set[str]:
+        wanted = set(accounts)
+        found: set[str] = set()
+        missing: set[str] = set()
+        with self._lock:
+            for account in wanted:
+                cached = self._present.get(account)
+                if cached is not None and self._fresh(cached[0]):
+                    if cached[1]:
+                        found.add(account)
+                else:
+                    missing.add(account)
+        if missing:
+            with tracing.span(
+                "credentials.find_accounts",
+                provider=self.provider.name,
+                accounts=len(missing),
+            ):
+                present = self.provider.find_accounts(missing)
+            with self._lock:
+                now = self._clock()
+                for account in missing:
+                    self._present[account] = (now, account in present)
+            found |= present
+        return found
+
+    def has_token(self, account: str) -> bool:
+        return account in self.accounts_with_tokens([account])
+
+    def set_token(self, account: str, token: str) -> None:
+        try:
+            self.provider.set(account, token)
+        finally:
+            self.invalidate(account)
+
+    def delete_token(self, account: str) -> None:
+        try:
+            self.provider.delete(account)
+        finally:
+            self.invalidate(account)
+
+    def invalidate(self, account: str | None = None) -> None:
+        with self._lock:
+            if account is None:
+                self._tokens.clear()
+                self._present.clear()
+            else:
+                self._tokens.pop(account, None)
+                self._present.pop(account, None)
+
+
+def _load_cache_ttl() -> float:
+    raw = os.getenv("SQUIRE_CREDENTIAL_CACHE_TTL")
+    if raw is None or not raw.strip():
+        return DEFAULT_CACHE_TTL
+    try:
+        return max(float(raw), 0.0)
+    except ValueError:
+        return DEFAULT_CACHE_TTL
+
+
+def create_provider(name: str | None = None) -> CredentialProvider:
+    """Provider named by `SQUIRE_CREDENTIAL_STORE`; Keychain on macOS, else environment."""
+
+    settings = get_settings()
+    name = (name or os.getenv("SQUIRE_CREDENTIAL_STORE") or "").strip().lower()
+    if not name:
+        name = "keychain" if keychain.is_available() else "env"
+    if name == "keychain":
+        return KeychainCredentialProvider()
+    if name == "env":
+        return EnvCredentialProvider()
+    if name == "file":
+        raw_path = (os.getenv("SQUIRE_CREDENTIALS_FILE") or "").strip()
+        path = (
+            Path(raw_path).expanduser()
+            if raw_path
+            else settings.db_path.parent / "credentials.enc"
+        )
+        return EncryptedFileCredentialProvider(path)
+    if name == "memory":
+        return MemoryCredentialProvider()
+    raise CredentialStoreUnavailableError(
+        f"Unknown credential store `{name}` (expected one of {', '.join(CREDENTIAL_STORES)})."
+    )
+
+
+_store: CachedCredentialStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_credential_store() -> CachedCredentialStore:
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            _store = CachedCredentialStore(create_provider(), ttl=_load_cache_ttl())
+        return _store
+
+
+def configure_credential_store(store: CachedCredentialStore | None) -> None:
+    """Replace the process-wide store (`None` re-reads the environment on next use)."""
+
+    global _store
+
+    with _store_lock:
+        _store = store
+
+
+def get_github_token(account: str) -> str | None:
+    return get_credential_store().get_token(account)
+
+
+def has_github_token(account: str) -> bool:
+    return get_credential_store().has_token(account)
+
+
+def github_token_accounts(accounts: Collection[str]) -> set[str]:
+    return get_credential_store().accounts_with_tokens(accounts)
+
+
+def set_github_token(account: str, token: str) -> None:
+    get_credential_store().set_token(account, token)
+
+
+def delete_github_token(account: str) -> None:
+    get_credential_store().delete_token(account)
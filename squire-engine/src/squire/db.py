@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from datetime import datetime, timezone
+from functools import lru_cache
+import json
 import sqlite3
+import time
 from typing import Any
 
+from . import metrics, tracing
 from .config import Settings
+from .migrations import migrate
+from .review_threads import extract_thread_mentions
+from .timestamps import to_epoch_ms
 
 
 def utcnow_iso() -> str:
@@ -25,85 +33,92 @@ def _normalize_optional_base_url(value: str | None) -> str | None:
     return normalized or None
 
 
-def connect(settings: Settings) -> sqlite3.Connection:
-    settings.db_path.parent.mkdir(parents=True, exist_ok=True)
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 16 * 1024
+
+
+@lru_cache(maxsize=1024)
+def _statement_kind(sql: str) -> str:
+    for line in sql.splitlines():
+        head = line.split(None, 1)
+        if head and not head[0].startswith("--"):
+            return head[0].upper()
+    return "EMPTY"
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection that records `execute`/`executemany` time per statement kind.
+
+    Only the statement itself is timed; rows fetched later from the cursor are not.
+    """
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        kind = _statement_kind(sql)
+        started = time.perf_counter()
+        try:
+            with tracing.span("sqlite." + kind, **{"db.statement": sql}):
+                return super().execute(sql, parameters)
+        finally:
+            metrics.SQLITE_QUERY_DURATION.labels(kind).observe(time.perf_counter() - started)
+
+    def executemany(self, sql: str, parameters: Any, /) -> sqlite3.Cursor:
+        kind = _statement_kind(sql)
+        started = time.perf_counter()
+        try:
+            with tracing.span("sqlite." + kind, **{"db.statement": sql}):
+                return super().executemany(sql, parameters)
+        finally:
+            metrics.SQLITE_QUERY_DURATION.labels(kind).observe(time.perf_counter() - started)
 
-    conn = sqlite3.connect(settings.db_path)
+
+def _configure(conn: sqlite3.Connection) -> None:
     conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
     conn.execute("PRAGMA foreign_keys = ON")
-    init_schema(conn)
+    # NORMAL is durable across application crashes in WAL mode; only an OS crash
+    # can roll back the most recent commits.
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+
+def connect(settings: Settings, *, check_same_thread: bool = True) -> sqlite3.Connection:
+    settings.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    with tracing.span("sqlite.connect", mode="rw"):
+        conn = sqlite3.connect(
+            settings.db_path,
+            check_same_thread=check_same_thread,
+            factory=TimedConnection,
+        )
+        _configure(conn)
+        # WAL is persistent in the file; this is a no-op once the database is converted.
+        conn.execute("PRAGMA journal_mode = WAL")
+        migrate(conn)
+    metrics.SQLITE_CONNECT_DURATION.labels("rw").observe(time.perf_counter() - started)
     return conn
 
 
-def init_schema(conn: sqlite3.Connection) -> None:
-    conn.executescript(
-        """
-        CREATE TABLE IF NOT EXISTS repositories (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            full_name TEXT NOT NULL UNIQUE,
-            github_base_url TEXT,
-            is_active INTEGER NOT NULL DEFAULT 1 CHECK (is_active IN (0, 1)),
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL,
-            last_synced_at TEXT
-        );
-
-        CREATE TABLE IF NOT EXISTS pull_requests (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
-            number INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            body TEXT,
-            author TEXT NOT NULL,
-            state TEXT NOT NULL CHECK (state IN ('open', 'closed', 'merged')),
-            head_branch TEXT NOT NULL,
-            base_branch TEXT NOT NULL,
-            changed_files INTEGER NOT NULL DEFAULT 0,
-            reviewers TEXT NOT NULL DEFAULT '[]',
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL,
-            synced_at TEXT NOT NULL,
-            UNIQUE (repo_id, number)
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_pull_requests_repo_updated
-            ON pull_requests(repo_id, updated_at DESC);
-
-        CREATE TABLE IF NOT EXISTS ai_reviews (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            pull_request_id INTEGER NOT NULL REFERENCES pull_requests(id) ON DELETE CASCADE,
-            file_path TEXT,
-            line_number INTEGER,
-            severity TEXT NOT NULL CHECK (severity IN ('info', 'warning', 'error')),
-            body TEXT NOT NULL,
-            agent TEXT NOT NULL,
-            created_at TEXT NOT NULL
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_ai_reviews_pr
-            ON ai_reviews(pull_request_id, created_at DESC);
-
-        CREATE TABLE IF NOT EXISTS pr_review_status (
-            pull_request_id INTEGER PRIMARY KEY REFERENCES pull_requests(id) ON DELETE CASCADE,
-            status TEXT NOT NULL CHECK (status IN ('pending', 'in-progress', 'done')),
-            updated_at TEXT NOT NULL
-        );
-        """
-    )
-    _ensure_repository_github_columns(conn)
-
-
-def _ensure_repository_github_columns(conn: sqlite3.Connection) -> None:
-    if not repository_has_column(conn, "github_base_url"):
-        conn.execute("ALTER TABLE repositories ADD COLUMN github_base_url TEXT")
-
-
-def repository_has_column(conn: sqlite3.Connection, column_name: str) -> bool:
-    columns = {
-        str(row["name"])
-        for row in conn.execute("PRAGMA table_info(repositories)").fetchall()
-    }
-    return column_name in columns
+def connect_reader(
+    settings: Settings, *, check_same_thread: bool = True
+) -> sqlite3.Connection:
+    """Open a read-only connection; the database must already be migrated."""
+
+    started = time.perf_counter()
+    with tracing.span("sqlite.connect", mode="ro"):
+        conn = sqlite3.connect(
+            f"{settings.db_path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=check_same_thread,
+            factory=TimedConnection,
+        )
+        _configure(conn)
+        conn.execute("PRAGMA query_only = ON")
+    metrics.SQLITE_CONNECT_DURATION.labels("ro").observe(time.perf_counter() - started)
+    return conn
 
 
 def get_repository(
@@ -150,45 +165,54 @@ def update_repository_github_config(
     update_token: bool = False,
     update_base_url: bool = False,
 ) -> bool:
-    if not update_token and not update_base_url:
-        return get_repository(conn, repo_full_name) is not None
-
-    clauses: list[str] = ["updated_at = ?"]
-    params: list[Any] = [utcnow_iso()]
-    has_legacy_token_column = repository_has_column(conn, "github_token")
-
-    if update_token and has_legacy_token_column:
-        clauses.append("github_token = ?")
-        params.append(_normalize_optional_token(github_token))
+    repository = get_repository(conn, repo_full_name)
+    if repository is None:
+        return False
+
+    if update_token:
+        token = _normalize_optional_token(github_token)
+        if token is None:
+            conn.execute(
+                "DELETE FROM legacy_repository_tokens WHERE repo_id = ?",
+                (repository["id"],),
+            )
+        else:
+            conn.execute(
+                """
+                INSERT INTO legacy_repository_tokens (repo_id, github_token)
+                VALUES (?, ?)
+                ON CONFLICT (repo_id) DO UPDATE SET github_token = excluded.github_token
+                """,
+                (repository["id"], token),
+            )
 
     if update_base_url:
-        clauses.append("github_base_url = ?")
-        params.append(_normalize_optional_base_url(github_base_url))
-
-    if len(clauses) == 1:
-        # Only token update was requested, but legacy token column doesn't exist.
-        return get_repository(conn, repo_full_name) is not None
-
-    params.append(repo_full_name)
-    cursor = conn.execute(
-        f"""
-        UPDATE repositories
-        SET {", ".join(clauses)}
-        WHERE full_name = ?
-        """,
-        tuple(params),
-    )
-    return cursor.rowcount > 0
+        conn.execute(
+            """
+            UPDATE repositories
+            SET github_base_url = ?,
+                updated_at = ?
+            WHERE id = ?
+            """,
+            (
+                _normalize_optional_base_url(github_base_url),
+                utcnow_iso(),
+                repository["id"],
+            ),
+        )
+    return True
 
 
 def get_repository_legacy_github_token(
     conn: sqlite3.Connection, repo_full_name: str
 ) -> str | None:
-    if not repository_has_column(conn, "github_token"):
-        return None
-
     row = conn.execute(
-        "SELECT github_token FROM repositories WHERE full_name = ?",
+        """
+        SELECT t.github_token
+        FROM legacy_repository_tokens t
+        JOIN repositories r ON r.id = t.repo_id
+        WHERE r.full_name = ?
+        """,
         (repo_full_name,),
     ).fetchone()
     if row is None:
@@ -196,6 +220,10 @@ def get_repository_legacy_github_token(
     return _normalize_optional_token(row["github_token"])
 
 
+def has_legacy_github_tokens(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM legacy_repository_tokens LIMIT 1").fetchone() is not None
+
+
 def clear_repository_legacy_github_token(
     conn: sqlite3.Connection, repo_full_name: str
 ) -> bool:
@@ -248,10 +276,11 @@ def touch_repository_synced_at(
         """
         UPDATE repositories
         SET last_synced_at = ?,
+            last_synced_at_ms = ?,
             updated_at = ?
         WHERE id = ?
         """,
-        (timestamp, timestamp, repo_id),
+        (timestamp, to_epoch_ms(timestamp), timestamp, repo_id),
     )
 
 
@@ -271,7 +300,11 @@ def upsert_pull_request(
     created_at: str,
     updated_at: str,
     synced_at: str,
+    head_sha: str | None = None,
+    base_sha: str | None = None,
 ) -> int:
+    """Insert or update a PR; shas left as None keep the values already stored."""
+
     conn.execute(
         """
         INSERT INTO pull_requests (
@@ -287,8 +320,13 @@ def upsert_pull_request(
             reviewers,
             created_at,
             updated_at,
-            synced_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            synced_at,
+            created_at_ms,
+            updated_at_ms,
+            synced_at_ms,
+            head_sha,
+            base_sha
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ON CONFLICT (repo_id, number)
         DO UPDATE SET
             title = excluded.title,
@@ -301,7 +339,12 @@ def upsert_pull_request(
             reviewers = excluded.reviewers,
             created_at = excluded.created_at,
             updated_at = excluded.updated_at,
-            synced_at = excluded.synced_at
+            synced_at = excluded.synced_at,
+            created_at_ms = excluded.created_at_ms,
+            updated_at_ms = excluded.updated_at_ms,
+            synced_at_ms = excluded.synced_at_ms,
+            head_sha = COALESCE(excluded.head_sha, head_sha),
+            base_sha = COALESCE(excluded.base_sha, base_sha)
         """,
         (
             repo_id,
@@ -317,6 +360,11 @@ def upsert_pull_request(
             created_at,
             updated_at,
             synced_at,
+            to_epoch_ms(created_at),
+            to_epoch_ms(updated_at),
+            to_epoch_ms(synced_at),
+            head_sha,
+            base_sha,
         ),
     )
 
@@ -331,6 +379,77 @@ def upsert_pull_request(
     return int(row["id"])
 
 
+def replace_pull_request_reviewers(
+    conn: sqlite3.Connection,
+    *,
+    pull_request_id: int,
+    reviewers: list[str],
+    updated_at: str,
+) -> None:
+    """Mark `reviewers` as requested and clear everyone else on the PR.
+
+    Entries use the `login` / `team:<slug>` form of `pull_requests.reviewers`.
+    Cleared rows are kept rather than deleted; review queues only read
+    `state = 'requested'`.
+    """
+
+    conn.executemany(
+        """
+        INSERT INTO pull_request_reviewers (
+            pull_request_id, reviewer, reviewer_type, state, requested_at, updated_at
+        )
+        VALUES (?, ?, ?, 'requested', ?, ?)
+        ON CONFLICT (pull_request_id, reviewer) DO UPDATE SET
+            reviewer = excluded.reviewer,
+            state = 'requested',
+            requested_at = CASE
+                WHEN pull_request_reviewers.state = 'requested'
+                    THEN pull_request_reviewers.requested_at
+                ELSE excluded.requested_at
+            END,
+            updated_at = excluded.updated_at
+        WHERE pull_request_reviewers.state != 'requested'
+            OR pull_request_reviewers.reviewer != excluded.reviewer
+        """,
+        [
+            (
+                pull_request_id,
+                reviewer,
+                "team" if reviewer.startswith("team:") else "user",
+                updated_at,
+                updated_at,
+            )
+            for reviewer in reviewers
+        ],
+    )
+    placeholders = ", ".join("?" for _ in reviewers)
+    exclude_clause = f"AND reviewer NOT IN ({placeholders})" if reviewers else ""
+    conn.execute(
+        f"""
+        UPDATE pull_request_reviewers
+        SET state = 'cleared', updated_at = ?
+        WHERE pull_request_id = ? AND state = 'requested' {exclude_clause}
+        """,
+        (updated_at, pull_request_id, *reviewers),
+    )
+
+
+def list_pull_request_reviewers(
+    conn: sqlite3.Connection, *, pull_request_id: int
+) -> list[sqlite3.Row]:
+    return list(
+        conn.execute(
+            """
+            SELECT *
+            FROM pull_request_reviewers
+            WHERE pull_request_id = ?
+            ORDER BY reviewer_type DESC, reviewer
+            """,
+            (pull_request_id,),
+        ).fetchall()
+    )
+
+
 def get_pull_request_by_repo_and_number(
     conn: sqlite3.Connection, repo_full_name: str, number: int
 ) -> sqlite3.Row | None:
@@ -349,12 +468,50 @@ def get_pull_request_by_repo_and_number(
     ).fetchone()
 
 
+def get_pull_requests_by_numbers(
+    conn: sqlite3.Connection, repo_full_name: str, numbers: list[int]
+) -> list[sqlite3.Row]:
+    """Rows shaped like `get_pull_request_by_repo_and_number` for many PRs in one query."""
+
+    if not numbers:
+        return []
+    placeholders = ", ".join("?" for _ in numbers)
+    return list(
+        conn.execute(
+            f"""
+            SELECT
+                p.*,
+                r.full_name AS repo_full_name,
+                COALESCE(s.status, 'pending') AS review_status
+            FROM pull_requests p
+            JOIN repositories r ON r.id = p.repo_id
+            LEFT JOIN pr_review_status s ON s.pull_request_id = p.id
+            WHERE r.full_name = ? AND p.number IN ({placeholders})
+            ORDER BY p.number
+            """,
+            (repo_full_name, *numbers),
+        ).fetchall()
+    )
+
+
 def list_pull_requests(
     conn: sqlite3.Connection,
     *,
     repo_full_name: str | None,
     state: str,
+    author: str | None = None,
+    reviewers: list[str] | None = None,
+    review_status: str | None = None,
+    base_branch: str | None = None,
+    updated_since_ms: int | None = None,
+    after: tuple[int, int] | None = None,
+    limit: int | None = None,
 ) -> list[sqlite3.Row]:
+    """List PRs newest first, keyset-paginated on `(updated_at_ms, id)`.
+
+    `after` is the `(updated_at_ms, id)` of the last row of the previous page.
+    """
+
     clauses = ["r.is_active = 1"]
     params: list[Any] = []
 
@@ -366,6 +523,44 @@ def list_pull_requests(
         clauses.append("p.state = ?")
         params.append(state)
 
+    if author:
+        clauses.append("p.author = ?")
+        params.append(author)
+
+    if reviewers:
+        placeholders = ", ".join("?" for _ in reviewers)
+        clauses.append(
+            f"""
+            p.id IN (
+                SELECT pull_request_id
+                FROM pull_request_reviewers
+                WHERE reviewer IN ({placeholders}) AND state = 'requested'
+            )
+            """
+        )
+        params.extend(reviewers)
+
+    if review_status:
+        clauses.append("COALESCE(s.status, 'pending') = ?")
+        params.append(review_status)
+
+    if base_branch:
+        clauses.append("p.base_branch = ?")
+        params.append(base_branch)
+
+    if updated_since_ms is not None:
+        clauses.append("p.updated_at_ms >= ?")
+        params.append(updated_since_ms)
+
+    if after is not None:
+        clauses.append("(p.updated_at_ms, p.id) < (?, ?)")
+        params.extend(after)
+
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = "LIMIT ?"
+        params.append(limit)
+
     where_clause = " AND ".join(clauses)
     rows = conn.execute(
         f"""
@@ -377,13 +572,18 @@ def list_pull_requests(
             p.state,
             p.changed_files,
             p.updated_at,
+            p.updated_at_ms,
             r.full_name AS repo_full_name,
-            COALESCE(s.status, 'pending') AS review_status
+            COALESCE(s.status, 'pending') AS review_status,
+            COALESCE(rc.review_count, 0) AS local_review_count,
+            COALESCE(rc.error_count, 0) AS local_error_count
         FROM pull_requests p
         JOIN repositories r ON r.id = p.repo_id
         LEFT JOIN pr_review_status s ON s.pull_request_id = p.id
+        LEFT JOIN pull_request_review_counts rc ON rc.pull_request_id = p.id
         WHERE {where_clause}
-        ORDER BY p.updated_at DESC
+        ORDER BY p.updated_at_ms DESC, p.id DESC
+        {limit_clause}
         """,
         tuple(params),
     ).fetchall()
@@ -426,6 +626,43 @@ def insert_ai_review(
     return int(cursor.lastrowid)
 
 
+def insert_ai_reviews(
+    conn: sqlite3.Connection,
+    *,
+    pull_request_id: int,
+    reviews: list[dict[str, Any]],
+) -> int:
+    """Insert many reviews with one prepared statement; returns the row count."""
+
+    created_at = utcnow_iso()
+    cursor = conn.executemany(
+        """
+        INSERT INTO ai_reviews (
+            pull_request_id,
+            file_path,
+            line_number,
+            severity,
+            body,
+            agent,
+            created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                pull_request_id,
+                review["file_path"],
+                review["line_number"],
+                review["severity"],
+                review["body"],
+                review["agent"],
+                created_at,
+            )
+            for review in reviews
+        ],
+    )
+    return max(cursor.rowcount, 0)
+
+
 def list_ai_reviews(
     conn: sqlite3.Connection, *, pull_request_id: int
 ) -> list[sqlite3.Row]:
@@ -442,11 +679,249 @@ def list_ai_reviews(
     )
 
 
+def list_ai_reviews_for_pull_requests(
+    conn: sqlite3.Connection, pull_request_ids: list[int]
+) -> list[sqlite3.Row]:
+    if not pull_request_ids:
+        return []
+    placeholders = ", ".join("?" for _ in pull_request_ids)
+    return list(
+        conn.execute(
+            f"""
+            SELECT *
+            FROM ai_reviews
+            WHERE pull_request_id IN ({placeholders})
+            ORDER BY pull_request_id, created_at ASC, id ASC
+            """,
+            tuple(pull_request_ids),
+        ).fetchall()
+    )
+
+
+def enqueue_review_publish(
+    conn: sqlite3.Connection,
+    *,
+    ai_review_ids: list[int],
+    prefix: str,
+    batch: bool,
+) -> None:
+    """Queue local reviews for delivery; delivered or in-flight rows are left alone.
+
+    Only `failed` rows are reset, so re-running a publish never re-sends a comment
+    that already reached GitHub. A failed row whose last write had an unknown outcome
+    goes back to `sending`, so its marker is looked up before anything is re-sent.
+    """
+
+    now = utcnow_iso()
+    conn.executemany(
+        """
+        INSERT INTO review_publish_outbox (
+            ai_review_id,
+            pull_request_id,
+            prefix,
+            batch,
+            created_at,
+            updated_at
+        )
+        SELECT id, pull_request_id, ?, ?, ?, ?
+        FROM ai_reviews
+        WHERE id = ?
+        ON CONFLICT (ai_review_id) DO UPDATE SET
+            prefix = excluded.prefix,
+            batch = excluded.batch,
+            state = CASE WHEN review_publish_outbox.uncertain THEN 'sending' ELSE 'pending' END,
+            attempts = 0,
+            next_attempt_at = NULL,
+            last_error = NULL,
+            updated_at = excluded.updated_at
+        WHERE review_publish_outbox.state = 'failed'
+        """,
+        [(prefix, int(batch), now, now, review_id) for review_id in ai_review_ids],
+    )
+
+
+def list_due_review_publish(
+    conn: sqlite3.Connection,
+    *,
+    now: str,
+    pull_request_id: int | None = None,
+    limit: int = 200,
+) -> list[sqlite3.Row]:
+    """Pending rows whose retry time has come, plus `sending` rows whose lease expired.
+
+    A `sending` row is in flight until its `next_attempt_at` lease passes; after that
+    it is uncertain and must be reconciled against GitHub before it is re-sent.
+    """
+
+    clauses = [
+        "o.state IN ('pending', 'sending')",
+        "(o.next_attempt_at IS NULL OR o.next_attempt_at <= ?)",
+    ]
+    params: list[Any] = [now]
+    if pull_request_id is not None:
+        clauses.append("o.pull_request_id = ?")
+        params.append(pull_request_id)
+    params.append(limit)
+
+    return list(
+        conn.execute(
+            f"""
+            SELECT
+                o.id AS outbox_id,
+                o.prefix,
+                o.batch,
+                o.state,
+                o.attempts,
+                o.next_attempt_at AS outbox_next_attempt_at,
+                ar.*,
+                pr.number AS pull_number,
+                r.full_name AS repo_full_name
+            FROM review_publish_outbox o
+            JOIN ai_reviews ar ON ar.id = o.ai_review_id
+            JOIN pull_requests pr ON pr.id = o.pull_request_id
+            JOIN repositories r ON r.id = pr.repo_id
+            WHERE {" AND ".join(clauses)}
+            ORDER BY r.full_name, pr.number, o.id
+            LIMIT ?
+            """,
+            params,
+        ).fetchall()
+    )
+
+
+def claim_review_publish(
+    conn: sqlite3.Connection,
+    rows: Sequence[tuple[int, str, str | None]],
+    *,
+    lease_until: str,
+) -> bool:
+    """Flag `(outbox_id, state, next_attempt_at)` rows `sending` until `lease_until`.
+
+    Each row is only claimed if it still has the state and lease it was read with,
+    so two drainers cannot both send it. Returns False as soon as one row was taken
+    by someone else; the caller must roll back the rows claimed so far.
+    """
+
+    now = utcnow_iso()
+    for outbox_id, state, next_attempt_at in rows:
+        cursor = conn.execute(
+            """
+            UPDATE review_publish_outbox
+            SET state = 'sending', next_attempt_at = ?, updated_at = ?
+            WHERE id = ? AND state = ? AND next_attempt_at IS ?
+            """,
+            (lease_until, now, outbox_id, state, next_attempt_at),
+        )
+        if cursor.rowcount == 0:
+            return False
+    return True
+
+
+def mark_review_publish_delivered(
+    conn: sqlite3.Connection,
+    outbox_ids: list[int],
+    *,
+    delivery_kind: str,
+    github_id: int | None,
+    github_url: str | None,
+) -> None:
+    now = utcnow_iso()
+    conn.executemany(
+        """
+        UPDATE review_publish_outbox
+        SET
+            state = 'delivered',
+            uncertain = 0,
+            delivery_kind = ?,
+            github_id = ?,
+            github_url = ?,
+            last_error = NULL,
+            delivered_at = ?,
+            updated_at = ?
+        WHERE id = ?
+        """,
+        [
+            (delivery_kind, github_id, github_url, now, now, outbox_id)
+            for outbox_id in outbox_ids
+        ],
+    )
+
+
+def reschedule_review_publish(
+    conn: sqlite3.Connection,
+    outbox_ids: list[int],
+    *,
+    next_attempt_at: str | None,
+    error: str,
+    count_attempt: bool,
+    max_attempts: int,
+    retry_state: str = "pending",
+) -> None:
+    """Return rows to `retry_state` for a later attempt, or `failed` once attempts run out.
+
+    `retry_state="sending"` keeps rows whose write may have reached GitHub uncertain,
+    so the next drain looks for their marker before sending again; the flag outlives
+    `failed` for `enqueue_review_publish`. Delivered or failed rows are never touched.
+    """
+
+    conn.executemany(
+        """
+        UPDATE review_publish_outbox
+        SET
+            attempts = attempts + ?,
+            state = CASE WHEN attempts + ? >= ? THEN 'failed' ELSE ? END,
+            uncertain = ?,
+            next_attempt_at = ?,
+            last_error = ?,
+            updated_at = ?
+        WHERE id = ? AND state IN ('pending', 'sending')
+        """,
+        [
+            (
+                int(count_attempt),
+                int(count_attempt),
+                max_attempts,
+                retry_state,
+                int(retry_state == "sending"),
+                next_attempt_at,
+                error,
+                utcnow_iso(),
+                outbox_id,
+            )
+            for outbox_id in outbox_ids
+        ],
+    )
+
+
+def list_review_publish_outbox(
+    conn: sqlite3.Connection, *, pull_request_id: int
+) -> list[sqlite3.Row]:
+    return list(
+        conn.execute(
+            """
+            SELECT *
+            FROM review_publish_outbox
+            WHERE pull_request_id = ?
+            ORDER BY id
+            """,
+            (pull_request_id,),
+        ).fetchall()
+    )
+
+
 def set_review_status(
     conn: sqlite3.Connection, *, pull_request_id: int, status: str
 ) -> None:
+    set_review_statuses(conn, [(pull_request_id, status)])
+
+
+def set_review_statuses(
+    conn: sqlite3.Connection, statuses: list[tuple[int, str]]
+) -> None:
+    """Upsert the review status of many `(pull_request_id, status)` pairs in one statement."""
+
     now = utcnow_iso()
-    conn.execute(
+    conn.executemany(
         """
         INSERT INTO pr_review_status (pull_request_id, status, updated_at)
         VALUES (?, ?, ?)
@@ -455,7 +930,7 @@ def set_review_status(
             status = excluded.status,
             updated_at = excluded.updated_at
         """,
-        (pull_request_id, status, now),
+        [(pull_request_id, status, now) for pull_request_id, status in statuses],
     )
 
 
@@ -470,3 +945,890 @@ def get_review_status(
         """,
         (pull_request_id,),
     ).fetchone()
+
+
+def list_pull_request_counts(
+    conn: sqlite3.Connection,
+    *,
+    repo_full_name: str | None,
+) -> list[sqlite3.Row]:
+    """Trigger-maintained PR counts per repository, state and review status."""
+
+    clauses = ["r.is_active = 1", "c.pull_count > 0"]
+    params: list[Any] = []
+    if repo_full_name:
+        clauses.append("r.full_name = ?")
+        params.append(repo_full_name)
+
+    return list(
+        conn.execute(
+            f"""
+            SELECT r.full_name AS repo_full_name, c.state, c.review_status, c.pull_count
+            FROM pull_request_counts c
+            JOIN repositories r ON r.id = c.repo_id
+            WHERE {" AND ".join(clauses)}
+            ORDER BY r.full_name, c.state, c.review_status
+            """,
+            tuple(params),
+        ).fetchall()
+    )
+
+
+def get_pull_request_review_counts(
+    conn: sqlite3.Connection, *, pull_request_id: int
+) -> sqlite3.Row | None:
+    return conn.execute(
+        """
+        SELECT *
+        FROM pull_request_review_counts
+        WHERE pull_request_id = ?
+        """,
+        (pull_request_id,),
+    ).fetchone()
+
+
+def get_file_blob_sha(
+    conn: sqlite3.Connection, *, repo_id: int, commit_sha: str, path: str
+) -> str | None:
+    row = conn.execute(
+        """
+        SELECT blob_sha
+        FROM file_blob_refs
+        WHERE repo_id = ? AND commit_sha = ? AND path = ?
+        """,
+        (repo_id, commit_sha, path),
+    ).fetchone()
+    if row is None:
+        return None
+    return str(row["blob_sha"])
+
+
+def upsert_file_blob_ref(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    commit_sha: str,
+    path: str,
+    blob_sha: str,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO file_blob_refs (repo_id, commit_sha, path, blob_sha, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (repo_id, commit_sha, path)
+        DO UPDATE SET blob_sha = excluded.blob_sha
+        """,
+        (repo_id, commit_sha, path, blob_sha, utcnow_iso()),
+    )
+
+
+def upsert_commits(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    commits: list[dict[str, Any]],
+) -> None:
+    fetched_at = utcnow_iso()
+    conn.executemany(
+        """
+        INSERT INTO commits (
+            repo_id,
+            sha,
+            parent_shas,
+            author_name,
+            author_login,
+            authored_at,
+            committer_name,
+            committed_at,
+            message,
+            fetched_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (repo_id, sha) DO NOTHING
+        """,
+        [
+            (
+                repo_id,
+                commit["sha"],
+                json.dumps(commit.get("parents") or []),
+                commit.get("author_name"),
+                commit.get("author_login"),
+                commit.get("authored_at"),
+                commit.get("committer_name"),
+                commit.get("committed_at"),
+                commit.get("message") or "",
+                fetched_at,
+            )
+            for commit in commits
+            if commit.get("sha")
+        ],
+    )
+
+
+def find_commits(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    sha_prefix: str,
+    limit: int = 2,
+) -> list[sqlite3.Row]:
+    """Return stored commits whose SHA starts with `sha_prefix` (case-insensitive)."""
+
+    prefix = sha_prefix.lower()
+    return list(
+        conn.execute(
+            """
+            SELECT *
+            FROM commits
+            WHERE repo_id = ? AND sha >= ? AND sha < ?
+            ORDER BY sha
+            LIMIT ?
+            """,
+            (repo_id, prefix, prefix + "g", limit),
+        ).fetchall()
+    )
+
+
+def get_pull_request_commit_sync(
+    conn: sqlite3.Connection, *, repo_id: int, pull_number: int
+) -> sqlite3.Row | None:
+    return conn.execute(
+        """
+        SELECT *
+        FROM pull_request_commit_syncs
+        WHERE repo_id = ? AND pull_number = ?
+        """,
+        (repo_id, pull_number),
+    ).fetchone()
+
+
+def upsert_pull_request_commit_sync(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    pull_number: int,
+    head_sha: str,
+    synced_at: str,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO pull_request_commit_syncs (repo_id, pull_number, head_sha, synced_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (repo_id, pull_number)
+        DO UPDATE SET
+            head_sha = excluded.head_sha,
+            synced_at = excluded.synced_at
+        """,
+        (repo_id, pull_number, head_sha, synced_at),
+    )
+
+
+def replace_pull_request_commits(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    pull_number: int,
+    shas: list[str],
+) -> None:
+    conn.execute(
+        "DELETE FROM pull_request_commits WHERE repo_id = ? AND pull_number = ?",
+        (repo_id, pull_number),
+    )
+    append_pull_request_commits(
+        conn, repo_id=repo_id, pull_number=pull_number, shas=shas
+    )
+
+
+def append_pull_request_commits(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    pull_number: int,
+    shas: list[str],
+) -> None:
+    row = conn.execute(
+        """
+        SELECT COALESCE(MAX(position), -1) AS last_position
+        FROM pull_request_commits
+        WHERE repo_id = ? AND pull_number = ?
+        """,
+        (repo_id, pull_number),
+    ).fetchone()
+    start = int(row["last_position"]) + 1
+    conn.executemany(
+        """
+        INSERT INTO pull_request_commits (repo_id, pull_number, position, sha)
+        VALUES (?, ?, ?, ?)
+        """,
+        [
+            (repo_id, pull_number, start + offset, sha)
+            for offset, sha in enumerate(shas)
+        ],
+    )
+
+
+def list_pull_request_commits(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    pull_number: int,
+    after_position: int | None = None,
+    committed_since: str | None = None,
+) -> list[sqlite3.Row]:
+    clauses = ["pc.repo_id = ?", "pc.pull_number = ?"]
+    params: list[Any] = [repo_id, pull_number]
+    if after_position is not None:
+        clauses.append("pc.position > ?")
+        params.append(after_position)
+    if committed_since is not None:
+        clauses.append("c.committed_at > ?")
+        params.append(committed_since)
+
+    return list(
+        conn.execute(
+            f"""
+            SELECT pc.position, c.*
+            FROM pull_request_commits pc
+            JOIN commits c ON c.repo_id = pc.repo_id AND c.sha = pc.sha
+            WHERE {" AND ".join(clauses)}
+            ORDER BY pc.position
+            """,
+            params,
+        ).fetchall()
+    )
+
+
+def get_pull_request_commit_position(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    pull_number: int,
+    sha: str,
+) -> int | None:
+    row = conn.execute(
+        """
+        SELECT position
+        FROM pull_request_commits
+        WHERE repo_id = ? AND pull_number = ? AND sha = ?
+        """,
+        (repo_id, pull_number, sha),
+    ).fetchone()
+    return int(row["position"]) if row else None
+
+
+def get_review_thread_sync(
+    conn: sqlite3.Connection, *, repo_id: int, pull_number: int
+) -> sqlite3.Row | None:
+    return conn.execute(
+        """
+        SELECT *
+        FROM review_thread_syncs
+        WHERE repo_id = ? AND pull_number = ?
+        """,
+        (repo_id, pull_number),
+    ).fetchone()
+
+
+def upsert_review_thread_sync(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    pull_number: int,
+    pr_updated_at: str | None,
+    head_ref_oid: str | None,
+    viewer_login: str | None,
+    synced_at: str,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO review_thread_syncs (
+            repo_id,
+            pull_number,
+            pr_updated_at,
+            head_ref_oid,
+            viewer_login,
+            synced_at
+        ) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (repo_id, pull_number)
+        DO UPDATE SET
+            pr_updated_at = excluded.pr_updated_at,
+            head_ref_oid = excluded.head_ref_oid,
+            viewer_login = excluded.viewer_login,
+            synced_at = excluded.synced_at
+        """,
+        (repo_id, pull_number, pr_updated_at, head_ref_oid, viewer_login, synced_at),
+    )
+
+
+def get_review_thread_versions(
+    conn: sqlite3.Connection, *, repo_id: int, pull_number: int
+) -> dict[str, tuple[Any, ...]]:
+    rows = conn.execute(
+        """
+        SELECT id, updated_at, is_resolved, is_outdated, comment_count
+        FROM review_threads
+        WHERE repo_id = ? AND pull_number = ?
+        """,
+        (repo_id, pull_number),
+    ).fetchall()
+    return {
+        str(row["id"]): (
+            row["updated_at"],
+            int(row["is_resolved"]),
+            int(row["is_outdated"]),
+            int(row["comment_count"]),
+        )
+        for row in rows
+    }
+
+
+def upsert_review_thread(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    pull_number: int,
+    thread: dict[str, Any],
+    synced_at: str,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO review_threads (
+            id,
+            repo_id,
+            pull_number,
+            is_resolved,
+            is_outdated,
+            path,
+            line,
+            original_line,
+            head_ref_oid,
+            comment_count,
+            reply_count,
+            updated_at,
+            updated_at_ms,
+            root_comment_id,
+            root_author,
+            synced_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id)
+        DO UPDATE SET
+            repo_id = excluded.repo_id,
+            pull_number = excluded.pull_number,
+            is_resolved = excluded.is_resolved,
+            is_outdated = excluded.is_outdated,
+            path = excluded.path,
+            line = excluded.line,
+            original_line = excluded.original_line,
+            head_ref_oid = excluded.head_ref_oid,
+            comment_count = excluded.comment_count,
+            reply_count = excluded.reply_count,
+            updated_at = excluded.updated_at,
+            updated_at_ms = excluded.updated_at_ms,
+            root_comment_id = excluded.root_comment_id,
+            root_author = excluded.root_author,
+            synced_at = excluded.synced_at
+        """,
+        (
+            thread["id"],
+            repo_id,
+            pull_number,
+            1 if thread["is_resolved"] else 0,
+            1 if thread["is_outdated"] else 0,
+            thread.get("path"),
+            thread.get("line"),
+            thread.get("original_line"),
+            thread.get("head_ref_oid"),
+            int(thread.get("comment_count") or 0),
+            int(thread.get("reply_count") or 0),
+            thread.get("updated_at"),
+            to_epoch_ms(thread.get("updated_at")),
+            thread.get("root_comment_id"),
+            thread.get("root_author"),
+            synced_at,
+        ),
+    )
+
+    conn.execute(
+        "DELETE FROM review_thread_comments WHERE thread_id = ?",
+        (thread["id"],),
+    )
+    conn.executemany(
+        """
+        INSERT INTO review_thread_comments (
+            id,
+            thread_id,
+            position,
+            database_id,
+            url,
+            body,
+            created_at,
+            updated_at,
+            author,
+            reply_to_id,
+            path,
+            line,
+            original_line,
+            commit_oid,
+            original_commit_oid
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                comment["id"],
+                thread["id"],
+                position,
+                comment.get("database_id"),
+                comment.get("url"),
+                str(comment.get("body") or ""),
+                comment.get("created_at"),
+                comment.get("updated_at"),
+                comment.get("author"),
+                comment.get("reply_to_id"),
+                comment.get("path"),
+                comment.get("line"),
+                comment.get("original_line"),
+                comment.get("commit_oid"),
+                comment.get("original_commit_oid"),
+            )
+            for position, comment in enumerate(thread.get("comments") or [])
+        ],
+    )
+    replace_review_thread_mentions(
+        conn,
+        thread_id=thread["id"],
+        logins=extract_thread_mentions(thread),
+    )
+
+
+def update_review_threads_head_ref(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    pull_number: int,
+    head_ref_oid: str | None,
+) -> None:
+    conn.execute(
+        """
+        UPDATE review_threads
+        SET head_ref_oid = ?
+        WHERE repo_id = ? AND pull_number = ? AND head_ref_oid IS NOT ?
+        """,
+        (head_ref_oid, repo_id, pull_number, head_ref_oid),
+    )
+
+
+def replace_review_thread_mentions(
+    conn: sqlite3.Connection, *, thread_id: str, logins: list[str]
+) -> None:
+    conn.execute(
+        "DELETE FROM review_thread_mentions WHERE thread_id = ?",
+        (thread_id,),
+    )
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO review_thread_mentions (thread_id, login)
+        VALUES (?, ?)
+        """,
+        [(thread_id, login) for login in logins],
+    )
+
+
+def delete_review_threads(conn: sqlite3.Connection, thread_ids: list[str]) -> None:
+    conn.executemany(
+        "DELETE FROM review_threads WHERE id = ?",
+        [(thread_id,) for thread_id in thread_ids],
+    )
+
+
+def get_review_thread(conn: sqlite3.Connection, thread_id: str) -> sqlite3.Row | None:
+    return conn.execute(
+        """
+        SELECT t.*, r.full_name AS repo_full_name
+        FROM review_threads t
+        JOIN repositories r ON r.id = t.repo_id
+        WHERE t.id = ?
+        """,
+        (thread_id,),
+    ).fetchone()
+
+
+def list_review_threads(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    pull_number: int,
+    author: str | None = None,
+    unresolved_only: bool = False,
+    file_path: str | None = None,
+    updated_since_ms: int | None = None,
+) -> list[sqlite3.Row]:
+    clauses = ["t.repo_id = ?", "t.pull_number = ?"]
+    params: list[Any] = [repo_id, pull_number]
+
+    if author:
+        clauses.append("t.root_author = ? COLLATE NOCASE")
+        params.append(author)
+
+    if unresolved_only:
+        clauses.append("t.is_resolved = 0")
+
+    if file_path:
+        clauses.append("t.path = ?")
+        params.append(file_path)
+
+    if updated_since_ms is not None:
+        clauses.append("t.updated_at_ms >= ?")
+        params.append(updated_since_ms)
+
+    where_clause = " AND ".join(clauses)
+    return list(
+        conn.execute(
+            f"""
+            SELECT t.*, r.full_name AS repo_full_name
+            FROM review_threads t
+            JOIN repositories r ON r.id = t.repo_id
+            WHERE {where_clause}
+            ORDER BY t.updated_at_ms DESC, t.id DESC
+            """,
+            tuple(params),
+        ).fetchall()
+    )
+
+
+def list_review_thread_comments(
+    conn: sqlite3.Connection, thread_ids: list[str]
+) -> dict[str, list[sqlite3.Row]]:
+    grouped: dict[str, list[sqlite3.Row]] = {thread_id: [] for thread_id in thread_ids}
+    if not thread_ids:
+        return grouped
+
+    placeholders = ", ".join("?" for _ in thread_ids)
+    rows = conn.execute(
+        f"""
+        SELECT *
+        FROM review_thread_comments
+        WHERE thread_id IN ({placeholders})
+        ORDER BY thread_id, position
+        """,
+        tuple(thread_ids),
+    ).fetchall()
+    for row in rows:
+        grouped[str(row["thread_id"])].append(row)
+    return grouped
+
+
+def list_review_thread_viewer_logins(conn: sqlite3.Connection) -> list[str]:
+    rows = conn.execute(
+        """
+        SELECT DISTINCT viewer_login
+        FROM review_thread_syncs
+        WHERE viewer_login IS NOT NULL AND viewer_login != ''
+        ORDER BY viewer_login
+        """
+    ).fetchall()
+    return [str(row["viewer_login"]) for row in rows]
+
+
+def list_inbox_threads(
+    conn: sqlite3.Connection,
+    *,
+    logins: list[str],
+    repo_full_name: str | None = None,
+    limit: int = 200,
+) -> list[sqlite3.Row]:
+    if not logins:
+        return []
+
+    placeholders = ", ".join("?" for _ in logins)
+    clauses = ["r.is_active = 1"]
+    params: list[Any] = [*logins, *logins, *logins]
+    if repo_full_name:
+        clauses.append("r.full_name = ?")
+        params.append(repo_full_name)
+    params.append(limit)
+
+    where_clause = " AND ".join(clauses)
+    return list(
+        conn.execute(
+            f"""
+            SELECT
+                t.*,
+                r.full_name AS repo_full_name,
+                CASE
+                    WHEN t.root_author COLLATE NOCASE IN ({placeholders}) THEN 'author'
+                    ELSE 'mention'
+                END AS reason
+            FROM (
+                SELECT id
+                FROM review_threads
+                WHERE root_author COLLATE NOCASE IN ({placeholders})
+                    AND is_resolved = 0
+                UNION
+                SELECT m.thread_id
+                FROM review_thread_mentions m
+                JOIN review_threads mt ON mt.id = m.thread_id
+                WHERE m.login IN ({placeholders})
+                    AND mt.is_resolved = 0
+            ) inbox
+            JOIN review_threads t ON t.id = inbox.id
+            JOIN repositories r ON r.id = t.repo_id
+            WHERE {where_clause}
+            ORDER BY t.updated_at_ms DESC, t.id DESC
+            LIMIT ?
+            """,
+            tuple(params),
+        ).fetchall()
+    )
+
+
+def list_review_thread_refresh_targets(conn: sqlite3.Connection) -> list[sqlite3.Row]:
+    """PRs worth polling: any with stored unresolved threads, plus open PRs."""
+
+    return list(
+        conn.execute(
+            """
+            SELECT r.full_name AS repo_full_name, t.repo_id, t.pull_number
+            FROM review_threads t
+            JOIN repositories r ON r.id = t.repo_id
+            WHERE t.is_resolved = 0 AND r.is_active = 1
+            UNION
+            SELECT r.full_name AS repo_full_name, p.repo_id, p.number AS pull_number
+            FROM pull_requests p
+            JOIN repositories r ON r.id = p.repo_id
+            WHERE p.state = 'open' AND r.is_active = 1
+            ORDER BY repo_full_name, pull_number
+            """
+        ).fetchall()
+    )
+
+
+def _search_filters(
+    *,
+    repo_full_name: str | None,
+    state: str,
+) -> tuple[list[str], list[Any]]:
+    clauses = ["r.is_active = 1"]
+    params: list[Any] = []
+    if repo_full_name:
+        clauses.append("r.full_name = ?")
+        params.append(repo_full_name)
+    if state != "all":
+        clauses.append("p.state = ?")
+        params.append(state)
+    return clauses, params
+
+
+def search_pull_requests(
+    conn: sqlite3.Connection,
+    *,
+    match: str,
+    repo_full_name: str | None,
+    state: str,
+    limit: int,
+) -> list[sqlite3.Row]:
+    clauses, params = _search_filters(repo_full_name=repo_full_name, state=state)
+    # Column weights: title, body, head_branch, base_branch.
+    return list(
+        conn.execute(
+            f"""
+            SELECT
+                p.id AS pull_request_id,
+                p.number,
+                p.title,
+                p.state,
+                p.updated_at,
+                r.full_name AS repo_full_name,
+                snippet(pull_requests_fts, -1, '**', '**', '…', 12) AS snippet,
+                bm25(pull_requests_fts, 10.0, 1.0, 4.0, 2.0) AS rank
+            FROM pull_requests_fts
+            JOIN pull_requests p ON p.id = pull_requests_fts.rowid
+            JOIN repositories r ON r.id = p.repo_id
+            WHERE pull_requests_fts MATCH ? AND {" AND ".join(clauses)}
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (match, *params, limit),
+        ).fetchall()
+    )
+
+
+def search_ai_reviews(
+    conn: sqlite3.Connection,
+    *,
+    match: str,
+    repo_full_name: str | None,
+    state: str,
+    limit: int,
+) -> list[sqlite3.Row]:
+    clauses, params = _search_filters(repo_full_name=repo_full_name, state=state)
+    return list(
+        conn.execute(
+            f"""
+            SELECT
+                ar.id AS review_id,
+                ar.file_path,
+                ar.line_number,
+                ar.severity,
+                ar.created_at,
+                p.id AS pull_request_id,
+                p.number,
+                p.title,
+                p.state,
+                r.full_name AS repo_full_name,
+                snippet(ai_reviews_fts, 0, '**', '**', '…', 12) AS snippet,
+                bm25(ai_reviews_fts, 1.0, 2.0) AS rank
+            FROM ai_reviews_fts
+            JOIN ai_reviews ar ON ar.id = ai_reviews_fts.rowid
+            JOIN pull_requests p ON p.id = ar.pull_request_id
+            JOIN repositories r ON r.id = p.repo_id
+            WHERE ai_reviews_fts MATCH ? AND {" AND ".join(clauses)}
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (match, *params, limit),
+        ).fetchall()
+    )
+
+
+def search_review_thread_comments(
+    conn: sqlite3.Connection,
+    *,
+    match: str,
+    repo_full_name: str | None,
+    state: str,
+    limit: int,
+) -> list[sqlite3.Row]:
+    clauses, params = _search_filters(repo_full_name=repo_full_name, state=state)
+    if state == "all":
+        # Threads can be fetched for PRs never listed by `squire sync`.
+        pull_join = "LEFT JOIN"
+    else:
+        pull_join = "JOIN"
+    return list(
+        conn.execute(
+            f"""
+            SELECT
+                c.id AS comment_id,
+                c.thread_id,
+                c.author,
+                c.url,
+                c.path,
+                c.line,
+                c.created_at,
+                p.id AS pull_request_id,
+                t.pull_number AS number,
+                p.title,
+                p.state,
+                r.full_name AS repo_full_name,
+                snippet(review_thread_comments_fts, 0, '**', '**', '…', 12) AS snippet,
+                bm25(review_thread_comments_fts, 1.0, 2.0) AS rank
+            FROM review_thread_comments_fts
+            JOIN review_thread_comments c ON c.seq = review_thread_comments_fts.rowid
+            JOIN review_threads t ON t.id = c.thread_id
+            JOIN repositories r ON r.id = t.repo_id
+            {pull_join} pull_requests p
+                ON p.repo_id = t.repo_id AND p.number = t.pull_number
+            WHERE review_thread_comments_fts MATCH ? AND {" AND ".join(clauses)}
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (match, *params, limit),
+        ).fetchall()
+    )
+
+
+def rebuild_search_index(conn: sqlite3.Connection) -> None:
+    for table in ("pull_requests_fts", "ai_reviews_fts", "review_thread_comments_fts"):
+        conn.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+
+
+def list_changes(
+    conn: sqlite3.Connection,
+    *,
+    after: int,
+    repo_full_name: str | None = None,
+    limit: int = 500,
+) -> list[sqlite3.Row]:
+    clauses = ["c.seq > ?"]
+    params: list[Any] = [after]
+    if repo_full_name:
+        clauses.append("c.repo_id = (SELECT id FROM repositories WHERE full_name = ?)")
+        params.append(repo_full_name)
+    params.append(limit)
+
+    return list(
+        conn.execute(
+            f"""
+            SELECT c.*, r.full_name AS repo_full_name
+            FROM change_log c
+            LEFT JOIN repositories r ON r.id = c.repo_id
+            WHERE {" AND ".join(clauses)}
+            ORDER BY c.seq
+            LIMIT ?
+            """,
+            tuple(params),
+        ).fetchall()
+    )
+
+
+def get_latest_change_seq(
+    conn: sqlite3.Connection, *, repo_full_name: str | None = None
+) -> int:
+    if repo_full_name:
+        row = conn.execute(
+            """
+            SELECT MAX(seq)
+            FROM change_log
+            WHERE repo_id = (SELECT id FROM repositories WHERE full_name = ?)
+            """,
+            (repo_full_name,),
+        ).fetchone()
+    else:
+        row = conn.execute("SELECT MAX(seq) FROM change_log").fetchone()
+    return int(row[0] or 0)
+
+
+def get_pruned_change_seq(conn: sqlite3.Connection) -> int:
+    """Highest `seq` removed by `prune_change_log` (0 if nothing was pruned)."""
+
+    row = conn.execute("SELECT MIN(seq) FROM change_log").fetchone()
+    return max(int(row[0] or 1) - 1, 0)
+
+
+def prune_change_log(conn: sqlite3.Connection, *, retention_days: float) -> int:
+    """Delete changes older than `retention_days`, always keeping the newest entry.
+
+    `seq` grows with `changed_at`, so the scan walks the primary key from the
+    oldest entry and stops at the first one inside the window.
+    """
+
+    cursor = conn.execute(
+        """
+        DELETE FROM change_log
+        WHERE seq < COALESCE(
+            (
+                SELECT seq
+                FROM change_log
+                WHERE changed_at >= strftime('%Y-%m-%dT%H:%M:%SZ', 'now', ?)
+                ORDER BY seq
+                LIMIT 1
+            ),
+            (SELECT MAX(seq) FROM change_log)
+        )
+        """,
+        (f"-{retention_days * 86400:.0f} seconds",),
+    )
+    return cursor.rowcount
+
+
+def get_data_versions(conn: sqlite3.Connection, scopes: list[str]) -> dict[str, int]:
+    """Current versions of `scopes` (plus `instance`); unknown scopes read as 0."""
+
+    wanted = ["instance", *scopes]
+    placeholders = ", ".join("?" for _ in wanted)
+    rows = conn.execute(
+        f"SELECT scope, version FROM data_versions WHERE scope IN ({placeholders})",
+        tuple(wanted),
+    ).fetchall()
+    versions = dict.fromkeys(wanted, 0)
+    versions.update({str(row["scope"]): int(row["version"]) for row in rows})
+    return versions
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+import re
+import threading
+from typing import Any, Literal
+
+DiffSide = Literal["LEFT", "RIGHT"]
+
+_HUNK_HEADER_PATTERN = re.compile(
+    r"^@@ -(?P<old_start>\d+)(?:,(?P<old_count>\d+))? \+(?P<new_start>\d+)(?:,(?P<new_count>\d+))? @@"
+)
+
+_CACHE_MAX_ENTRIES = 32
+
+
+@dataclass(frozen=True)
+class DiffHunk:
+    """One `@@` hunk of a file patch.
+
+    `new_positions[i]` is the diff position (GitHub's 1-based line offset from the
+    first hunk header) of new-file line `new_start + i`. Removed old-file lines are
+    kept as two parallel sorted arrays so LEFT-side lookups can bisect them.
+    """
+
+    header: str
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+    new_positions: array
+    removed_old_lines: array
+    removed_positions: array
+
+    @property
+    def new_end(self) -> int:
+        return self.new_start + len(self.new_positions)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "header": self.header,
+            "old_start": self.old_start,
+            "old_count": self.old_count,
+            "new_start": self.new_start,
+            "new_count": self.new_count,
+        }
+
+
+@dataclass(frozen=True)
+class DiffLineMatch:
+    line: int
+    side: DiffSide
+    position: int
+
+
+@dataclass(frozen=True)
+class FileDiffIndex:
+    path: str
+    hunks: tuple[DiffHunk, ...]
+    new_starts: array
+    old_starts: array
+
+    def match_line(self, target_line: int) -> DiffLineMatch | None:
+        """Map a line number onto the diff, preferring the new (RIGHT) side."""
+
+        hunk_index = bisect_right(self.new_starts, target_line) - 1
+        if hunk_index >= 0:
+            hunk = self.hunks[hunk_index]
+            if target_line < hunk.new_end:
+                return DiffLineMatch(
+                    line=target_line,
+                    side="RIGHT",
+                    position=hunk.new_positions[target_line - hunk.new_start],
+                )
+
+        hunk_index = bisect_right(self.old_starts, target_line) - 1
+        if hunk_index >= 0:
+            hunk = self.hunks[hunk_index]
+            removed_index = bisect_right(hunk.removed_old_lines, target_line) - 1
+            if removed_index >= 0 and hunk.removed_old_lines[removed_index] == target_line:
+                return DiffLineMatch(
+                    line=target_line,
+                    side="LEFT",
+                    position=hunk.removed_positions[removed_index],
+                )
+
+        return None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "hunks": [hunk.to_dict() for hunk in self.hunks],
+        }
+
+
+@dataclass(frozen=True)
+class PullDiffIndex:
+    head_sha: str
+    base_sha: str | None
+    files: dict[str, FileDiffIndex]
+
+    def match_line(self, path: str, target_line: int) -> DiffLineMatch | None:
+        file_index = self.files.get(path)
+        if file_index is None or target_line <= 0:
+            return None
+        return file_index.match_line(target_line)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "head_sha": self.head_sha,
+            "base_sha": self.base_sha,
+            "files": [item.to_dict() for item in self.files.values()],
+        }
+
+
+def build_file_diff_index(path: str, patch: str) -> FileDiffIndex:
+    hunks: list[DiffHunk] = []
+    position = 0
+    current: dict[str, Any] | None = None
+    old_line = 0
+    new_line = 0
+
+    def finish() -> None:
+        if current is None:
+            return
+        hunks.append(DiffHunk(**current))
+
+    for raw_line in patch.splitlines():
+        if raw_line.startswith("@@"):
+            if hunks or current is not None:
+                position += 1
+            finish()
+            match = _HUNK_HEADER_PATTERN.match(raw_line)
+            if match is None:
+                current = None
+                continue
+            old_line = int(match.group("old_start"))
+            new_line = int(match.group("new_start"))
+            current = {
+                "header": raw_line,
+                "old_start": old_line,
+                "old_count": int(match.group("old_count") or 1),
+                "new_start": new_line,
+                "new_count": int(match.group("new_count") or 1),
+                "new_positions": array("I"),
+                "removed_old_lines": array("I"),
+                "removed_positions": array("I"),
+            }
+            continue
+
+        if current is None:
+            continue
+        position += 1
+        if raw_line.startswith("\\"):
+            continue
+
+        prefix = raw_line[:1]
+        if prefix == " ":
+            current["new_positions"].append(position)
+            old_line += 1
+            new_line += 1
+        elif prefix == "+":
+            current["new_positions"].append(position)
+            new_line += 1
+        elif prefix == "-":
+            current["removed_old_lines"].append(old_line)
+            current["removed_positions"].append(position)
+            old_line += 1
+
+    finish()
+
+    ordered = tuple(sorted(hunks, key=lambda item: item.new_start))
+    return FileDiffIndex(
+        path=path,
+        hunks=ordered,
+        new_starts=array("l", (hunk.new_start for hunk in ordered)),
+        old_starts=array("l", (hunk.old_start for hunk in ordered)),
+    )
+
+
+def build_pull_diff_index(
+    pull_request: dict[str, Any],
+    pull_files: list[dict[str, Any]],
+) -> PullDiffIndex | None:
+    head_sha = str((pull_request.get("head") or {}).get("sha") or "").strip()
+    if not head_sha:
+        return None
+    base_sha = str((pull_request.get("base") or {}).get("sha") or "").strip() or None
+
+    files: dict[str, FileDiffIndex] = {}
+    for file_data in pull_files:
+        filename = file_data.get("filename")
+        patch = file_data.get("patch")
+        if not isinstance(filename, str) or filename in files:
+            continue
+        if not isinstance(patch, str) or not patch.strip():
+            continue
+        files[filename] = build_file_diff_index(filename, patch)
+
+    return PullDiffIndex(head_sha=head_sha, base_sha=base_sha, files=files)
+
+
+_cache: OrderedDict[tuple[str, str], PullDiffIndex] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_pull_diff_index(
+    pull_request: dict[str, Any],
+    pull_files: list[dict[str, Any]],
+) -> PullDiffIndex | None:
+    """Return the diff index for a PR revision, building it at most once.
+
+    A PR diff is fully determined by its head and base commits, so the index is
+    cached under that pair. Payloads without a base SHA are indexed but not cached.
+    """
+
+    head_sha = str((pull_request.get("head") or {}).get("sha") or "").strip()
+    base_sha = str((pull_request.get("base") or {}).get("sha") or "").strip()
+    if not head_sha or not base_sha:
+        return build_pull_diff_index(pull_request, pull_files)
+
+    key = (head_sha, base_sha)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    index = build_pull_diff_index(pull_request, pull_files)
+    if index is None:
+        return None
+
+    with _cache_lock:
+        _cache[key] = index
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return index
+
+
+def clear_diff_index_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+import hashlib
+import sqlite3
+
+from . import db
+
+
+def data_etag(conn: sqlite3.Connection, scopes: list[str], *extra: str) -> str:
+    """Weak ETag over the data versions of `scopes` and request-specific `extra` parts.
+
+    Weak because the same data may be served with different encodings.
+    """
+
+    versions = db.get_data_versions(conn, scopes)
+    material = "|".join(
+        [*(f"{scope}={version}" for scope, version in sorted(versions.items())), *extra]
+    )
+    digest = hashlib.blake2b(material.encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    return tag.strip().removeprefix("W/")
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """`If-None-Match` comparison; uses the weak comparison RFC 9110 requires."""
+
+    if not if_none_match:
+        return False
+    candidates: Iterable[str] = (part for part in if_none_match.split(",") if part.strip())
+    return any(
+        candidate.strip() == "*" or _opaque(candidate) == _opaque(etag)
+        for candidate in candidates
+    )
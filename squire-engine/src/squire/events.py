@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Mapping
+from dataclasses import dataclass
+import json
+import secrets
+import threading
+from typing import Any
+
+DEFAULT_REPLAY_BUFFER_SIZE = 1000
+DEFAULT_CLIENT_QUEUE_SIZE = 256
+DEFAULT_HEARTBEAT_SECONDS = 15.0
+
+EVENT_TYPES = (
+    "sync.progress",
+    "pull_request.upserted",
+    "pull_request.deleted",
+    "local_review.added",
+    "local_review.updated",
+    "local_review.deleted",
+    "review_status.changed",
+    "publish.delivered",
+    "resync",
+)
+
+_CHANGE_EVENT_TYPES = {
+    ("pull_request", "insert"): "pull_request.upserted",
+    ("pull_request", "update"): "pull_request.upserted",
+    ("pull_request", "delete"): "pull_request.deleted",
+    ("local_review", "insert"): "local_review.added",
+    ("local_review", "update"): "local_review.updated",
+    ("local_review", "delete"): "local_review.deleted",
+    ("review_status", "update"): "review_status.changed",
+}
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    type: str
+    data: dict[str, Any]
+
+
+def change_event_type(change: Mapping[str, Any]) -> str | None:
+    return _CHANGE_EVENT_TYPES.get((str(change["entity"]), str(change["op"])))
+
+
+def encode_sse(event: Event) -> str:
+    payload = json.dumps(event.data, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event.id}\nevent: {event.type}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """One SSE client: a bounded queue fed from any thread via the client's event loop.
+
+    When the queue is full the event is dropped and the subscription is marked
+    `lagged`; the stream then ends after draining, and the client catches up
+    from the replay buffer when it reconnects with `Last-Event-ID`.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, *, max_queue: int) -> None:
+        self._loop = loop
+        self.queue: asyncio.Queue[Event | None] = asyncio.Queue(maxsize=max_queue)
+        self.lagged = False
+
+    def offer(self, event: Event | None) -> bool:
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The client's loop is gone; the broadcaster drops the subscription.
+            return False
+        return True
+
+    def _put(self, event: Event | None) -> None:
+        if event is None:
+            # Close marker: make room so the stream always sees it.
+            while self.queue.full():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return
+        if self.lagged:
+            return
+        if self.queue.full():
+            self.lagged = True
+            return
+        self.queue.put_nowait(event)
+
+
+class EventBroadcaster:
+    """In-process fan-out of typed events with a bounded replay buffer.
+
+    Event ids are `<instance>-<n>`, so a `Last-Event-ID` from a previous server
+    process (or one already evicted from the buffer) is answered with a single
+    `resync` event instead of a silently incomplete replay.
+    """
+
+    def __init__(
+        self,
+        *,
+        buffer_size: int = DEFAULT_REPLAY_BUFFER_SIZE,
+        client_queue_size: int = DEFAULT_CLIENT_QUEUE_SIZE,
+    ) -> None:
+        self.instance = secrets.token_hex(4)
+        self._client_queue_size = client_queue_size
+        self._buffer: deque[tuple[int, Event]] = deque(maxlen=buffer_size)
+        self._subscriptions: set[Subscription] = set()
+        self._next = 1
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+    def publish(self, event_type: str, data: Mapping[str, Any]) -> Event:
+        """Record an event and hand it to every subscriber; safe from any thread."""
+
+        with self._lock:
+            sequence = self._next
+            self._next += 1
+            event = Event(id=f"{self.instance}-{sequence}", type=event_type, data=dict(data))
+            self._buffer.append((sequence, event))
+            dead = [sub for sub in self._subscriptions if not sub.offer(event)]
+            self._subscriptions.difference_update(dead)
+        return event
+
+    def subscribe(
+        self,
+        *,
+        last_event_id: str | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> tuple[Subscription, list[Event]]:
+        """Register a client; return it with the buffered events it missed.
+
+        Registration and the replay snapshot happen under one lock, so no event
+        is both replayed and queued, or neither.
+        """
+
+        subscription = Subscription(
+            loop or asyncio.get_running_loop(), max_queue=self._client_queue_size
+        )
+        with self._lock:
+            replay = self._replay_after(last_event_id)
+            self._subscriptions.add(subscription)
+        return subscription, replay
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def close(self) -> None:
+        """End every open stream."""
+
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            self._subscriptions.clear()
+        for subscription in subscriptions:
+            subscription.offer(None)
+
+    def _replay_after(self, last_event_id: str | None) -> list[Event]:
+        if not last_event_id:
+            return []
+        instance, _, raw_sequence = last_event_id.strip().rpartition("-")
+        last_sequence = int(raw_sequence) if raw_sequence.isdigit() else -1
+        oldest = self._buffer[0][0] if self._buffer else self._next
+        if instance != self.instance or not (oldest - 1 <= last_sequence < self._next):
+            resync = Event(
+                id=f"{self.instance}-{self._next - 1}",
+                type="resync",
+                data={"reason": "replay unavailable; refetch current state"},
+            )
+            return [resync]
+        return [event for sequence, event in self._buffer if sequence > last_sequence]
+
+
+async def stream_events(
+    broadcaster: EventBroadcaster,
+    *,
+    last_event_id: str | None = None,
+    heartbeat: float = DEFAULT_HEARTBEAT_SECONDS,
+) -> AsyncIterator[str]:
+    """Encoded SSE frames for one client: the replay first, then live events."""
+
+    subscription, replay = broadcaster.subscribe(last_event_id=last_event_id)
+    try:
+        yield "retry: 3000\n\n"
+        for event in replay:
+            yield encode_sse(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            yield encode_sse(event)
+            if subscription.lagged and subscription.queue.empty():
+                return
+    finally:
+        broadcaster.unsubscribe(subscription)
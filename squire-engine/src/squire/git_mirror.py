@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import base64
+import os
+from pathlib import Path
+import shutil
+import subprocess
+from typing import Any
+from urllib.parse import urlsplit, urlunsplit
+
+_FILE_STATUS_NAMES = {
+    "A": "added",
+    "C": "copied",
+    "D": "removed",
+    "M": "modified",
+    "R": "renamed",
+    "T": "changed",
+}
+
+
+class GitMirrorError(RuntimeError):
+    """Raised when a local git mirror operation fails."""
+
+
+def build_git_remote_url(github_base_url: str, repo_full_name: str) -> str:
+    """Derive the clone URL of a repository from its GitHub API base URL.
+
+    `https://api.github.com` maps to `https://github.com/<repo>.git` and a GitHub
+    Enterprise `https://host/api/v3` maps to `https://host/<repo>.git`.
+    """
+
+    parsed = urlsplit(github_base_url.strip().rstrip("/"))
+    netloc = parsed.netloc
+    if netloc == "api.github.com":
+        netloc = "github.com"
+
+    path = parsed.path.rstrip("/")
+    if path.endswith("/api/v3"):
+        path = path[: -len("/api/v3")]
+    elif path.endswith("/api"):
+        path = path[: -len("/api")]
+
+    return urlunsplit((parsed.scheme, netloc, f"{path}/{repo_full_name}.git", "", ""))
+
+
+def _split_nul_fields(output: str) -> list[str]:
+    fields = output.split("\0")
+    if fields and fields[-1] == "":
+        fields.pop()
+    return fields
+
+
+def _split_diff_sections(diff_text: str) -> list[str]:
+    sections: list[list[str]] = []
+    for line in diff_text.splitlines(keepends=True):
+        if line.startswith("diff --git "):
+            sections.append([])
+        if sections:
+            sections[-1].append(line)
+    return ["".join(section) for section in sections]
+
+
+def _extract_patch(section: str) -> str | None:
+    marker = section.find("\n@@")
+    if marker < 0:
+        return None
+    return section[marker + 1 :].rstrip("\n") or None
+
+
+class GitMirror:
+    """Bare mirror of one repository that tracks branch and `refs/pull/*/head` refs.
+
+    The remote may be any URL git understands, including `file://` paths. Tokens are
+    handed to git through `GIT_CONFIG_*` environment variables, never process args.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        repo_full_name: str,
+        *,
+        remote_url: str,
+        token: str | None = None,
+    ) -> None:
+        self.repo_full_name = repo_full_name
+        self.remote_url = remote_url
+        self.path = root / f"{repo_full_name}.git"
+        self._token = token
+
+    def _env(self) -> dict[str, str]:
+        env = dict(os.environ)
+        env["GIT_TERMINAL_PROMPT"] = "0"
+        if self._token and urlsplit(self.remote_url).scheme in {"http", "https"}:
+            credentials = base64.b64encode(
+                f"x-access-token:{self._token}".encode()
+            ).decode()
+            env["GIT_CONFIG_COUNT"] = "1"
+            env["GIT_CONFIG_KEY_0"] = "http.extraHeader"
+            env["GIT_CONFIG_VALUE_0"] = f"Authorization: Basic {credentials}"
+        return env
+
+    def _run(self, args: list[str], *, check: bool = True) -> subprocess.CompletedProcess[str]:
+        if shutil.which("git") is None:
+            raise GitMirrorError("`git` executable is unavailable on this environment.")
+
+        result = subprocess.run(
+            ["git", "--git-dir", str(self.path), *args],
+            text=True,
+            capture_output=True,
+            check=False,
+            env=self._env(),
+        )
+        if check and result.returncode != 0:
+            message = result.stderr.strip() or result.stdout.strip() or "unknown error"
+            raise GitMirrorError(
+                f"`git {args[0]}` failed for `{self.repo_full_name}` "
+                f"(code={result.returncode}): {message}"
+            )
+        return result
+
+    def ensure(self) -> None:
+        if not (self.path / "HEAD").exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._run(["init", "--quiet", "--bare"])
+            self._run(["config", "remote.origin.url", self.remote_url])
+            self._run(["config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*"])
+            self._run(
+                [
+                    "config",
+                    "--add",
+                    "remote.origin.fetch",
+                    "+refs/pull/*/head:refs/pull/*/head",
+                ]
+            )
+            return
+
+        current_url = self._run(["config", "remote.origin.url"], check=False).stdout.strip()
+        if current_url != self.remote_url:
+            self._run(["config", "remote.origin.url", self.remote_url])
+
+    def fetch_all(self) -> None:
+        """Fetch every branch and PR head; git only transfers objects it lacks."""
+
+        self.ensure()
+        self._run(["fetch", "--quiet", "--prune", "--no-tags", "origin"])
+
+    def fetch_pull(self, number: int, base_branch: str) -> None:
+        self.ensure()
+        self._run(
+            [
+                "fetch",
+                "--quiet",
+                "--no-tags",
+                "origin",
+                f"+refs/pull/{number}/head:refs/pull/{number}/head",
+                f"+refs/heads/{base_branch}:refs/heads/{base_branch}",
+            ]
+        )
+
+    def _local_commit(self, ref: str) -> str | None:
+        if not (self.path / "HEAD").exists():
+            return None
+        result = self._run(["rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"], check=False)
+        if result.returncode != 0:
+            return None
+        return result.stdout.strip() or None
+
+    def _resolve_pull_range(
+        self,
+        number: int,
+        base_branch: str,
+        head_sha: str | None,
+        base_sha: str | None,
+    ) -> tuple[str, str]:
+        # Fetching is a network round trip, so reuse the local refs when they already
+        # hold the head synced from GitHub and the base commit it was compared with.
+        # Without a synced head sha the local ref may be stale, so always fetch.
+        local_head = self._local_commit(f"refs/pull/{number}/head")
+        if (
+            head_sha is None
+            or local_head != head_sha
+            or self._local_commit(f"refs/heads/{base_branch}") is None
+            or (base_sha is not None and self._local_commit(base_sha) is None)
+        ):
+            self.fetch_pull(number, base_branch)
+            local_head = self._local_commit(f"refs/pull/{number}/head")
+        if local_head is None:
+            raise GitMirrorError(
+                f"PR #{number} head is missing from the mirror of `{self.repo_full_name}`."
+            )
+        merge_base = self._run(
+            ["merge-base", f"refs/heads/{base_branch}", local_head], check=False
+        )
+        if merge_base.returncode != 0 or not merge_base.stdout.strip():
+            raise GitMirrorError(
+                f"PR #{number} head has no merge base with `{base_branch}` "
+                f"in `{self.repo_full_name}`."
+            )
+        return merge_base.stdout.strip(), local_head
+
+    def get_pull_diff(
+        self,
+        number: int,
+        base_branch: str,
+        *,
+        head_sha: str | None = None,
+        base_sha: str | None = None,
+    ) -> str:
+        """Diff of a PR against its merge base; the shas are the ones last synced."""
+
+        base_sha, head_sha = self._resolve_pull_range(number, base_branch, head_sha, base_sha)
+        return self._run(
+            ["diff", "--no-color", "--no-ext-diff", "-M", base_sha, head_sha]
+        ).stdout
+
+    def list_pull_files(
+        self,
+        number: int,
+        base_branch: str,
+        *,
+        head_sha: str | None = None,
+        base_sha: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return changed files in the shape of GitHub's `pulls/{n}/files` payload."""
+
+        base_sha, head_sha = self._resolve_pull_range(number, base_branch, head_sha, base_sha)
+        raw_entries = _split_nul_fields(
+            self._run(
+                ["diff", "--raw", "--no-abbrev", "-z", "-M", base_sha, head_sha]
+            ).stdout
+        )
+        numstat = _split_nul_fields(
+            self._run(["diff", "--numstat", "-z", "-M", base_sha, head_sha]).stdout
+        )
+        diff_text = self._run(
+            ["diff", "--no-color", "--no-ext-diff", "-M", base_sha, head_sha]
+        ).stdout
+        sections = _split_diff_sections(diff_text)
+
+        entries: list[dict[str, Any]] = []
+        index = 0
+        while index < len(raw_entries):
+            _, _, _, new_blob, code = raw_entries[index].lstrip(":").split(" ", 4)
+            status_name = _FILE_STATUS_NAMES.get(code[:1], "modified")
+            if code[:1] in {"R", "C"}:
+                previous, filename = raw_entries[index + 1], raw_entries[index + 2]
+                index += 3
+            else:
+                previous, filename = None, raw_entries[index + 1]
+                index += 2
+            entry: dict[str, Any] = {
+                "filename": filename,
+                "status": status_name,
+                "sha": None if status_name == "removed" else new_blob,
+            }
+            if previous is not None:
+                entry["previous_filename"] = previous
+            entries.append(entry)
+
+        stats: list[tuple[int, int]] = []
+        index = 0
+        while index < len(numstat):
+            added, deleted, path = numstat[index].split("\t", 2)
+            index += 1 if path else 3
+            stats.append(
+                (
+                    int(added) if added.isdigit() else 0,
+                    int(deleted) if deleted.isdigit() else 0,
+                )
+            )
+
+        for position, entry in enumerate(entries):
+            additions, deletions = stats[position] if position < len(stats) else (0, 0)
+            entry["additions"] = additions
+            entry["deletions"] = deletions
+            entry["changes"] = additions + deletions
+            entry["patch"] = (
+                _extract_patch(sections[position]) if position < len(sections) else None
+            )
+
+        return entries
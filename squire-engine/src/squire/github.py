@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import hashlib
+import re
+import time
 from typing import Any, Literal
 from urllib.parse import urlsplit, urlunsplit
 
 import httpx
 
+from . import metrics, tracing
 from .review_threads import normalize_review_thread
 
 
@@ -97,6 +101,33 @@ query ReviewThread($threadId: ID!, $after: String) {{
 }}
 """.strip()
 
+_PULL_ACTIVITY_QUERY = """
+query PullActivity($owner: String!, $name: String!, $number: Int!) {
+  viewer {
+    login
+  }
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      updatedAt
+      headRefOid
+    }
+  }
+}
+""".strip()
+
+_BLOB_OID_QUERY = """
+query BlobOid($owner: String!, $name: String!, $expression: String!) {
+  repository(owner: $owner, name: $name) {
+    object(expression: $expression) {
+      __typename
+      ... on Blob {
+        oid
+      }
+    }
+  }
+}
+""".strip()
+
 ReactionContent = Literal[
     "+1",
     "-1",
@@ -135,10 +166,65 @@ class GitHubError(RuntimeError):
         *,
         status_code: int | None = None,
         path: str | None = None,
+        retry_after: float | None = None,
     ) -> None:
         super().__init__(message)
         self.status_code = status_code
         self.path = path
+        self.retry_after = retry_after
+
+    @property
+    def is_rate_limited(self) -> bool:
+        return self.status_code == 429 or (
+            self.status_code == 403 and self.retry_after is not None
+        )
+
+
+def _parse_retry_after(response: httpx.Response) -> float | None:
+    """Seconds to wait before retrying, from `Retry-After` or an exhausted rate limit."""
+
+    retry_after = response.headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+
+    if response.headers.get("x-ratelimit-remaining") == "0":
+        try:
+            reset_at = float(response.headers.get("x-ratelimit-reset") or "")
+        except ValueError:
+            return None
+        return max(reset_at - time.time(), 0.0)
+    return None
+
+
+# Path segments that follow these words are identifiers (refs, SHAs, compare ranges).
+_ID_AFTER = frozenset({"commits", "blobs", "compare"})
+_NUMERIC_SEGMENT = re.compile(r"^\d+$")
+
+
+def endpoint_family(path: str) -> str:
+    """Metric label for a REST path: `repos/o/r/pulls/12/files` -> `pulls/files`."""
+
+    segments = [segment for segment in path.strip("/").split("/") if segment]
+    if segments[:1] == ["repos"]:
+        segments = segments[3:]
+    family: list[str] = []
+    skip_next = False
+    for segment in segments:
+        if skip_next or _NUMERIC_SEGMENT.match(segment):
+            skip_next = False
+            continue
+        family.append(segment)
+        skip_next = segment in _ID_AFTER
+    return "/".join(family) or "repos"
+
+
+def token_fingerprint(token: str) -> str:
+    """Short, non-reversible label identifying a token in metrics and logs."""
+
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:12]
 
 
 class GitHubClient:
@@ -160,6 +246,8 @@ class GitHubClient:
             timeout=30.0,
         )
         self._graphql_url = build_graphql_url(normalized_base_url)
+        self._host = urlsplit(normalized_base_url).netloc
+        self._token_label = token_fingerprint(token)
 
     def __enter__(self) -> "GitHubClient":
         return self
@@ -170,6 +258,40 @@ class GitHubClient:
     def close(self) -> None:
         self._client.close()
 
+    def _send(self, endpoint: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        in_flight = metrics.GITHUB_IN_FLIGHT.labels(self._host)
+        in_flight.inc()
+        started = time.perf_counter()
+        status = "error"
+        try:
+            with tracing.span(
+                "github." + endpoint,
+                **{"http.method": method, "server.address": self._host},
+            ) as span:
+                response = self._client.request(method, url, **kwargs)
+                status = str(response.status_code)
+                if span is not None:
+                    span.set_attribute("http.status_code", response.status_code)
+        finally:
+            in_flight.dec()
+            metrics.GITHUB_REQUESTS.labels(self._host, endpoint, method, status).inc()
+            metrics.GITHUB_REQUEST_DURATION.labels(self._host, endpoint).observe(
+                time.perf_counter() - started
+            )
+
+        remaining = response.headers.get("x-ratelimit-remaining")
+        if remaining is not None:
+            try:
+                value = float(remaining)
+            except ValueError:
+                pass
+            else:
+                resource = response.headers.get("x-ratelimit-resource") or "core"
+                metrics.GITHUB_RATE_LIMIT_REMAINING.labels(
+                    self._host, self._token_label, resource
+                ).set(value)
+        return response
+
     def _request(
         self,
         method: str,
@@ -183,7 +305,8 @@ class GitHubClient:
         if accept:
             headers["Accept"] = accept
 
-        response = self._client.request(
+        response = self._send(
+            endpoint_family(path),
             method,
             path,
             params=params,
@@ -199,6 +322,7 @@ class GitHubClient:
                 f"GitHub API error ({response.status_code}) on `{path}`: {message}",
                 status_code=response.status_code,
                 path=path,
+                retry_after=_parse_retry_after(response),
             )
 
         return response
@@ -230,7 +354,9 @@ class GitHubClient:
         *,
         variables: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
-        response = self._client.post(
+        response = self._send(
+            "graphql",
+            "POST",
             self._graphql_url,
             json={
                 "query": query,
@@ -346,6 +472,41 @@ class GitHubClient:
     def get_commit(self, repo_full_name: str, ref: str) -> dict[str, Any]:
         return self._request("GET", f"repos/{repo_full_name}/commits/{ref}").json()
 
+    def list_pull_commits(self, repo_full_name: str, number: int) -> list[dict[str, Any]]:
+        return self._paginate(f"repos/{repo_full_name}/pulls/{number}/commits")
+
+    def compare_commits(self, repo_full_name: str, base: str, head: str) -> dict[str, Any]:
+        return self._request(
+            "GET", f"repos/{repo_full_name}/compare/{base}...{head}"
+        ).json()
+
+    def get_blob_oid(self, repo_full_name: str, ref: str, path: str) -> str | None:
+        owner, name = self._split_repo_full_name(repo_full_name)
+        data = self._graphql(
+            _BLOB_OID_QUERY,
+            variables={
+                "owner": owner,
+                "name": name,
+                "expression": f"{ref}:{path}",
+            },
+        )
+        repository = data.get("repository")
+        if repository is None:
+            raise GitHubError(
+                f"Repository `{repo_full_name}` not found in GraphQL response."
+            )
+        obj = repository.get("object") or {}
+        if obj.get("__typename") != "Blob":
+            return None
+        return str(obj.get("oid") or "") or None
+
+    def get_git_blob(self, repo_full_name: str, sha: str) -> bytes:
+        return self._request(
+            "GET",
+            f"repos/{repo_full_name}/git/blobs/{sha}",
+            accept="application/vnd.github.raw+json",
+        ).content
+
     def list_pull_files(self, repo_full_name: str, number: int) -> list[dict[str, Any]]:
         return self._paginate(f"repos/{repo_full_name}/pulls/{number}/files")
 
@@ -361,6 +522,11 @@ class GitHubClient:
     ) -> list[dict[str, Any]]:
         return self._paginate(f"repos/{repo_full_name}/issues/{issue_number}/comments")
 
+    def list_pull_review_comments(
+        self, repo_full_name: str, number: int
+    ) -> list[dict[str, Any]]:
+        return self._paginate(f"repos/{repo_full_name}/pulls/{number}/comments")
+
     def list_pull_reviews(
         self, repo_full_name: str, number: int
     ) -> list[dict[str, Any]]:
@@ -440,6 +606,34 @@ class GitHubClient:
             "threads": threads,
         }
 
+    def get_pull_request_activity(
+        self,
+        repo_full_name: str,
+        number: int,
+    ) -> dict[str, Any]:
+        """Cheap probe used to decide whether stored review threads are stale."""
+
+        owner, name = self._split_repo_full_name(repo_full_name)
+        data = self._graphql(
+            _PULL_ACTIVITY_QUERY,
+            variables={
+                "owner": owner,
+                "name": name,
+                "number": number,
+            },
+        )
+        viewer = data.get("viewer") or {}
+        pull_request = (data.get("repository") or {}).get("pullRequest")
+        if pull_request is None:
+            raise GitHubError(
+                f"Pull request #{number} not found in `{repo_full_name}`."
+            )
+        return {
+            "viewer_login": str(viewer.get("login") or "") or None,
+            "updated_at": str(pull_request.get("updatedAt") or "") or None,
+            "head_ref_oid": str(pull_request.get("headRefOid") or "") or None,
+        }
+
     def get_pull_review_thread(self, thread_id: str) -> dict[str, Any]:
         cursor: str | None = None
         viewer_login: str | None = None
@@ -517,6 +711,28 @@ class GitHubClient:
             },
         ).json()
 
+    def create_pull_review(
+        self,
+        repo_full_name: str,
+        number: int,
+        *,
+        commit_id: str,
+        body: str,
+        comments: list[dict[str, Any]],
+    ) -> dict[str, Any]:
+        """Submit one review with inline comments; `COMMENT` never changes PR state."""
+
+        return self._request(
+            "POST",
+            f"repos/{repo_full_name}/pulls/{number}/reviews",
+            json_body={
+                "commit_id": commit_id,
+                "body": body,
+                "event": "COMMENT",
+                "comments": comments,
+            },
+        ).json()
+
     def create_issue_comment_reaction(
         self,
         repo_full_name: str,
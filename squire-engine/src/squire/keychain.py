@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import platform
+import re
 import shutil
 import subprocess
 
+from . import tracing
+
 GITHUB_TOKEN_SERVICE = "squire.github.token"
 
+_DUMP_ATTRIBUTE = re.compile(r'^\s*"(acct|svce)"<blob>=(?:0x[0-9A-Fa-f]+\s+)?"(.*)"\s*$')
+
 
 class KeychainError(RuntimeError):
     """Base error for keychain integration."""
@@ -53,13 +58,14 @@ def _run_security(
     allow_not_found: bool = False,
 ) -> tuple[int, str, str]:
     _assert_available()
-    result = subprocess.run(
-        ["security", *args],
-        input=input_text,
-        text=True,
-        capture_output=True,
-        check=False,
-    )
+    with tracing.span("keychain." + args[0]):
+        result = subprocess.run(
+            ["security", *args],
+            input=input_text,
+            text=True,
+            capture_output=True,
+            check=False,
+        )
     stdout = result.stdout.strip()
     stderr = result.stderr.strip()
     if result.returncode == 0:
@@ -88,6 +94,32 @@ def has_github_token(account: str) -> bool:
     return return_code == 0
 
 
+def parse_dump_accounts(output: str, service: str = GITHUB_TOKEN_SERVICE) -> set[str]:
+    """Accounts of `service` items in `security dump-keychain` output (no secrets)."""
+
+    accounts: set[str] = set()
+    item: dict[str, str] = {}
+    for line in [*output.splitlines(), "keychain: <end>"]:
+        if line.startswith("keychain:"):
+            if item.get("svce") == service and item.get("acct"):
+                accounts.add(item["acct"])
+            item = {}
+            continue
+        match = _DUMP_ATTRIBUTE.match(line)
+        if match:
+            item[match.group(1)] = match.group(2)
+    return accounts
+
+
+def list_github_token_accounts() -> set[str]:
+    """Every account with a Squire token, from one `security` call instead of one per repo."""
+
+    if not is_available():
+        return set()
+    _, stdout, _ = _run_security(["dump-keychain"])
+    return parse_dump_accounts(stdout)
+
+
 def get_github_token(account: str) -> str | None:
     if not is_available():
         return None
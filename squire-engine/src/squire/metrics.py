@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Sequence
+import math
+import threading
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQLITE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+SYNC_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: dict[tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values!r}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self): ...
+
+    @abstractmethod
+    def _samples(self) -> list[str]: ...
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value(self._lock)
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in self._children.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+
+class _HistogramValue:
+    __slots__ = ("_lock", "_bounds", "counts", "sum")
+
+    def __init__(self, lock: threading.Lock, bounds: tuple[float, ...]) -> None:
+        self._lock = lock
+        self._bounds = bounds
+        # One slot per bucket plus +Inf; made cumulative only when rendered.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self._lock, self.buckets)
+
+    def _samples(self) -> list[str]:
+        lines: list[str] = []
+        bucket_names = (*self.labelnames, "le")
+        bounds = (*(_format_value(bound) for bound in self.buckets), "+Inf")
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(bounds, child.counts):
+                cumulative += count
+                labels = _format_labels(bucket_names, (*values, bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register[M: _Metric](self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter(
+        "squire_http_requests_total",
+        "API requests by route template and status code.",
+        ("method", "route", "status"),
+    )
+)
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "squire_http_request_duration_seconds",
+        "API request latency by route template (streamed responses excluded).",
+        ("method", "route"),
+    )
+)
+HTTP_IN_FLIGHT = REGISTRY.register(
+    Gauge("squire_http_requests_in_flight", "API requests currently being served.")
+)
+GITHUB_REQUESTS = REGISTRY.register(
+    Counter(
+        "squire_github_requests_total",
+        "GitHub API calls by host, endpoint family, method and status ('error' if no response).",
+        ("host", "endpoint", "method", "status"),
+    )
+)
+GITHUB_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "squire_github_request_duration_seconds",
+        "GitHub API call latency by host and endpoint family.",
+        ("host", "endpoint"),
+    )
+)
+GITHUB_IN_FLIGHT = REGISTRY.register(
+    Gauge("squire_github_requests_in_flight", "GitHub API calls currently waiting.", ("host",))
+)
+GITHUB_RATE_LIMIT_REMAINING = REGISTRY.register(
+    Gauge(
+        "squire_github_rate_limit_remaining",
+        "Last `X-RateLimit-Remaining` seen per host, token fingerprint and rate-limit resource.",
+        ("host", "token", "resource"),
+    )
+)
+SYNC_DURATION = REGISTRY.register(
+    Histogram(
+        "squire_sync_duration_seconds",
+        "Duration of sync runs by kind.",
+        ("kind",),
+        buckets=SYNC_BUCKETS,
+    )
+)
+SYNC_ROWS_CHANGED = REGISTRY.register(
+    Counter(
+        "squire_sync_rows_changed_total",
+        "SQLite rows written by sync runs (including trigger-maintained rows).",
+        ("kind",),
+    )
+)
+SQLITE_CONNECT_DURATION = REGISTRY.register(
+    Histogram(
+        "squire_sqlite_connect_duration_seconds",
+        "Time to open and configure a SQLite connection.",
+        ("mode",),
+        buckets=SQLITE_BUCKETS,
+    )
+)
+SQLITE_QUERY_DURATION = REGISTRY.register(
+    Histogram(
+        "squire_sqlite_query_duration_seconds",
+        "Time spent in `execute`/`executemany` by statement kind (up to the first row).",
+        ("statement",),
+        buckets=SQLITE_BUCKETS,
+    )
+)
+
+
+class RequestMetricsMiddleware:
+    """Count and time API requests by the matched route template, not the raw path."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+        streaming = False
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                for name, value in message.get("headers", ()):
+                    if name.lower() == b"content-type":
+                        streaming = value.startswith(b"text/event-stream")
+            await send(message)
+
+        HTTP_IN_FLIGHT.labels().inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.labels().dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "<unmatched>"
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, template, status).inc()
+            if not streaming:
+                HTTP_REQUEST_DURATION.labels(method, template).observe(elapsed)
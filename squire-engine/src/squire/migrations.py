@@ -0,0 +1,1105 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import sqlite3
+
+
+class MigrationError(RuntimeError):
+    """Raised when the database schema is newer than this build understands."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _split_statements(script: str) -> list[str]:
+    """Split a DDL script into statements, keeping trigger bodies intact."""
+
+    statements: list[str] = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip()
+            if statement:
+                statements.append(statement)
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+def _script(script: str) -> Callable[[sqlite3.Connection], None]:
+    statements = _split_statements(script)
+
+    def apply(conn: sqlite3.Connection) -> None:
+        # `executescript` would commit the surrounding migration transaction.
+        for statement in statements:
+            conn.execute(statement)
+
+    return apply
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {str(row[1]) for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+# Every CREATE uses IF NOT EXISTS: databases that predate versioning report
+# user_version 0 yet already hold some of these tables.
+_BASELINE = _script(
+    """
+    CREATE TABLE IF NOT EXISTS repositories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        full_name TEXT NOT NULL UNIQUE,
+        github_base_url TEXT,
+        is_active INTEGER NOT NULL DEFAULT 1 CHECK (is_active IN (0, 1)),
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        last_synced_at TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS pull_requests (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
+        number INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        body TEXT,
+        author TEXT NOT NULL,
+        state TEXT NOT NULL CHECK (state IN ('open', 'closed', 'merged')),
+        head_branch TEXT NOT NULL,
+        base_branch TEXT NOT NULL,
+        changed_files INTEGER NOT NULL DEFAULT 0,
+        reviewers TEXT NOT NULL DEFAULT '[]',
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        synced_at TEXT NOT NULL,
+        UNIQUE (repo_id, number)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_pull_requests_repo_updated
+        ON pull_requests(repo_id, updated_at DESC);
+
+    CREATE TABLE IF NOT EXISTS ai_reviews (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pull_request_id INTEGER NOT NULL REFERENCES pull_requests(id) ON DELETE CASCADE,
+        file_path TEXT,
+        line_number INTEGER,
+        severity TEXT NOT NULL CHECK (severity IN ('info', 'warning', 'error')),
+        body TEXT NOT NULL,
+        agent TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_ai_reviews_pr
+        ON ai_reviews(pull_request_id, created_at DESC);
+
+    CREATE TABLE IF NOT EXISTS pr_review_status (
+        pull_request_id INTEGER PRIMARY KEY REFERENCES pull_requests(id) ON DELETE CASCADE,
+        status TEXT NOT NULL CHECK (status IN ('pending', 'in-progress', 'done')),
+        updated_at TEXT NOT NULL
+    );
+    """
+)
+
+
+def _repository_github_base_url(conn: sqlite3.Connection) -> None:
+    """Databases created before per-repository GitHub URLs lack this column."""
+
+    if "github_base_url" not in _table_columns(conn, "repositories"):
+        conn.execute("ALTER TABLE repositories ADD COLUMN github_base_url TEXT")
+
+
+def _legacy_repository_tokens(conn: sqlite3.Connection) -> None:
+    """Move plaintext `repositories.github_token` values into their own table.
+
+    Tokens now live in the Keychain; the copies kept here only feed
+    `squire repo migrate-legacy-tokens` and the read fallback.
+    """
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS legacy_repository_tokens (
+            repo_id INTEGER PRIMARY KEY REFERENCES repositories(id) ON DELETE CASCADE,
+            github_token TEXT NOT NULL
+        )
+        """
+    )
+    if "github_token" not in _table_columns(conn, "repositories"):
+        return
+
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO legacy_repository_tokens (repo_id, github_token)
+        SELECT id, TRIM(github_token)
+        FROM repositories
+        WHERE github_token IS NOT NULL AND TRIM(github_token) != ''
+        """
+    )
+    conn.execute("ALTER TABLE repositories DROP COLUMN github_token")
+
+
+_FILE_BLOB_REFS = _script(
+    """
+    CREATE TABLE IF NOT EXISTS file_blob_refs (
+        repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
+        commit_sha TEXT NOT NULL,
+        path TEXT NOT NULL,
+        blob_sha TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (repo_id, commit_sha, path)
+    );
+    """
+)
+
+_REVIEW_THREADS = _script(
+    """
+    CREATE TABLE IF NOT EXISTS review_thread_syncs (
+        repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
+        pull_number INTEGER NOT NULL,
+        pr_updated_at TEXT,
+        head_ref_oid TEXT,
+        viewer_login TEXT,
+        synced_at TEXT NOT NULL,
+        PRIMARY KEY (repo_id, pull_number)
+    );
+
+    CREATE TABLE IF NOT EXISTS review_threads (
+        id TEXT PRIMARY KEY,
+        repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
+        pull_number INTEGER NOT NULL,
+        is_resolved INTEGER NOT NULL CHECK (is_resolved IN (0, 1)),
+        is_outdated INTEGER NOT NULL CHECK (is_outdated IN (0, 1)),
+        path TEXT,
+        line INTEGER,
+        original_line INTEGER,
+        head_ref_oid TEXT,
+        comment_count INTEGER NOT NULL DEFAULT 0,
+        reply_count INTEGER NOT NULL DEFAULT 0,
+        updated_at TEXT,
+        root_comment_id TEXT,
+        root_author TEXT,
+        synced_at TEXT NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_review_threads_pr_updated
+        ON review_threads(repo_id, pull_number, updated_at DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_review_threads_pr_author
+        ON review_threads(repo_id, pull_number, root_author COLLATE NOCASE);
+
+    CREATE INDEX IF NOT EXISTS idx_review_threads_pr_path
+        ON review_threads(repo_id, pull_number, path);
+
+    CREATE INDEX IF NOT EXISTS idx_review_threads_pr_resolved
+        ON review_threads(repo_id, pull_number, is_resolved, updated_at DESC);
+
+    CREATE TABLE IF NOT EXISTS review_thread_comments (
+        id TEXT PRIMARY KEY,
+        thread_id TEXT NOT NULL REFERENCES review_threads(id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        database_id INTEGER,
+        url TEXT,
+        body TEXT NOT NULL,
+        created_at TEXT,
+        updated_at TEXT,
+        author TEXT,
+        reply_to_id TEXT,
+        path TEXT,
+        line INTEGER,
+        original_line INTEGER,
+        commit_oid TEXT,
+        original_commit_oid TEXT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_review_thread_comments_thread
+        ON review_thread_comments(thread_id, position);
+    """
+)
+
+_REVIEW_THREAD_INBOX = _script(
+    """
+    CREATE INDEX IF NOT EXISTS idx_review_threads_inbox
+        ON review_threads(root_author COLLATE NOCASE, is_resolved, updated_at DESC);
+
+    CREATE TABLE IF NOT EXISTS review_thread_mentions (
+        thread_id TEXT NOT NULL REFERENCES review_threads(id) ON DELETE CASCADE,
+        login TEXT NOT NULL COLLATE NOCASE,
+        PRIMARY KEY (thread_id, login)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_review_thread_mentions_login
+        ON review_thread_mentions(login, thread_id);
+    """
+)
+
+_COMMIT_HISTORY = _script(
+    """
+    CREATE TABLE IF NOT EXISTS commits (
+        repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
+        sha TEXT NOT NULL,
+        parent_shas TEXT NOT NULL DEFAULT '[]',
+        author_name TEXT,
+        author_login TEXT,
+        authored_at TEXT,
+        committer_name TEXT,
+        committed_at TEXT,
+        message TEXT NOT NULL DEFAULT '',
+        fetched_at TEXT NOT NULL,
+        PRIMARY KEY (repo_id, sha)
+    );
+
+    CREATE TABLE IF NOT EXISTS pull_request_commits (
+        repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
+        pull_number INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        sha TEXT NOT NULL,
+        PRIMARY KEY (repo_id, pull_number, position)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_pull_request_commits_sha
+        ON pull_request_commits(repo_id, sha);
+
+    CREATE TABLE IF NOT EXISTS pull_request_commit_syncs (
+        repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
+        pull_number INTEGER NOT NULL,
+        head_sha TEXT NOT NULL,
+        synced_at TEXT NOT NULL,
+        PRIMARY KEY (repo_id, pull_number)
+    );
+    """
+)
+
+_REVIEW_PUBLISH_OUTBOX = _script(
+    """
+    CREATE TABLE IF NOT EXISTS review_publish_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ai_review_id INTEGER NOT NULL UNIQUE REFERENCES ai_reviews(id) ON DELETE CASCADE,
+        pull_request_id INTEGER NOT NULL REFERENCES pull_requests(id) ON DELETE CASCADE,
+        prefix TEXT NOT NULL DEFAULT '',
+        batch INTEGER NOT NULL DEFAULT 0,
+        state TEXT NOT NULL DEFAULT 'pending'
+            CHECK (state IN ('pending', 'sending', 'delivered', 'failed')),
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TEXT,
+        last_error TEXT,
+        delivery_kind TEXT CHECK (delivery_kind IN ('inline', 'issue', 'review', 'summary')),
+        github_id INTEGER,
+        github_url TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        delivered_at TEXT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_review_publish_outbox_due
+        ON review_publish_outbox(state, next_attempt_at);
+    """
+)
+
+_FULL_TEXT_SEARCH = _script(
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS pull_requests_fts USING fts5(
+        title,
+        body,
+        head_branch,
+        base_branch,
+        content = 'pull_requests',
+        content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS pull_requests_fts_insert
+    AFTER INSERT ON pull_requests BEGIN
+        INSERT INTO pull_requests_fts (rowid, title, body, head_branch, base_branch)
+        VALUES (new.id, new.title, new.body, new.head_branch, new.base_branch);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pull_requests_fts_delete
+    AFTER DELETE ON pull_requests BEGIN
+        INSERT INTO pull_requests_fts (
+            pull_requests_fts, rowid, title, body, head_branch, base_branch
+        )
+        VALUES ('delete', old.id, old.title, old.body, old.head_branch, old.base_branch);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pull_requests_fts_update
+    AFTER UPDATE OF title, body, head_branch, base_branch ON pull_requests
+    WHEN old.title IS NOT new.title
+        OR old.body IS NOT new.body
+        OR old.head_branch IS NOT new.head_branch
+        OR old.base_branch IS NOT new.base_branch
+    BEGIN
+        INSERT INTO pull_requests_fts (
+            pull_requests_fts, rowid, title, body, head_branch, base_branch
+        )
+        VALUES ('delete', old.id, old.title, old.body, old.head_branch, old.base_branch);
+        INSERT INTO pull_requests_fts (rowid, title, body, head_branch, base_branch)
+        VALUES (new.id, new.title, new.body, new.head_branch, new.base_branch);
+    END;
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS ai_reviews_fts USING fts5(
+        body,
+        file_path,
+        content = 'ai_reviews',
+        content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_fts_insert
+    AFTER INSERT ON ai_reviews BEGIN
+        INSERT INTO ai_reviews_fts (rowid, body, file_path)
+        VALUES (new.id, new.body, new.file_path);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_fts_delete
+    AFTER DELETE ON ai_reviews BEGIN
+        INSERT INTO ai_reviews_fts (ai_reviews_fts, rowid, body, file_path)
+        VALUES ('delete', old.id, old.body, old.file_path);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_fts_update
+    AFTER UPDATE OF body, file_path ON ai_reviews BEGIN
+        INSERT INTO ai_reviews_fts (ai_reviews_fts, rowid, body, file_path)
+        VALUES ('delete', old.id, old.body, old.file_path);
+        INSERT INTO ai_reviews_fts (rowid, body, file_path)
+        VALUES (new.id, new.body, new.file_path);
+    END;
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS review_thread_comments_fts USING fts5(
+        body,
+        path,
+        content = 'review_thread_comments',
+        content_rowid = 'rowid',
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS review_thread_comments_fts_insert
+    AFTER INSERT ON review_thread_comments BEGIN
+        INSERT INTO review_thread_comments_fts (rowid, body, path)
+        VALUES (new.rowid, new.body, new.path);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS review_thread_comments_fts_delete
+    AFTER DELETE ON review_thread_comments BEGIN
+        INSERT INTO review_thread_comments_fts (review_thread_comments_fts, rowid, body, path)
+        VALUES ('delete', old.rowid, old.body, old.path);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS review_thread_comments_fts_update
+    AFTER UPDATE OF body, path ON review_thread_comments BEGIN
+        INSERT INTO review_thread_comments_fts (review_thread_comments_fts, rowid, body, path)
+        VALUES ('delete', old.rowid, old.body, old.path);
+        INSERT INTO review_thread_comments_fts (rowid, body, path)
+        VALUES (new.rowid, new.body, new.path);
+    END;
+
+    INSERT INTO pull_requests_fts (pull_requests_fts) VALUES ('rebuild');
+    INSERT INTO ai_reviews_fts (ai_reviews_fts) VALUES ('rebuild');
+    INSERT INTO review_thread_comments_fts (review_thread_comments_fts) VALUES ('rebuild');
+    """
+)
+
+# Every list filter leads with its equality columns and ends with the keyset
+# order `(updated_at, id)`, so a page is an index range scan with no sort.
+_PULL_REQUEST_LIST_INDEXES = _script(
+    """
+    DROP INDEX IF EXISTS idx_pull_requests_repo_updated;
+
+    CREATE INDEX IF NOT EXISTS idx_pull_requests_updated
+        ON pull_requests(updated_at DESC, id DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_pull_requests_repo_updated
+        ON pull_requests(repo_id, updated_at DESC, id DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_pull_requests_repo_state_updated
+        ON pull_requests(repo_id, state, updated_at DESC, id DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_pull_requests_state_updated
+        ON pull_requests(state, updated_at DESC, id DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_pull_requests_author_updated
+        ON pull_requests(author, updated_at DESC, id DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_pull_requests_base_updated
+        ON pull_requests(base_branch, updated_at DESC, id DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_pr_review_status_status
+        ON pr_review_status(status, pull_request_id);
+    """
+)
+
+# Counters are adjusted by triggers in the same transaction as the row change.
+# A PR's bucket is read in BEFORE DELETE because its pr_review_status row is
+# gone by the time cascaded deletes run; the status triggers skip PRs that no
+# longer exist for the same reason.
+_SUMMARY_COUNTERS = _script(
+    """
+    CREATE TABLE IF NOT EXISTS pull_request_counts (
+        repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
+        state TEXT NOT NULL,
+        review_status TEXT NOT NULL,
+        pull_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (repo_id, state, review_status)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS pull_request_review_counts (
+        pull_request_id INTEGER PRIMARY KEY REFERENCES pull_requests(id) ON DELETE CASCADE,
+        review_count INTEGER NOT NULL DEFAULT 0,
+        info_count INTEGER NOT NULL DEFAULT 0,
+        warning_count INTEGER NOT NULL DEFAULT 0,
+        error_count INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TRIGGER IF NOT EXISTS pull_request_counts_insert
+    AFTER INSERT ON pull_requests BEGIN
+        INSERT INTO pull_request_counts (repo_id, state, review_status, pull_count)
+        VALUES (
+            new.repo_id,
+            new.state,
+            COALESCE(
+                (SELECT status FROM pr_review_status WHERE pull_request_id = new.id),
+                'pending'
+            ),
+            1
+        )
+        ON CONFLICT (repo_id, state, review_status)
+        DO UPDATE SET pull_count = pull_count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pull_request_counts_delete
+    BEFORE DELETE ON pull_requests BEGIN
+        UPDATE pull_request_counts
+        SET pull_count = pull_count - 1
+        WHERE repo_id = old.repo_id
+            AND state = old.state
+            AND review_status = COALESCE(
+                (SELECT status FROM pr_review_status WHERE pull_request_id = old.id),
+                'pending'
+            );
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pull_request_counts_update
+    AFTER UPDATE OF repo_id, state ON pull_requests
+    WHEN old.repo_id IS NOT new.repo_id OR old.state IS NOT new.state
+    BEGIN
+        UPDATE pull_request_counts
+        SET pull_count = pull_count - 1
+        WHERE repo_id = old.repo_id
+            AND state = old.state
+            AND review_status = COALESCE(
+                (SELECT status FROM pr_review_status WHERE pull_request_id = old.id),
+                'pending'
+            );
+        INSERT INTO pull_request_counts (repo_id, state, review_status, pull_count)
+        VALUES (
+            new.repo_id,
+            new.state,
+            COALESCE(
+                (SELECT status FROM pr_review_status WHERE pull_request_id = new.id),
+                'pending'
+            ),
+            1
+        )
+        ON CONFLICT (repo_id, state, review_status)
+        DO UPDATE SET pull_count = pull_count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pr_review_status_counts_insert
+    AFTER INSERT ON pr_review_status
+    WHEN new.status != 'pending'
+    BEGIN
+        UPDATE pull_request_counts
+        SET pull_count = pull_count - 1
+        WHERE (repo_id, state, review_status) = (
+            SELECT repo_id, state, 'pending' FROM pull_requests WHERE id = new.pull_request_id
+        );
+        INSERT INTO pull_request_counts (repo_id, state, review_status, pull_count)
+        SELECT repo_id, state, new.status, 1
+        FROM pull_requests
+        WHERE id = new.pull_request_id
+        ON CONFLICT (repo_id, state, review_status)
+        DO UPDATE SET pull_count = pull_count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pr_review_status_counts_update
+    AFTER UPDATE OF status ON pr_review_status
+    WHEN old.status != new.status
+    BEGIN
+        UPDATE pull_request_counts
+        SET pull_count = pull_count - 1
+        WHERE (repo_id, state, review_status) = (
+            SELECT repo_id, state, old.status FROM pull_requests WHERE id = old.pull_request_id
+        );
+        INSERT INTO pull_request_counts (repo_id, state, review_status, pull_count)
+        SELECT repo_id, state, new.status, 1
+        FROM pull_requests
+        WHERE id = new.pull_request_id
+        ON CONFLICT (repo_id, state, review_status)
+        DO UPDATE SET pull_count = pull_count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pr_review_status_counts_delete
+    AFTER DELETE ON pr_review_status
+    WHEN old.status != 'pending'
+    BEGIN
+        UPDATE pull_request_counts
+        SET pull_count = pull_count - 1
+        WHERE (repo_id, state, review_status) = (
+            SELECT repo_id, state, old.status FROM pull_requests WHERE id = old.pull_request_id
+        );
+        INSERT INTO pull_request_counts (repo_id, state, review_status, pull_count)
+        SELECT repo_id, state, 'pending', 1
+        FROM pull_requests
+        WHERE id = old.pull_request_id
+        ON CONFLICT (repo_id, state, review_status)
+        DO UPDATE SET pull_count = pull_count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_counts_insert
+    AFTER INSERT ON ai_reviews BEGIN
+        INSERT INTO pull_request_review_counts (
+            pull_request_id, review_count, info_count, warning_count, error_count
+        )
+        VALUES (
+            new.pull_request_id,
+            1,
+            new.severity = 'info',
+            new.severity = 'warning',
+            new.severity = 'error'
+        )
+        ON CONFLICT (pull_request_id) DO UPDATE SET
+            review_count = review_count + 1,
+            info_count = info_count + excluded.info_count,
+            warning_count = warning_count + excluded.warning_count,
+            error_count = error_count + excluded.error_count;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_counts_delete
+    AFTER DELETE ON ai_reviews BEGIN
+        UPDATE pull_request_review_counts
+        SET review_count = review_count - 1,
+            info_count = info_count - (old.severity = 'info'),
+            warning_count = warning_count - (old.severity = 'warning'),
+            error_count = error_count - (old.severity = 'error')
+        WHERE pull_request_id = old.pull_request_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_counts_update
+    AFTER UPDATE OF pull_request_id, severity ON ai_reviews
+    WHEN old.pull_request_id IS NOT new.pull_request_id OR old.severity IS NOT new.severity
+    BEGIN
+        UPDATE pull_request_review_counts
+        SET review_count = review_count - 1,
+            info_count = info_count - (old.severity = 'info'),
+            warning_count = warning_count - (old.severity = 'warning'),
+            error_count = error_count - (old.severity = 'error')
+        WHERE pull_request_id = old.pull_request_id;
+        INSERT INTO pull_request_review_counts (
+            pull_request_id, review_count, info_count, warning_count, error_count
+        )
+        VALUES (
+            new.pull_request_id,
+            1,
+            new.severity = 'info',
+            new.severity = 'warning',
+            new.severity = 'error'
+        )
+        ON CONFLICT (pull_request_id) DO UPDATE SET
+            review_count = review_count + 1,
+            info_count = info_count + excluded.info_count,
+            warning_count = warning_count + excluded.warning_count,
+            error_count = error_count + excluded.error_count;
+    END;
+
+    DELETE FROM pull_request_counts;
+    INSERT INTO pull_request_counts (repo_id, state, review_status, pull_count)
+    SELECT p.repo_id, p.state, COALESCE(s.status, 'pending'), COUNT(*)
+    FROM pull_requests p
+    LEFT JOIN pr_review_status s ON s.pull_request_id = p.id
+    GROUP BY 1, 2, 3;
+
+    DELETE FROM pull_request_review_counts;
+    INSERT INTO pull_request_review_counts (
+        pull_request_id, review_count, info_count, warning_count, error_count
+    )
+    SELECT
+        pull_request_id,
+        COUNT(*),
+        SUM(severity = 'info'),
+        SUM(severity = 'warning'),
+        SUM(severity = 'error')
+    FROM ai_reviews
+    GROUP BY pull_request_id;
+    """
+)
+
+_PULL_REQUEST_REVIEWERS = _script(
+    """
+    CREATE TABLE IF NOT EXISTS pull_request_reviewers (
+        pull_request_id INTEGER NOT NULL REFERENCES pull_requests(id) ON DELETE CASCADE,
+        reviewer TEXT NOT NULL COLLATE NOCASE,
+        reviewer_type TEXT NOT NULL CHECK (reviewer_type IN ('user', 'team')),
+        state TEXT NOT NULL CHECK (state IN ('requested', 'cleared')),
+        requested_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (pull_request_id, reviewer)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_pull_request_reviewers_queue
+        ON pull_request_reviewers(reviewer, state, pull_request_id);
+
+    INSERT OR IGNORE INTO pull_request_reviewers (
+        pull_request_id, reviewer, reviewer_type, state, requested_at, updated_at
+    )
+    SELECT
+        p.id,
+        j.value,
+        CASE WHEN j.value LIKE 'team:%' THEN 'team' ELSE 'user' END,
+        'requested',
+        p.synced_at,
+        p.synced_at
+    FROM pull_requests p, json_each(p.reviewers) j
+    WHERE json_valid(p.reviewers) AND TRIM(j.value) != '';
+    """
+)
+
+# `julianday` accepts both GitHub's `Z` suffix and our `+00:00` offsets, so the
+# backfill agrees with `timestamps.to_epoch_ms` on every stored value.
+_EPOCH_MS_SQL = "CAST(ROUND((julianday({column}) - 2440587.5) * 86400000) AS INTEGER)"
+
+_EPOCH_MS_TIMESTAMPS = _script(
+    f"""
+    ALTER TABLE repositories ADD COLUMN last_synced_at_ms INTEGER;
+    ALTER TABLE pull_requests ADD COLUMN created_at_ms INTEGER;
+    ALTER TABLE pull_requests ADD COLUMN updated_at_ms INTEGER;
+    ALTER TABLE pull_requests ADD COLUMN synced_at_ms INTEGER;
+    ALTER TABLE review_threads ADD COLUMN updated_at_ms INTEGER;
+
+    UPDATE repositories
+    SET last_synced_at_ms = {_EPOCH_MS_SQL.format(column="last_synced_at")};
+
+    UPDATE pull_requests
+    SET created_at_ms = {_EPOCH_MS_SQL.format(column="created_at")},
+        updated_at_ms = {_EPOCH_MS_SQL.format(column="updated_at")},
+        synced_at_ms = {_EPOCH_MS_SQL.format(column="synced_at")};
+
+    UPDATE review_threads
+    SET updated_at_ms = {_EPOCH_MS_SQL.format(column="updated_at")};
+
+    DROP INDEX IF EXISTS idx_pull_requests_updated;
+    DROP INDEX IF EXISTS idx_pull_requests_repo_updated;
+    DROP INDEX IF EXISTS idx_pull_requests_repo_state_updated;
+    DROP INDEX IF EXISTS idx_pull_requests_state_updated;
+    DROP INDEX IF EXISTS idx_pull_requests_author_updated;
+    DROP INDEX IF EXISTS idx_pull_requests_base_updated;
+
+    CREATE INDEX idx_pull_requests_updated
+        ON pull_requests(updated_at_ms DESC, id DESC);
+
+    CREATE INDEX idx_pull_requests_repo_updated
+        ON pull_requests(repo_id, updated_at_ms DESC, id DESC);
+
+    CREATE INDEX idx_pull_requests_repo_state_updated
+        ON pull_requests(repo_id, state, updated_at_ms DESC, id DESC);
+
+    CREATE INDEX idx_pull_requests_state_updated
+        ON pull_requests(state, updated_at_ms DESC, id DESC);
+
+    CREATE INDEX idx_pull_requests_author_updated
+        ON pull_requests(author, updated_at_ms DESC, id DESC);
+
+    CREATE INDEX idx_pull_requests_base_updated
+        ON pull_requests(base_branch, updated_at_ms DESC, id DESC);
+
+    DROP INDEX IF EXISTS idx_review_threads_pr_updated;
+    DROP INDEX IF EXISTS idx_review_threads_pr_resolved;
+    DROP INDEX IF EXISTS idx_review_threads_inbox;
+
+    CREATE INDEX idx_review_threads_pr_updated
+        ON review_threads(repo_id, pull_number, updated_at_ms DESC);
+
+    CREATE INDEX idx_review_threads_pr_resolved
+        ON review_threads(repo_id, pull_number, is_resolved, updated_at_ms DESC);
+
+    CREATE INDEX idx_review_threads_inbox
+        ON review_threads(root_author COLLATE NOCASE, is_resolved, updated_at_ms DESC);
+    """
+)
+
+# Only writes that change what a client renders get a sequence number; a sync
+# that merely bumps `synced_at` or re-sets the same review status logs nothing.
+_CHANGE_LOG = _script(
+    """
+    CREATE TABLE IF NOT EXISTS change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        entity TEXT NOT NULL CHECK (entity IN ('pull_request', 'review_status', 'local_review')),
+        op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+        repo_id INTEGER,
+        pull_request_id INTEGER,
+        pull_number INTEGER,
+        entity_id INTEGER,
+        changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_change_log_repo_seq
+        ON change_log(repo_id, seq);
+
+    CREATE TRIGGER IF NOT EXISTS pull_requests_change_insert
+    AFTER INSERT ON pull_requests BEGIN
+        INSERT INTO change_log (entity, op, repo_id, pull_request_id, pull_number, entity_id)
+        VALUES ('pull_request', 'insert', new.repo_id, new.id, new.number, new.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pull_requests_change_update
+    AFTER UPDATE ON pull_requests
+    WHEN old.title IS NOT new.title
+        OR old.body IS NOT new.body
+        OR old.author IS NOT new.author
+        OR old.state IS NOT new.state
+        OR old.head_branch IS NOT new.head_branch
+        OR old.base_branch IS NOT new.base_branch
+        OR old.changed_files IS NOT new.changed_files
+        OR old.reviewers IS NOT new.reviewers
+        OR old.updated_at_ms IS NOT new.updated_at_ms
+    BEGIN
+        INSERT INTO change_log (entity, op, repo_id, pull_request_id, pull_number, entity_id)
+        VALUES ('pull_request', 'update', new.repo_id, new.id, new.number, new.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pull_requests_change_delete
+    AFTER DELETE ON pull_requests BEGIN
+        INSERT INTO change_log (entity, op, repo_id, pull_request_id, pull_number, entity_id)
+        VALUES ('pull_request', 'delete', old.repo_id, old.id, old.number, old.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pr_review_status_change_insert
+    AFTER INSERT ON pr_review_status
+    WHEN new.status != 'pending'
+    BEGIN
+        INSERT INTO change_log (entity, op, repo_id, pull_request_id, pull_number, entity_id)
+        SELECT 'review_status', 'update', repo_id, id, number, id
+        FROM pull_requests
+        WHERE id = new.pull_request_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pr_review_status_change_update
+    AFTER UPDATE OF status ON pr_review_status
+    WHEN old.status IS NOT new.status
+    BEGIN
+        INSERT INTO change_log (entity, op, repo_id, pull_request_id, pull_number, entity_id)
+        SELECT 'review_status', 'update', repo_id, id, number, id
+        FROM pull_requests
+        WHERE id = new.pull_request_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_change_insert
+    AFTER INSERT ON ai_reviews BEGIN
+        INSERT INTO change_log (entity, op, repo_id, pull_request_id, pull_number, entity_id)
+        SELECT 'local_review', 'insert', repo_id, id, number, new.id
+        FROM pull_requests
+        WHERE id = new.pull_request_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_change_update
+    AFTER UPDATE ON ai_reviews
+    WHEN old.body IS NOT new.body
+        OR old.severity IS NOT new.severity
+        OR old.file_path IS NOT new.file_path
+        OR old.line_number IS NOT new.line_number
+        OR old.pull_request_id IS NOT new.pull_request_id
+    BEGIN
+        INSERT INTO change_log (entity, op, repo_id, pull_request_id, pull_number, entity_id)
+        SELECT 'local_review', 'update', repo_id, id, number, new.id
+        FROM pull_requests
+        WHERE id = new.pull_request_id;
+    END;
+
+    -- Reviews removed by a PR cascade are covered by the PR's own delete entry.
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_change_delete
+    AFTER DELETE ON ai_reviews BEGIN
+        INSERT INTO change_log (entity, op, repo_id, pull_request_id, pull_number, entity_id)
+        SELECT 'local_review', 'delete', repo_id, id, number, old.id
+        FROM pull_requests
+        WHERE id = old.pull_request_id;
+    END;
+    """
+)
+
+def _bump(scope_sql: str) -> str:
+    return (
+        f"INSERT INTO data_versions (scope, version) VALUES ({scope_sql}, 1) "
+        "ON CONFLICT (scope) DO UPDATE SET version = version + 1;"
+    )
+
+
+def _bump_pull(alias: str) -> str:
+    """Bump every scope a PR row feeds: all PRs, its repo and the PR itself."""
+
+    return "\n        ".join(
+        (
+            _bump("'pulls'"),
+            _bump(f"'repo:' || {alias}.repo_id"),
+            _bump(f"'pr:' || {alias}.repo_id || ':' || {alias}.number"),
+        )
+    )
+
+
+def _bump_pull_of(row: str) -> str:
+    """Bump the scopes of the PR that `row.pull_request_id` points at, if it exists."""
+
+    return "\n        ".join(
+        (
+            _bump("'pulls'"),
+            "INSERT INTO data_versions (scope, version) "
+            f"SELECT 'repo:' || repo_id, 1 FROM pull_requests WHERE id = {row}.pull_request_id "
+            "ON CONFLICT (scope) DO UPDATE SET version = version + 1;",
+            "INSERT INTO data_versions (scope, version) "
+            f"SELECT 'pr:' || repo_id || ':' || number, 1 FROM pull_requests "
+            f"WHERE id = {row}.pull_request_id "
+            "ON CONFLICT (scope) DO UPDATE SET version = version + 1;",
+        )
+    )
+
+
+# Cheap HTTP validators: every write bumps the version of each scope whose
+# responses it could change, so the API can answer `If-None-Match` with one
+# primary-key read. `instance` keeps ETags from a recreated database distinct.
+_DATA_VERSIONS = _script(
+    f"""
+    CREATE TABLE IF NOT EXISTS data_versions (
+        scope TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    ) WITHOUT ROWID;
+
+    INSERT OR IGNORE INTO data_versions (scope, version) VALUES ('instance', abs(random()));
+
+    CREATE TRIGGER IF NOT EXISTS repositories_version_insert
+    AFTER INSERT ON repositories BEGIN
+        {_bump("'repos'")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS repositories_version_update
+    AFTER UPDATE ON repositories BEGIN
+        {_bump("'repos'")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS repositories_version_delete
+    AFTER DELETE ON repositories BEGIN
+        {_bump("'repos'")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS legacy_repository_tokens_version_insert
+    AFTER INSERT ON legacy_repository_tokens BEGIN
+        {_bump("'repos'")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS legacy_repository_tokens_version_delete
+    AFTER DELETE ON legacy_repository_tokens BEGIN
+        {_bump("'repos'")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pull_requests_version_insert
+    AFTER INSERT ON pull_requests BEGIN
+        {_bump_pull("new")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pull_requests_version_update
+    AFTER UPDATE ON pull_requests BEGIN
+        {_bump_pull("old")}
+        {_bump_pull("new")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pull_requests_version_delete
+    AFTER DELETE ON pull_requests BEGIN
+        {_bump_pull("old")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pr_review_status_version_insert
+    AFTER INSERT ON pr_review_status BEGIN
+        {_bump_pull_of("new")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS pr_review_status_version_update
+    AFTER UPDATE ON pr_review_status BEGIN
+        {_bump_pull_of("new")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_version_insert
+    AFTER INSERT ON ai_reviews BEGIN
+        {_bump_pull_of("new")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_version_update
+    AFTER UPDATE ON ai_reviews BEGIN
+        {_bump_pull_of("old")}
+        {_bump_pull_of("new")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS ai_reviews_version_delete
+    AFTER DELETE ON ai_reviews BEGIN
+        {_bump_pull_of("old")}
+    END;
+    """
+)
+
+# `review_thread_comments` is keyed by a TEXT node id, so its FTS index was keyed on the
+# implicit rowid, which `VACUUM` may renumber. Rebuild the table with an INTEGER
+# PRIMARY KEY (a stable rowid alias) and key the index on it like the other FTS tables.
+_REVIEW_THREAD_COMMENT_KEYS = _script(
+    """
+    DROP TRIGGER IF EXISTS review_thread_comments_fts_insert;
+    DROP TRIGGER IF EXISTS review_thread_comments_fts_delete;
+    DROP TRIGGER IF EXISTS review_thread_comments_fts_update;
+    DROP TABLE IF EXISTS review_thread_comments_fts;
+
+    CREATE TABLE review_thread_comments_new (
+        seq INTEGER PRIMARY KEY,
+        id TEXT NOT NULL UNIQUE,
+        thread_id TEXT NOT NULL REFERENCES review_threads(id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        database_id INTEGER,
+        url TEXT,
+        body TEXT NOT NULL,
+        created_at TEXT,
+        updated_at TEXT,
+        author TEXT,
+        reply_to_id TEXT,
+        path TEXT,
+        line INTEGER,
+        original_line INTEGER,
+        commit_oid TEXT,
+        original_commit_oid TEXT
+    );
+
+    INSERT INTO review_thread_comments_new (
+        id, thread_id, position, database_id, url, body, created_at, updated_at, author,
+        reply_to_id, path, line, original_line, commit_oid, original_commit_oid
+    )
+    SELECT
+        id, thread_id, position, database_id, url, body, created_at, updated_at, author,
+        reply_to_id, path, line, original_line, commit_oid, original_commit_oid
+    FROM review_thread_comments
+    ORDER BY rowid;
+
+    DROP TABLE review_thread_comments;
+    ALTER TABLE review_thread_comments_new RENAME TO review_thread_comments;
+
+    CREATE INDEX IF NOT EXISTS idx_review_thread_comments_thread
+        ON review_thread_comments(thread_id, position);
+
+    CREATE VIRTUAL TABLE review_thread_comments_fts USING fts5(
+        body,
+        path,
+        content = 'review_thread_comments',
+        content_rowid = 'seq',
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+
+    CREATE TRIGGER review_thread_comments_fts_insert
+    AFTER INSERT ON review_thread_comments BEGIN
+        INSERT INTO review_thread_comments_fts (rowid, body, path)
+        VALUES (new.seq, new.body, new.path);
+    END;
+
+    CREATE TRIGGER review_thread_comments_fts_delete
+    AFTER DELETE ON review_thread_comments BEGIN
+        INSERT INTO review_thread_comments_fts (review_thread_comments_fts, rowid, body, path)
+        VALUES ('delete', old.seq, old.body, old.path);
+    END;
+
+    CREATE TRIGGER review_thread_comments_fts_update
+    AFTER UPDATE OF body, path ON review_thread_comments BEGIN
+        INSERT INTO review_thread_comments_fts (review_thread_comments_fts, rowid, body, path)
+        VALUES ('delete', old.seq, old.body, old.path);
+        INSERT INTO review_thread_comments_fts (rowid, body, path)
+        VALUES (new.seq, new.body, new.path);
+    END;
+
+    INSERT INTO review_thread_comments_fts (review_thread_comments_fts) VALUES ('rebuild');
+    """
+)
+
+# A row whose last write may have reached GitHub must be reconciled by marker before it
+# is sent again, even after its attempts ran out and it was re-queued from `failed`.
+_REVIEW_PUBLISH_UNCERTAIN = _script(
+    """
+    ALTER TABLE review_publish_outbox
+        ADD COLUMN uncertain INTEGER NOT NULL DEFAULT 0 CHECK (uncertain IN (0, 1));
+
+    UPDATE review_publish_outbox SET uncertain = 1 WHERE state = 'sending';
+    """
+)
+
+# Head and base commits as of the last sync, so the git mirror can tell whether its
+# `refs/pull/<n>/head` is current without a fetch.
+_PULL_REQUEST_SHAS = _script(
+    """
+    ALTER TABLE pull_requests ADD COLUMN head_sha TEXT;
+    ALTER TABLE pull_requests ADD COLUMN base_sha TEXT;
+    """
+)
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "baseline schema", _BASELINE),
+    Migration(2, "repository github_base_url", _repository_github_base_url),
+    Migration(3, "legacy repository tokens", _legacy_repository_tokens),
+    Migration(4, "file blob refs", _FILE_BLOB_REFS),
+    Migration(5, "review threads", _REVIEW_THREADS),
+    Migration(6, "review thread inbox", _REVIEW_THREAD_INBOX),
+    Migration(7, "commit history", _COMMIT_HISTORY),
+    Migration(8, "review publish outbox", _REVIEW_PUBLISH_OUTBOX),
+    Migration(9, "full-text search", _FULL_TEXT_SEARCH),
+    Migration(10, "pull request list indexes", _PULL_REQUEST_LIST_INDEXES),
+    Migration(11, "summary counters", _SUMMARY_COUNTERS),
+    Migration(12, "pull request reviewers", _PULL_REQUEST_REVIEWERS),
+    Migration(13, "epoch millisecond timestamps", _EPOCH_MS_TIMESTAMPS),
+    Migration(14, "change log", _CHANGE_LOG),
+    Migration(15, "data versions", _DATA_VERSIONS),
+    Migration(16, "review thread comment keys", _REVIEW_THREAD_COMMENT_KEYS),
+    Migration(17, "review publish uncertain deliveries", _REVIEW_PUBLISH_UNCERTAIN),
+    Migration(18, "pull request head and base shas", _PULL_REQUEST_SHAS),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate(conn: sqlite3.Connection) -> list[Migration]:
+    """Bring the schema to `LATEST_VERSION`; return the migrations that ran.
+
+    An up-to-date database costs one `PRAGMA user_version` read. Pending
+    migrations run in a single write transaction, and the version is re-read
+    under that lock so concurrent processes never apply a step twice.
+    """
+
+    if schema_version(conn) == LATEST_VERSION:
+        return []
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        current = schema_version(conn)
+        if current > LATEST_VERSION:
+            raise MigrationError(
+                f"Database schema version {current} is newer than this Squire build "
+                f"supports ({LATEST_VERSION})."
+            )
+        applied: list[Migration] = []
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {migration.version}")
+            applied.append(migration)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return applied
@@ -0,0 +1,595 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping, Sequence
+from contextlib import AbstractContextManager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+import os
+import sqlite3
+import time
+from typing import Any
+
+import httpx
+
+from . import db
+from .diff_index import get_pull_diff_index
+from .github import GitHubClient, GitHubError
+from .review_comments import (
+    build_batched_review_comments,
+    format_local_review_fallback_body,
+    format_local_review_inline_body,
+    plan_local_review_publish,
+    split_summary_comments,
+    with_prefix,
+)
+
+MAX_DELIVERY_ATTEMPTS = 5
+DEFAULT_PUBLISH_INTERVAL = 1.0
+_RETRY_BASE_SECONDS = 30.0
+_DEFAULT_RATE_LIMIT_WAIT = 60.0
+# How long a claimed row stays reserved for the drainer that is sending it.
+SEND_LEASE_SECONDS = 300.0
+
+OpenGitHub = Callable[[sqlite3.Connection, str], AbstractContextManager[GitHubClient]]
+
+
+def load_publish_interval() -> float:
+    """Seconds between GitHub write calls (`SQUIRE_PUBLISH_INTERVAL`, default 1s)."""
+
+    raw = os.getenv("SQUIRE_PUBLISH_INTERVAL")
+    if raw is None or not raw.strip():
+        return DEFAULT_PUBLISH_INTERVAL
+    try:
+        return max(float(raw), 0.0)
+    except ValueError:
+        return DEFAULT_PUBLISH_INTERVAL
+
+
+def local_review_marker(review_id: int) -> str:
+    """Suffix every published body carries; used to detect earlier deliveries."""
+
+    return f"local_review_id={review_id})"
+
+
+class WritePacer:
+    """Spaces content-creating calls, as GitHub's secondary rate limits require."""
+
+    def __init__(
+        self,
+        interval: float,
+        *,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.interval = interval
+        self._sleep = sleep
+        self._clock = clock
+        self._last: float | None = None
+
+    def wait(self) -> None:
+        if self._last is not None and self.interval > 0:
+            remaining = self._last + self.interval - self._clock()
+            if remaining > 0:
+                self._sleep(remaining)
+        self._last = self._clock()
+
+
+@dataclass(frozen=True)
+class PublishDelivery:
+    repo_full_name: str
+    number: int
+    local_review_ids: list[int]
+    delivery_kind: str
+    github_id: int | None
+    github_url: str | None
+
+
+@dataclass
+class OutboxDrainResult:
+    delivered: int = 0
+    retrying: int = 0
+    failed: int = 0
+    errors: list[str] = field(default_factory=list)
+    deliveries: list[PublishDelivery] = field(default_factory=list)
+
+
+def _mark_delivered(
+    conn: sqlite3.Connection,
+    repo_full_name: str,
+    number: int,
+    rows: Sequence[Mapping[str, Any]],
+    *,
+    delivery_kind: str,
+    created: Mapping[str, Any],
+    result: OutboxDrainResult,
+) -> None:
+    db.mark_review_publish_delivered(
+        conn,
+        [int(row["outbox_id"]) for row in rows],
+        delivery_kind=delivery_kind,
+        github_id=created.get("id"),
+        github_url=created.get("html_url"),
+    )
+    result.delivered += len(rows)
+    result.deliveries.append(
+        PublishDelivery(
+            repo_full_name=repo_full_name,
+            number=number,
+            local_review_ids=[int(row["id"]) for row in rows],
+            delivery_kind=delivery_kind,
+            github_id=created.get("id"),
+            github_url=created.get("html_url"),
+        )
+    )
+
+
+class _RateLimited(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+def _at(seconds_from_now: float) -> str:
+    moment = datetime.now(timezone.utc) + timedelta(seconds=seconds_from_now)
+    return moment.isoformat(timespec="seconds")
+
+
+def _reconcile_uncertain(
+    conn: sqlite3.Connection,
+    github: GitHubClient,
+    repo_full_name: str,
+    number: int,
+    rows: Sequence[Mapping[str, Any]],
+    result: OutboxDrainResult,
+) -> set[int]:
+    """Mark rows whose comment already exists on GitHub as delivered.
+
+    Rows left in `sending` were interrupted after the write may have reached GitHub.
+    Their marker is searched in existing PR comments before anything is re-sent.
+    """
+
+    uncertain = [row for row in rows if row["state"] == "sending"]
+    if not uncertain:
+        return set()
+
+    published: list[tuple[str, dict[str, Any]]] = [
+        ("issue", item) for item in github.list_issue_comments(repo_full_name, number)
+    ]
+    published.extend(
+        ("inline", item) for item in github.list_pull_review_comments(repo_full_name, number)
+    )
+
+    found: set[int] = set()
+    for row in uncertain:
+        marker = local_review_marker(int(row["id"]))
+        for kind, item in published:
+            if marker in str(item.get("body") or ""):
+                _mark_delivered(
+                    conn,
+                    repo_full_name,
+                    number,
+                    [row],
+                    delivery_kind=kind,
+                    created=item,
+                    result=result,
+                )
+                found.add(int(row["outbox_id"]))
+                break
+    conn.commit()
+    return found
+
+
+def _send(
+    conn: sqlite3.Connection,
+    rows: Sequence[Mapping[str, Any]],
+    pacer: WritePacer,
+    call: Callable[[], dict[str, Any]],
+    result: OutboxDrainResult,
+) -> dict[str, Any] | None:
+    """Claim `rows`, run one GitHub write, and return GitHub's response.
+
+    Returns None when another drainer already claimed a row, or when the outcome is
+    unknown (5xx, transport error); such rows stay `sending` and are reconciled
+    against GitHub before any resend. Other GitHub errors are re-raised.
+    """
+
+    claimed = db.claim_review_publish(
+        conn,
+        [
+            (int(row["outbox_id"]), str(row["state"]), row["outbox_next_attempt_at"])
+            for row in rows
+        ],
+        lease_until=_at(SEND_LEASE_SECONDS),
+    )
+    if not claimed:
+        conn.rollback()
+        return None
+    conn.commit()
+
+    outbox_ids = [int(row["outbox_id"]) for row in rows]
+    pacer.wait()
+    try:
+        return call()
+    except httpx.HTTPError as exc:
+        _record_failure(conn, rows, exc, result, uncertain=True)
+        return None
+    except GitHubError as exc:
+        if exc.status_code is None or exc.status_code >= 500:
+            # A 5xx can still mean the comment was created.
+            _record_failure(conn, rows, exc, result, uncertain=True)
+            return None
+        # A 4xx answer means GitHub rejected the write: the rows are safe to resend.
+        if exc.is_rate_limited:
+            db.reschedule_review_publish(
+                conn,
+                outbox_ids,
+                next_attempt_at=_at(exc.retry_after or _DEFAULT_RATE_LIMIT_WAIT),
+                error=str(exc),
+                count_attempt=False,
+                max_attempts=MAX_DELIVERY_ATTEMPTS,
+            )
+            conn.commit()
+            raise _RateLimited(exc.retry_after or _DEFAULT_RATE_LIMIT_WAIT) from exc
+        # Release the claim; the caller records the failure or falls back.
+        db.reschedule_review_publish(
+            conn,
+            outbox_ids,
+            next_attempt_at=None,
+            error=str(exc),
+            count_attempt=False,
+            max_attempts=MAX_DELIVERY_ATTEMPTS,
+        )
+        conn.commit()
+        raise
+
+
+def _released(row: Mapping[str, Any]) -> dict[str, Any]:
+    """`row` as `_send` left it after releasing a rejected claim."""
+
+    return {**dict(row), "state": "pending", "outbox_next_attempt_at": None}
+
+
+def _record_failure(
+    conn: sqlite3.Connection,
+    rows: Sequence[Mapping[str, Any]],
+    exc: Exception,
+    result: OutboxDrainResult,
+    *,
+    uncertain: bool = False,
+) -> None:
+    """Back off failed rows; `uncertain` rows stay `sending` and are due right away.
+
+    An uncertain row is never re-sent directly: the next drain first searches the PR
+    for its marker, which is a read-only check and safe to run immediately.
+    """
+
+    for row in rows:
+        attempts = int(row["attempts"]) + 1
+        db.reschedule_review_publish(
+            conn,
+            [int(row["outbox_id"])],
+            next_attempt_at=(
+                db.utcnow_iso()
+                if uncertain
+                else _at(_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+            ),
+            error=str(exc),
+            count_attempt=True,
+            max_attempts=MAX_DELIVERY_ATTEMPTS,
+            retry_state="sending" if uncertain else "pending",
+        )
+        if attempts >= MAX_DELIVERY_ATTEMPTS:
+            result.failed += 1
+        else:
+            result.retrying += 1
+    result.errors.append(str(exc))
+    conn.commit()
+
+
+def _deliver_single(
+    conn: sqlite3.Connection,
+    github: GitHubClient,
+    repo_full_name: str,
+    number: int,
+    plan_inline: list[tuple[Mapping[str, Any], Any]],
+    plan_fallback: list[Mapping[str, Any]],
+    *,
+    pacer: WritePacer,
+    result: OutboxDrainResult,
+    notify: Callable[[str], None],
+) -> None:
+    fallback = list(plan_fallback)
+    for item, target in plan_inline:
+        try:
+            created = _send(
+                conn,
+                [item],
+                pacer,
+                lambda: github.create_pull_review_comment(
+                    repo_full_name,
+                    number,
+                    body=with_prefix(item["prefix"], format_local_review_inline_body(item)),
+                    commit_id=target.commit_id,
+                    path=target.path,
+                    line=target.line,
+                    side=target.side,
+                ),
+                result,
+            )
+        except GitHubError as exc:
+            if exc.status_code != 422:
+                _record_failure(conn, [item], exc, result)
+                continue
+            notify("Inline publish failed validation; falling back to a PR comment.")
+            fallback.append(_released(item))
+            continue
+        if created is None:
+            continue
+
+        _mark_delivered(
+            conn,
+            repo_full_name,
+            number,
+            [item],
+            delivery_kind="inline",
+            created=created,
+            result=result,
+        )
+        conn.commit()
+        notify(
+            f"Posted GitHub inline comment id={created.get('id', '-')} "
+            f"url={created.get('html_url', '-')} "
+            f"path={target.path} line={target.line} side={target.side}"
+        )
+
+    for item in fallback:
+        try:
+            created = _send(
+                conn,
+                [item],
+                pacer,
+                lambda: github.create_issue_comment(
+                    repo_full_name,
+                    number,
+                    with_prefix(item["prefix"], format_local_review_fallback_body(item)),
+                ),
+                result,
+            )
+        except GitHubError as exc:
+            _record_failure(conn, [item], exc, result)
+            continue
+        if created is None:
+            continue
+
+        _mark_delivered(
+            conn,
+            repo_full_name,
+            number,
+            [item],
+            delivery_kind="issue",
+            created=created,
+            result=result,
+        )
+        conn.commit()
+        notify(
+            f"Posted GitHub fallback comment id={created.get('id', '-')} "
+            f"url={created.get('html_url', '-')}"
+        )
+
+
+def _deliver_batch(
+    conn: sqlite3.Connection,
+    github: GitHubClient,
+    repo_full_name: str,
+    number: int,
+    plan: Any,
+    *,
+    prefix: str,
+    pacer: WritePacer,
+    result: OutboxDrainResult,
+    notify: Callable[[str], None],
+) -> None:
+    summary_items = list(plan.fallback)
+    if plan.inline and plan.commit_id:
+        inline_rows = [item for item, _ in plan.inline]
+        created = None
+        try:
+            created = _send(
+                conn,
+                inline_rows,
+                pacer,
+                lambda: github.create_pull_review(
+                    repo_full_name,
+                    number,
+                    commit_id=plan.commit_id,
+                    body=with_prefix(prefix, f"{len(plan.inline)} inline comment(s)"),
+                    comments=build_batched_review_comments(plan),
+                ),
+                result,
+            )
+        except GitHubError as exc:
+            if exc.status_code != 422:
+                _record_failure(conn, inline_rows, exc, result)
+            else:
+                notify(
+                    "Batched review failed validation; "
+                    "folding inline items into the summary comment."
+                )
+                summary_items = [_released(item) for item in inline_rows] + summary_items
+        if created is not None:
+            _mark_delivered(
+                conn,
+                repo_full_name,
+                number,
+                inline_rows,
+                delivery_kind="review",
+                created=created,
+                result=result,
+            )
+            conn.commit()
+            notify(
+                f"Posted GitHub review id={created.get('id', '-')} "
+                f"url={created.get('html_url', '-')} inline_comments={len(inline_rows)}"
+            )
+    else:
+        summary_items = [item for item, _ in plan.inline] + summary_items
+
+    # Hundreds of leftovers can exceed GitHub's body limit, so they may need several
+    # comments; each carries its own items' markers for reconciliation.
+    for chunk_items, body in split_summary_comments(summary_items, prefix=prefix):
+        try:
+            created = _send(
+                conn,
+                chunk_items,
+                pacer,
+                lambda: github.create_issue_comment(repo_full_name, number, body),
+                result,
+            )
+        except GitHubError as exc:
+            _record_failure(conn, chunk_items, exc, result)
+            continue
+        if created is None:
+            continue
+
+        _mark_delivered(
+            conn,
+            repo_full_name,
+            number,
+            chunk_items,
+            delivery_kind="summary",
+            created=created,
+            result=result,
+        )
+        conn.commit()
+        notify(
+            f"Posted GitHub summary comment id={created.get('id', '-')} "
+            f"url={created.get('html_url', '-')} items={len(chunk_items)}"
+        )
+
+
+def _deliver_pull(
+    conn: sqlite3.Connection,
+    github: GitHubClient,
+    repo_full_name: str,
+    number: int,
+    rows: list[sqlite3.Row],
+    *,
+    pacer: WritePacer,
+    result: OutboxDrainResult,
+    notify: Callable[[str], None],
+) -> None:
+    reconciled = _reconcile_uncertain(conn, github, repo_full_name, number, rows, result)
+    pending = [row for row in rows if int(row["outbox_id"]) not in reconciled]
+    if not pending:
+        return
+
+    pull_request = github.get_pull_request(repo_full_name, number)
+    pull_files = github.list_pull_files(repo_full_name, number)
+    diff_index = get_pull_diff_index(pull_request, pull_files)
+
+    single_rows = [row for row in pending if not row["batch"]]
+    if single_rows:
+        plan = plan_local_review_publish(single_rows, diff_index)
+        _deliver_single(
+            conn,
+            github,
+            repo_full_name,
+            number,
+            plan.inline,
+            plan.fallback,
+            pacer=pacer,
+            result=result,
+            notify=notify,
+        )
+
+    batch_rows = [row for row in pending if row["batch"]]
+    for prefix, group in groupby(batch_rows, key=lambda row: str(row["prefix"])):
+        _deliver_batch(
+            conn,
+            github,
+            repo_full_name,
+            number,
+            plan_local_review_publish(list(group), diff_index),
+            prefix=prefix,
+            pacer=pacer,
+            result=result,
+            notify=notify,
+        )
+
+
+def drain_review_publish_outbox(
+    conn: sqlite3.Connection,
+    open_github: OpenGitHub,
+    *,
+    pull_request_id: int | None = None,
+    pacer: WritePacer | None = None,
+    notify: Callable[[str], None] | None = None,
+) -> OutboxDrainResult:
+    """Deliver due outbox rows, committing after every GitHub write.
+
+    Rate-limited repositories are deferred to the time GitHub asks for; other
+    errors back off exponentially until `MAX_DELIVERY_ATTEMPTS` marks a row failed.
+    """
+
+    pacer = pacer or WritePacer(load_publish_interval())
+    emit = notify or (lambda _message: None)
+    result = OutboxDrainResult()
+
+    rows = db.list_due_review_publish(
+        conn, now=db.utcnow_iso(), pull_request_id=pull_request_id
+    )
+    for repo_full_name, repo_rows in groupby(rows, key=lambda row: str(row["repo_full_name"])):
+        repo_rows = list(repo_rows)
+        try:
+            with open_github(conn, repo_full_name) as github:
+                for number, pull_rows in groupby(
+                    repo_rows, key=lambda row: int(row["pull_number"])
+                ):
+                    pull_rows = list(pull_rows)
+                    try:
+                        _deliver_pull(
+                            conn,
+                            github,
+                            repo_full_name,
+                            number,
+                            pull_rows,
+                            pacer=pacer,
+                            result=result,
+                            notify=emit,
+                        )
+                    except (GitHubError, httpx.HTTPError) as exc:
+                        if isinstance(exc, GitHubError) and exc.is_rate_limited:
+                            raise _RateLimited(
+                                exc.retry_after or _DEFAULT_RATE_LIMIT_WAIT
+                            ) from exc
+                        # Uncertain `sending` rows keep waiting for a marker check.
+                        conn.rollback()
+                        _record_failure(
+                            conn,
+                            [row for row in pull_rows if row["state"] == "pending"],
+                            exc,
+                            result,
+                        )
+        except _RateLimited as limited:
+            conn.rollback()
+            waiting = [
+                int(row["outbox_id"])
+                for row in db.list_due_review_publish(conn, now=db.utcnow_iso())
+                if row["repo_full_name"] == repo_full_name and row["state"] == "pending"
+            ]
+            db.reschedule_review_publish(
+                conn,
+                waiting,
+                next_attempt_at=_at(limited.retry_after),
+                error="GitHub rate limit reached",
+                count_attempt=False,
+                max_attempts=MAX_DELIVERY_ATTEMPTS,
+            )
+            conn.commit()
+            result.retrying += len(waiting)
+            result.errors.append(
+                f"{repo_full_name}: rate limited, retrying in {limited.retry_after:.0f}s"
+            )
+
+    return result
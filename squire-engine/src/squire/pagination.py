@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(updated_at_ms: int, row_id: int) -> str:
+    """Opaque keyset cursor for the `(updated_at_ms, id)` position of the last row."""
+
+    raw = json.dumps([updated_at_ms, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        updated_at_ms, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as exc:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from exc
+    if not isinstance(updated_at_ms, int) or not isinstance(row_id, int):
+        raise InvalidCursorError(f"Invalid cursor: {cursor}")
+    return updated_at_ms, row_id
+
+
+def split_page(rows: list[Any], limit: int | None) -> tuple[list[Any], str | None]:
+    """Trim a `limit + 1` fetch to one page and derive the next cursor, if any."""
+
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(int(last["updated_at_ms"] or 0), int(last["id"]))
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+import queue
+import sqlite3
+import threading
+
+from . import db
+from .config import Settings
+
+DEFAULT_WRITER_POOL_SIZE = 4
+DEFAULT_READER_POOL_SIZE = 8
+
+
+class ConnectionPool:
+    """Bounded LIFO pool of SQLite connections shared across request threads.
+
+    Connections are opened lazily up to `max_size`; callers beyond that wait for
+    one to be returned. A connection handed back mid-transaction is rolled back
+    so the next borrower never inherits uncommitted state or held locks.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], sqlite3.Connection],
+        *,
+        max_size: int,
+    ) -> None:
+        self._factory = factory
+        self._max_size = max_size
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire(self) -> sqlite3.Connection:
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                if self._opened < self._max_size:
+                    self._opened += 1
+                    break
+
+            # Poll so a waiter notices capacity freed by a discarded connection.
+            try:
+                return self._idle.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+        try:
+            return self._factory()
+        except BaseException:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._opened -= 1
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
+class DatabasePools:
+    """Writer and reader pools over one database file.
+
+    In WAL mode readers see the last committed snapshot without waiting on the
+    writer, so dashboard reads stay fast while a sync transaction is open.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        writer_size: int = DEFAULT_WRITER_POOL_SIZE,
+        reader_size: int = DEFAULT_READER_POOL_SIZE,
+    ) -> None:
+        self.settings = settings
+        # Run migrations (and switch to WAL) before any read-only connection opens.
+        db.connect(settings).close()
+        self.writer = ConnectionPool(
+            lambda: db.connect(settings, check_same_thread=False),
+            max_size=writer_size,
+        )
+        self.reader = ConnectionPool(
+            lambda: db.connect_reader(settings, check_same_thread=False),
+            max_size=reader_size,
+        )
+
+    def close(self) -> None:
+        self.writer.close()
+        self.reader.close()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+import pydantic_core
+
+from . import tracing
+
+try:
+    import orjson
+except ImportError:  # optional: `pip install 'squire-engine[fast]'`
+    orjson = None
+
+
+def dumps_json(content: Any) -> bytes:
+    """Compact UTF-8 JSON via orjson when installed, else pydantic-core's encoder."""
+
+    with tracing.span("serialize.json"):
+        if orjson is not None:
+            return orjson.dumps(content)
+        return pydantic_core.to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """Response for plain dicts/lists an endpoint built itself.
+
+    Returning it directly skips FastAPI's `jsonable_encoder` walk and response-model
+    validation, which dominate the cost of large GitHub payload passthroughs.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
@@ -1,14 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-import re
-from typing import Any, Literal
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any
 
-DiffSide = Literal["LEFT", "RIGHT"]
+from .diff_index import DiffSide, PullDiffIndex, get_pull_diff_index
 
-_HUNK_HEADER_PATTERN = re.compile(
-    r"^@@ -(?P<old_start>\d+)(?:,(?P<old_count>\d+))? \+(?P<new_start>\d+)(?:,(?P<new_count>\d+))? @@"
-)
+# GitHub rejects issue comment bodies longer than this many characters.
+MAX_COMMENT_LENGTH = 65536
+_SUMMARY_SEPARATOR = "\n\n---\n\n"
+_TRUNCATED_SUFFIX = "\n\n…(truncated)"
 
 
 @dataclass(frozen=True)
@@ -19,49 +20,22 @@ class InlineCommentTarget:
     side: DiffSide
 
 
-def _match_line_in_patch(patch: str, target_line: int) -> tuple[int, DiffSide] | None:
-    right_match: tuple[int, DiffSide] | None = None
-    left_match: tuple[int, DiffSide] | None = None
-    old_line: int | None = None
-    new_line: int | None = None
-
-    for raw_line in patch.splitlines():
-        if raw_line.startswith("@@"):
-            match = _HUNK_HEADER_PATTERN.match(raw_line)
-            if match is None:
-                old_line = None
-                new_line = None
-                continue
-            old_line = int(match.group("old_start"))
-            new_line = int(match.group("new_start"))
-            continue
-
-        if old_line is None or new_line is None:
-            continue
-        if raw_line.startswith("\\"):
-            continue
-
-        prefix = raw_line[:1]
-        if prefix == " ":
-            if right_match is None and new_line == target_line:
-                right_match = (new_line, "RIGHT")
-            old_line += 1
-            new_line += 1
-            continue
-
-        if prefix == "+":
-            if right_match is None and new_line == target_line:
-                right_match = (new_line, "RIGHT")
-            new_line += 1
-            continue
-
-        if prefix == "-":
-            if left_match is None and old_line == target_line:
-                left_match = (old_line, "LEFT")
-            old_line += 1
-            continue
-
-    return right_match or left_match
+def resolve_inline_comment_target_in_index(
+    diff_index: PullDiffIndex,
+    *,
+    file_path: str,
+    line_number: int,
+) -> InlineCommentTarget | None:
+    matched_line = diff_index.match_line(file_path, line_number)
+    if matched_line is None:
+        return None
+
+    return InlineCommentTarget(
+        commit_id=diff_index.head_sha,
+        path=file_path,
+        line=matched_line.line,
+        side=matched_line.side,
+    )
 
 
 def resolve_inline_comment_target(
@@ -74,31 +48,128 @@ def resolve_inline_comment_target(
     if line_number <= 0:
         return None
 
-    commit_id = str((pull_request.get("head") or {}).get("sha") or "").strip()
-    if not commit_id:
+    diff_index = get_pull_diff_index(pull_request, pull_files)
+    if diff_index is None:
         return None
 
-    target_file: dict[str, Any] | None = None
-    for file_data in pull_files:
-        if file_data.get("filename") == file_path:
-            target_file = file_data
-            break
+    return resolve_inline_comment_target_in_index(
+        diff_index,
+        file_path=file_path,
+        line_number=line_number,
+    )
 
-    if target_file is None:
-        return None
 
-    patch = target_file.get("patch")
-    if not isinstance(patch, str) or not patch.strip():
-        return None
+def format_local_review_inline_body(item: Mapping[str, Any]) -> str:
+    return (
+        f"[{item['severity']}] {item['body']}\n\n"
+        f"(agent={item['agent']}, local_review_id={item['id']})"
+    )
 
-    matched_line = _match_line_in_patch(patch, line_number)
-    if matched_line is None:
-        return None
 
-    line, side = matched_line
-    return InlineCommentTarget(
-        commit_id=commit_id,
-        path=file_path,
-        line=line,
-        side=side,
+def format_local_review_fallback_body(item: Mapping[str, Any]) -> str:
+    target = "PR"
+    if item["file_path"]:
+        target = f"{item['file_path']}:{item['line_number'] or '-'}"
+    return (
+        f"[{item['severity']}] {target}\n\n"
+        f"{item['body']}\n\n"
+        f"(agent={item['agent']}, local_review_id={item['id']})"
     )
+
+
+def with_prefix(prefix: str, body: str) -> str:
+    return f"{prefix}\n\n{body}" if prefix else body
+
+
+@dataclass
+class LocalReviewPublishPlan:
+    """Local reviews split into diff-anchored inline comments and PR-level leftovers."""
+
+    commit_id: str | None
+    inline: list[tuple[Mapping[str, Any], InlineCommentTarget]] = field(default_factory=list)
+    fallback: list[Mapping[str, Any]] = field(default_factory=list)
+
+
+def plan_local_review_publish(
+    items: Sequence[Mapping[str, Any]],
+    diff_index: PullDiffIndex | None,
+) -> LocalReviewPublishPlan:
+    plan = LocalReviewPublishPlan(
+        commit_id=diff_index.head_sha if diff_index is not None else None
+    )
+    for item in items:
+        file_path = item["file_path"]
+        line_number = item["line_number"]
+        target = None
+        if diff_index is not None and file_path and line_number is not None:
+            target = resolve_inline_comment_target_in_index(
+                diff_index,
+                file_path=str(file_path),
+                line_number=int(line_number),
+            )
+        if target is None:
+            plan.fallback.append(item)
+        else:
+            plan.inline.append((item, target))
+    return plan
+
+
+def build_batched_review_comments(
+    plan: LocalReviewPublishPlan,
+) -> list[dict[str, Any]]:
+    """Inline entries for one `POST /pulls/{n}/reviews` request."""
+
+    return [
+        {
+            "path": target.path,
+            "line": target.line,
+            "side": target.side,
+            "body": format_local_review_inline_body(item),
+        }
+        for item, target in plan.inline
+    ]
+
+
+def _fit_summary_section(item: Mapping[str, Any], limit: int) -> str:
+    """Fallback body of `item`, with its review text cut so the section fits `limit`."""
+
+    section = format_local_review_fallback_body(item)
+    overflow = len(section) - limit
+    if overflow <= 0:
+        return section
+    body = str(item["body"])
+    keep = max(len(body) - overflow - len(_TRUNCATED_SUFFIX), 0)
+    return format_local_review_fallback_body(
+        {**item, "body": body[:keep] + _TRUNCATED_SUFFIX}
+    )
+
+
+def split_summary_comments(
+    items: Sequence[Mapping[str, Any]],
+    *,
+    prefix: str,
+    max_length: int = MAX_COMMENT_LENGTH,
+) -> list[tuple[list[Mapping[str, Any]], str]]:
+    """Pack PR-level items into as few issue comments as fit GitHub's body limit.
+
+    Returns `(items, body)` pairs in order. Every item lands in exactly one body,
+    whole with its `local_review_id` marker; only an item too large for a comment
+    of its own has its review text truncated.
+    """
+
+    header = len(with_prefix(prefix, ""))
+    chunks: list[tuple[list[Mapping[str, Any]], list[str]]] = []
+    length = 0
+    for item in items:
+        section = _fit_summary_section(item, max_length - header)
+        if chunks and length + len(_SUMMARY_SEPARATOR) + len(section) <= max_length:
+            chunks[-1][0].append(item)
+            chunks[-1][1].append(section)
+            length += len(_SUMMARY_SEPARATOR) + len(section)
+        else:
+            chunks.append(([item], [section]))
+            length = header + len(section)
+    return [
+        (chunk_items, with_prefix(prefix, _SUMMARY_SEPARATOR.join(sections)))
+        for chunk_items, sections in chunks
+    ]
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import json
+from typing import Any
+
+REVIEW_IMPORT_FORMATS = ("auto", "ndjson", "sarif")
+_SEVERITIES = frozenset({"info", "warning", "error"})
+_SARIF_LEVELS = {"error": "error", "warning": "warning", "note": "info", "none": "info"}
+
+
+class ReviewImportError(ValueError):
+    """Raised when an import payload cannot be read at all."""
+
+
+@dataclass
+class ReviewImportBatch:
+    reviews: list[dict[str, Any]] = field(default_factory=list)
+    errors: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return len(self.reviews) + len(self.errors)
+
+
+def _validate_review(item: Any, *, default_agent: str) -> dict[str, Any]:
+    if not isinstance(item, dict):
+        raise ValueError("expected a JSON object")
+
+    body = item.get("body")
+    if not isinstance(body, str) or not body.strip():
+        raise ValueError("`body` must be a non-empty string")
+
+    severity = item.get("severity", "info")
+    if severity not in _SEVERITIES:
+        raise ValueError("`severity` must be one of info, warning, error")
+
+    file_path = item.get("file_path", item.get("path"))
+    if file_path is not None and (not isinstance(file_path, str) or not file_path.strip()):
+        raise ValueError("`file_path` must be a non-empty string")
+
+    line_number = item.get("line_number", item.get("line"))
+    if line_number is not None and (
+        isinstance(line_number, bool) or not isinstance(line_number, int) or line_number < 1
+    ):
+        raise ValueError("`line_number` must be a positive integer")
+
+    agent = item.get("agent", default_agent)
+    if not isinstance(agent, str) or not agent.strip():
+        raise ValueError("`agent` must be a non-empty string")
+
+    return {
+        "file_path": file_path.strip() if file_path else None,
+        "line_number": line_number,
+        "severity": severity,
+        "body": body,
+        "agent": agent.strip(),
+    }
+
+
+def parse_ndjson_reviews(text: str, *, default_agent: str) -> ReviewImportBatch:
+    """One review object per line; errors are keyed by 1-based line number."""
+
+    batch = ReviewImportBatch()
+    for index, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            batch.reviews.append(_validate_review(json.loads(line), default_agent=default_agent))
+        except ValueError as exc:
+            batch.errors.append({"index": index, "error": str(exc)})
+    return batch
+
+
+def _sarif_object(value: Any, name: str) -> dict[str, Any]:
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise ValueError(f"`{name}` must be an object")
+    return value
+
+
+def _sarif_result_to_review(result: Any, *, agent: str) -> dict[str, Any]:
+    if not isinstance(result, dict):
+        raise ValueError("expected a SARIF result object")
+
+    message = result.get("message")
+    text = (message.get("text") or message.get("markdown")) if isinstance(message, dict) else None
+    rule_id = result.get("ruleId")
+    if isinstance(text, str) and isinstance(rule_id, str) and rule_id:
+        text = f"[{rule_id}] {text}"
+
+    level = result.get("level", "warning")
+    if not isinstance(level, str) or level not in _SARIF_LEVELS:
+        raise ValueError("`level` must be one of error, warning, note, none")
+
+    item: dict[str, Any] = {"body": text, "severity": _SARIF_LEVELS[level], "agent": agent}
+    locations = result.get("locations") or []
+    if not isinstance(locations, list):
+        raise ValueError("`locations` must be an array")
+    if locations:
+        location = _sarif_object(locations[0], "locations[0]")
+        physical = _sarif_object(location.get("physicalLocation"), "physicalLocation")
+        artifact = _sarif_object(physical.get("artifactLocation"), "artifactLocation")
+        region = _sarif_object(physical.get("region"), "region")
+        item["file_path"] = artifact.get("uri")
+        item["line_number"] = region.get("startLine")
+    return _validate_review(item, default_agent=agent)
+
+
+def parse_sarif_reviews(document: Any, *, default_agent: str) -> ReviewImportBatch:
+    """SARIF 2.1 results; errors are keyed by 1-based position across all runs."""
+
+    if not isinstance(document, dict) or not isinstance(document.get("runs"), list):
+        raise ReviewImportError("SARIF log must be an object with a `runs` array.")
+
+    batch = ReviewImportBatch()
+    index = 0
+    for run in document["runs"]:
+        run = run if isinstance(run, dict) else {}
+        tool = run.get("tool")
+        driver = tool.get("driver") if isinstance(tool, dict) else None
+        name = driver.get("name") if isinstance(driver, dict) else None
+        agent = name if isinstance(name, str) and name.strip() else default_agent
+        results = run.get("results")
+        for result in results if isinstance(results, list) else []:
+            index += 1
+            try:
+                batch.reviews.append(_sarif_result_to_review(result, agent=agent))
+            except ValueError as exc:
+                batch.errors.append({"index": index, "error": str(exc)})
+    return batch
+
+
+def parse_review_import(
+    text: str,
+    *,
+    import_format: str = "auto",
+    default_agent: str = "codex",
+) -> ReviewImportBatch:
+    if import_format not in REVIEW_IMPORT_FORMATS:
+        raise ReviewImportError(f"Unsupported import format: {import_format}")
+
+    if import_format == "ndjson":
+        return parse_ndjson_reviews(text, default_agent=default_agent)
+
+    # A SARIF log is one JSON document; NDJSON with several lines never parses whole.
+    try:
+        document = json.loads(text)
+    except ValueError:
+        if import_format == "sarif":
+            raise ReviewImportError("SARIF log is not valid JSON.") from None
+        return parse_ndjson_reviews(text, default_agent=default_agent)
+
+    if import_format == "sarif" or (isinstance(document, dict) and "runs" in document):
+        return parse_sarif_reviews(document, default_agent=default_agent)
+    return parse_ndjson_reviews(text, default_agent=default_agent)
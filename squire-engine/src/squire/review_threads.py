@@ -1,17 +1,10 @@
 from __future__ import annotations
 
-from datetime import datetime
+from collections.abc import Mapping
+import re
 from typing import Any
 
-
-def parse_iso_datetime(value: str | None) -> datetime | None:
-    if not value:
-        return None
-    normalized = value.replace("Z", "+00:00")
-    try:
-        return datetime.fromisoformat(normalized)
-    except ValueError:
-        return None
+_MENTION_PATTERN = re.compile(r"(?<![\w/@`])@([A-Za-z0-9](?:[A-Za-z0-9-]{0,38}))\b(?!/)")
 
 
 def _as_int(value: Any) -> int | None:
@@ -101,37 +94,83 @@ def normalize_review_thread(
     }
 
 
-def filter_review_threads(
-    threads: list[dict[str, Any]],
-    *,
-    author: str | None = None,
-    unresolved_only: bool = False,
-    file_path: str | None = None,
-    since_timestamp: datetime | None = None,
-) -> list[dict[str, Any]]:
-    filtered: list[dict[str, Any]] = []
-    normalized_author = author.casefold() if author else None
-
-    for thread in threads:
-        if unresolved_only and thread["is_resolved"]:
-            continue
-
-        if file_path and thread["path"] != file_path:
-            continue
-
-        if normalized_author:
-            root_author = thread.get("root_author")
-            if not isinstance(root_author, str) or root_author.casefold() != normalized_author:
-                continue
-
-        if since_timestamp is not None:
-            updated_at = parse_iso_datetime(thread.get("updated_at"))
-            if updated_at is None or updated_at < since_timestamp:
-                continue
-
-        filtered.append(thread)
-
-    return filtered
+def thread_version(thread: dict[str, Any]) -> tuple[Any, ...]:
+    """Fields whose change means a stored thread must be rewritten."""
+
+    return (
+        thread.get("updated_at"),
+        1 if thread["is_resolved"] else 0,
+        1 if thread["is_outdated"] else 0,
+        int(thread.get("comment_count") or 0),
+    )
+
+
+def extract_thread_mentions(thread: dict[str, Any]) -> list[str]:
+    """Logins `@mentioned` in any comment of the thread, without team mentions."""
+
+    mentions: dict[str, str] = {}
+    for comment in thread.get("comments") or []:
+        for login in _MENTION_PATTERN.findall(str(comment.get("body") or "")):
+            mentions.setdefault(login.casefold(), login)
+    return sorted(mentions.values(), key=str.casefold)
+
+
+def review_thread_comment_from_row(row: Mapping[str, Any]) -> dict[str, Any]:
+    return {
+        "id": str(row["id"]),
+        "database_id": row["database_id"],
+        "url": row["url"],
+        "body": str(row["body"] or ""),
+        "created_at": str(row["created_at"] or ""),
+        "updated_at": str(row["updated_at"] or ""),
+        "author": row["author"],
+        "reply_to_id": row["reply_to_id"],
+        "path": row["path"],
+        "line": row["line"],
+        "original_line": row["original_line"],
+        "commit_oid": row["commit_oid"],
+        "original_commit_oid": row["original_commit_oid"],
+    }
+
+
+def review_thread_from_row(
+    row: Mapping[str, Any],
+    comment_rows: list[Mapping[str, Any]],
+) -> dict[str, Any]:
+    return {
+        "id": str(row["id"]),
+        "is_resolved": bool(row["is_resolved"]),
+        "is_outdated": bool(row["is_outdated"]),
+        "path": row["path"],
+        "line": row["line"],
+        "original_line": row["original_line"],
+        "head_ref_oid": row["head_ref_oid"],
+        "comment_count": int(row["comment_count"]),
+        "reply_count": int(row["reply_count"]),
+        "updated_at": row["updated_at"],
+        "root_comment_id": row["root_comment_id"],
+        "root_author": row["root_author"],
+        "comments": [review_thread_comment_from_row(item) for item in comment_rows],
+    }
+
+
+def inbox_item_from_row(row: Mapping[str, Any]) -> dict[str, Any]:
+    item = review_thread_from_row(row, [])
+    del item["comments"]
+    return {
+        "repo": str(row["repo_full_name"]),
+        "number": int(row["pull_number"]),
+        "reason": str(row["reason"]),
+        **item,
+    }
+
+
+def format_inbox_item(item: dict[str, Any]) -> str:
+    return (
+        f"{item['repo']}#{item['number']} {format_thread_location(item)} "
+        f"reason={item['reason']} replies={item['reply_count']} "
+        f"updated_at={item.get('updated_at') or '-'} thread_id={item['id']}"
+    )
 
 
 def format_thread_location(thread: dict[str, Any]) -> str:
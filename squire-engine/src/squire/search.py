@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Any
+
+from . import db
+
+SEARCH_KINDS = ("pull_request", "local_review", "thread_comment")
+
+
+def build_match_query(text: str) -> str:
+    """Turn free text into an FTS5 query that matches every term.
+
+    Each whitespace-separated term is quoted so punctuation such as `-`, `:` or
+    `/` in branch names is matched literally instead of parsed as FTS syntax.
+    A trailing `*` is kept as a prefix search.
+    """
+
+    terms: list[str] = []
+    for raw in text.split():
+        prefix = raw.endswith("*") and len(raw) > 1
+        term = raw[:-1] if prefix else raw
+        term = term.replace('"', '""')
+        if not term.strip('"'):
+            continue
+        terms.append(f'"{term}"*' if prefix else f'"{term}"')
+    return " ".join(terms)
+
+
+def _pull_request_hit(row: sqlite3.Row) -> dict[str, Any]:
+    return {
+        "kind": "pull_request",
+        "repo": row["repo_full_name"],
+        "number": row["number"],
+        "title": row["title"],
+        "state": row["state"],
+        "snippet": row["snippet"],
+        "rank": row["rank"],
+    }
+
+
+def _local_review_hit(row: sqlite3.Row) -> dict[str, Any]:
+    return {
+        "kind": "local_review",
+        "repo": row["repo_full_name"],
+        "number": row["number"],
+        "title": row["title"],
+        "state": row["state"],
+        "snippet": row["snippet"],
+        "rank": row["rank"],
+        "review_id": row["review_id"],
+        "file_path": row["file_path"],
+        "line_number": row["line_number"],
+        "severity": row["severity"],
+    }
+
+
+def _thread_comment_hit(row: sqlite3.Row) -> dict[str, Any]:
+    return {
+        "kind": "thread_comment",
+        "repo": row["repo_full_name"],
+        "number": row["number"],
+        "title": row["title"],
+        "state": row["state"],
+        "snippet": row["snippet"],
+        "rank": row["rank"],
+        "thread_id": row["thread_id"],
+        "comment_id": row["comment_id"],
+        "author": row["author"],
+        "path": row["path"],
+        "line": row["line"],
+        "url": row["url"],
+    }
+
+
+def search(
+    conn: sqlite3.Connection,
+    query: str,
+    *,
+    repo_full_name: str | None = None,
+    state: str = "all",
+    kinds: tuple[str, ...] = SEARCH_KINDS,
+    limit: int = 50,
+) -> list[dict[str, Any]]:
+    """Search PRs, local reviews and thread comments, best matches first.
+
+    bm25 scores come from separate indexes, so the merged order is approximate
+    across kinds; within a kind it is exact.
+    """
+
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    sources = {
+        "pull_request": (db.search_pull_requests, _pull_request_hit),
+        "local_review": (db.search_ai_reviews, _local_review_hit),
+        "thread_comment": (db.search_review_thread_comments, _thread_comment_hit),
+    }
+    hits: list[dict[str, Any]] = []
+    for kind in dict.fromkeys(kinds):
+        fetch, to_hit = sources[kind]
+        rows = fetch(
+            conn,
+            match=match,
+            repo_full_name=repo_full_name,
+            state=state,
+            limit=limit,
+        )
+        hits.extend(to_hit(row) for row in rows)
+
+    hits.sort(key=lambda hit: hit["rank"])
+    return hits[:limit]
+
+
+def format_search_hit(hit: dict[str, Any]) -> str:
+    location = f"{hit['repo']}#{hit['number']}"
+    if hit["kind"] == "local_review" and hit.get("file_path"):
+        location += f" {hit['file_path']}"
+        if hit.get("line_number"):
+            location += f":{hit['line_number']}"
+    elif hit["kind"] == "thread_comment" and hit.get("path"):
+        location += f" {hit['path']}"
+        if hit.get("line"):
+            location += f":{hit['line']}"
+    snippet = " ".join((hit.get("snippet") or "").split())
+    return f"[{hit['kind']}] {location} {hit.get('state') or '-'}\n    {snippet}"
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+PULL_REQUEST_STATES = ("open", "closed", "merged")
+REVIEW_STATUSES = ("pending", "in-progress", "done")
+
+
+def build_summary(rows: Iterable[Mapping[str, Any]]) -> dict[str, Any]:
+    """Fold `(repo, state, review_status, count)` rows into dashboard totals."""
+
+    repos: dict[str, dict[str, Any]] = {}
+    total = 0
+    for row in rows:
+        repo = str(row["repo_full_name"])
+        count = int(row["pull_count"])
+        entry = repos.setdefault(
+            repo,
+            {
+                "repo": repo,
+                "total": 0,
+                "by_state": dict.fromkeys(PULL_REQUEST_STATES, 0),
+                "by_review_status": dict.fromkeys(REVIEW_STATUSES, 0),
+                "counts": [],
+            },
+        )
+        entry["total"] += count
+        entry["by_state"][row["state"]] = entry["by_state"].get(row["state"], 0) + count
+        entry["by_review_status"][row["review_status"]] = (
+            entry["by_review_status"].get(row["review_status"], 0) + count
+        )
+        entry["counts"].append(
+            {
+                "state": row["state"],
+                "review_status": row["review_status"],
+                "count": count,
+            }
+        )
+        total += count
+
+    return {"total": total, "repos": list(repos.values())}
+
+
+def format_summary(summary: dict[str, Any]) -> list[str]:
+    lines: list[str] = []
+    for entry in summary["repos"]:
+        states = " ".join(f"{state}={count}" for state, count in entry["by_state"].items())
+        statuses = " ".join(
+            f"{status}={count}" for status, count in entry["by_review_status"].items()
+        )
+        lines.append(f"{entry['repo']} total={entry['total']} {states} [review: {statuses}]")
+    lines.append(f"total={summary['total']}")
+    return lines
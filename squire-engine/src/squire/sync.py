@@ -1,29 +1,52 @@
 from __future__ import annotations
 
-from datetime import datetime
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+import functools
 import json
 import re
 import sqlite3
-from typing import Any
+import time
+from typing import Any, Concatenate
 
-from . import db
+from . import db, metrics
+from .changes import load_change_log_retention_days
+from .commits import commit_from_row, looks_like_sha_prefix, normalize_commit
 from .github import GitHubClient
+from .review_threads import review_thread_from_row, thread_version
+from .timestamps import to_epoch_ms
 
 REPO_FULL_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+$")
 
 
-def validate_repo_full_name(repo_full_name: str) -> bool:
-    return bool(REPO_FULL_NAME_PATTERN.match(repo_full_name))
+def _tracked_sync[**P, R](
+    kind: str,
+) -> Callable[
+    [Callable[Concatenate[sqlite3.Connection, P], R]],
+    Callable[Concatenate[sqlite3.Connection, P], R],
+]:
+    """Record duration and rows written (`conn.total_changes`) of a sync function."""
+
+    def decorate(
+        func: Callable[Concatenate[sqlite3.Connection, P], R],
+    ) -> Callable[Concatenate[sqlite3.Connection, P], R]:
+        @functools.wraps(func)
+        def wrapper(conn: sqlite3.Connection, *args: P.args, **kwargs: P.kwargs) -> R:
+            changes_before = conn.total_changes
+            started = time.perf_counter()
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                metrics.SYNC_DURATION.labels(kind).observe(time.perf_counter() - started)
+                metrics.SYNC_ROWS_CHANGED.labels(kind).inc(conn.total_changes - changes_before)
 
+        return wrapper
 
-def _parse_iso_datetime(value: str | None) -> datetime | None:
-    if not value:
-        return None
-    normalized = value.replace("Z", "+00:00")
-    try:
-        return datetime.fromisoformat(normalized)
-    except ValueError:
-        return None
+    return decorate
+
+
+def validate_repo_full_name(repo_full_name: str) -> bool:
+    return bool(REPO_FULL_NAME_PATTERN.match(repo_full_name))
 
 
 def _normalize_pr_state(pr: dict[str, object]) -> str:
@@ -64,7 +87,7 @@ def upsert_pull_request_from_github(
     state = _normalize_pr_state(detail)
     reviewers = _extract_reviewers(detail)
 
-    return db.upsert_pull_request(
+    pull_request_id = db.upsert_pull_request(
         conn,
         repo_id=repo_id,
         number=int(detail["number"]),
@@ -79,20 +102,36 @@ def upsert_pull_request_from_github(
         created_at=str(detail.get("created_at") or sync_timestamp),
         updated_at=str(detail.get("updated_at") or sync_timestamp),
         synced_at=sync_timestamp,
+        head_sha=(detail.get("head") or {}).get("sha") or None,
+        base_sha=(detail.get("base") or {}).get("sha") or None,
+    )
+    db.replace_pull_request_reviewers(
+        conn,
+        pull_request_id=pull_request_id,
+        reviewers=reviewers,
+        updated_at=sync_timestamp,
     )
+    return pull_request_id
 
 
+@_tracked_sync("repository")
 def sync_repository(
     conn: sqlite3.Connection,
     github: GitHubClient,
     repo_full_name: str,
     *,
     full_sync: bool = False,
+    on_progress: Callable[[int, int], None] | None = None,
 ) -> int:
+    """Fetch changed PRs into the local DB; return how many were upserted.
+
+    `on_progress(done, total)` is called once the PR list is known and after
+    every upserted PR.
+    """
+
     sync_started_at = db.utcnow_iso()
     existing_repo = db.get_repository(conn, repo_full_name)
-    last_synced_at = existing_repo["last_synced_at"] if existing_repo else None
-    cutoff = _parse_iso_datetime(last_synced_at)
+    cutoff = existing_repo["last_synced_at_ms"] if existing_repo else None
 
     repo_id, _ = db.upsert_repository(conn, repo_full_name)
     pulls: list[dict[str, object]] = []
@@ -117,7 +156,7 @@ def sync_repository(
 
             should_stop = False
             for pull in page_items:
-                pull_updated_at = _parse_iso_datetime(str(pull.get("updated_at") or ""))
+                pull_updated_at = to_epoch_ms(str(pull.get("updated_at") or ""))
                 if pull_updated_at is not None and pull_updated_at < cutoff:
                     should_stop = True
                     break
@@ -128,7 +167,9 @@ def sync_repository(
 
             page += 1
 
-    for pull in pulls:
+    if on_progress is not None:
+        on_progress(0, len(pulls))
+    for done, pull in enumerate(pulls, start=1):
         number = int(pull["number"])
         detail = github.get_pull_request(repo_full_name, number)
         upsert_pull_request_from_github(
@@ -138,7 +179,268 @@ def sync_repository(
             synced_at=sync_started_at,
             repo_id=repo_id,
         )
+        if on_progress is not None:
+            on_progress(done, len(pulls))
 
     # Use sync start timestamp as the next incremental watermark.
     db.touch_repository_synced_at(conn, repo_id, synced_at=sync_started_at)
+    retention_days = load_change_log_retention_days()
+    if retention_days > 0:
+        db.prune_change_log(conn, retention_days=retention_days)
     return len(pulls)
+
+
+@_tracked_sync("review_threads")
+def sync_review_threads(
+    conn: sqlite3.Connection,
+    github: GitHubClient,
+    repo_full_name: str,
+    *,
+    repo_id: int,
+    number: int,
+    force: bool = False,
+) -> bool:
+    """Refresh stored review threads of one PR; return whether GraphQL threads were fetched.
+
+    A small activity probe is compared with the stored PR `updated_at` and head; the
+    full thread listing is fetched only when either moved. Within a refresh, only
+    threads whose latest comment or resolution state changed are rewritten.
+    """
+
+    activity = github.get_pull_request_activity(repo_full_name, number)
+    stored = db.get_review_thread_sync(conn, repo_id=repo_id, pull_number=number)
+    if (
+        not force
+        and stored is not None
+        and activity.get("updated_at")
+        and stored["pr_updated_at"] == activity.get("updated_at")
+        and stored["head_ref_oid"] == activity.get("head_ref_oid")
+    ):
+        return False
+
+    synced_at = db.utcnow_iso()
+    payload = github.list_pull_review_threads(repo_full_name, number)
+    existing = db.get_review_thread_versions(conn, repo_id=repo_id, pull_number=number)
+
+    seen: set[str] = set()
+    for thread in payload.get("threads") or []:
+        thread_id = str(thread.get("id") or "")
+        if not thread_id:
+            continue
+        seen.add(thread_id)
+        if existing.get(thread_id) == thread_version(thread):
+            continue
+        db.upsert_review_thread(
+            conn,
+            repo_id=repo_id,
+            pull_number=number,
+            thread=thread,
+            synced_at=synced_at,
+        )
+
+    db.delete_review_threads(conn, sorted(set(existing) - seen))
+    db.update_review_threads_head_ref(
+        conn,
+        repo_id=repo_id,
+        pull_number=number,
+        head_ref_oid=payload.get("head_ref_oid") or activity.get("head_ref_oid"),
+    )
+    db.upsert_review_thread_sync(
+        conn,
+        repo_id=repo_id,
+        pull_number=number,
+        pr_updated_at=activity.get("updated_at"),
+        head_ref_oid=payload.get("head_ref_oid") or activity.get("head_ref_oid"),
+        viewer_login=payload.get("viewer_login") or activity.get("viewer_login"),
+        synced_at=synced_at,
+    )
+    return True
+
+
+@_tracked_sync("commits")
+def sync_pull_request_commits(
+    conn: sqlite3.Connection,
+    github: GitHubClient,
+    repo_full_name: str,
+    *,
+    repo_id: int,
+    number: int,
+    head_sha: str | None = None,
+    force: bool = False,
+) -> bool:
+    """Refresh the stored commit list of one PR; return whether GitHub was asked for commits.
+
+    Nothing is fetched while the head SHA is unchanged. When the new head descends
+    from the stored one, only the new commits are pulled through the compare API;
+    force-pushes and first loads re-list the PR commits.
+    """
+
+    if head_sha is None:
+        activity = github.get_pull_request_activity(repo_full_name, number)
+        head_sha = str(activity.get("head_ref_oid") or "") or None
+    stored = db.get_pull_request_commit_sync(conn, repo_id=repo_id, pull_number=number)
+    if not force and stored is not None and head_sha and stored["head_sha"] == head_sha:
+        return False
+
+    synced_at = db.utcnow_iso()
+    appended: list[dict[str, Any]] | None = None
+    if not force and stored is not None and head_sha:
+        comparison = github.compare_commits(repo_full_name, str(stored["head_sha"]), head_sha)
+        new_commits = [normalize_commit(item) for item in comparison.get("commits") or []]
+        if comparison.get("status") == "ahead" and len(new_commits) == int(
+            comparison.get("total_commits") or 0
+        ):
+            appended = new_commits
+
+    if appended is not None:
+        db.upsert_commits(conn, repo_id=repo_id, commits=appended)
+        db.append_pull_request_commits(
+            conn,
+            repo_id=repo_id,
+            pull_number=number,
+            shas=[commit["sha"] for commit in appended],
+        )
+    else:
+        listed = [
+            normalize_commit(item)
+            for item in github.list_pull_commits(repo_full_name, number)
+        ]
+        db.upsert_commits(conn, repo_id=repo_id, commits=listed)
+        db.replace_pull_request_commits(
+            conn,
+            repo_id=repo_id,
+            pull_number=number,
+            shas=[commit["sha"] for commit in listed if commit["sha"]],
+        )
+        if listed and not head_sha:
+            head_sha = listed[-1]["sha"]
+
+    if head_sha:
+        db.upsert_pull_request_commit_sync(
+            conn,
+            repo_id=repo_id,
+            pull_number=number,
+            head_sha=head_sha,
+            synced_at=synced_at,
+        )
+    return True
+
+
+def resolve_commit(
+    conn: sqlite3.Connection,
+    github: GitHubClient,
+    repo_full_name: str,
+    *,
+    repo_id: int,
+    ref: str,
+) -> dict[str, Any]:
+    """Look a commit up by SHA (or unique SHA prefix) locally, else fetch and store it.
+
+    Branch names and other symbolic refs always go to GitHub, since they move.
+    """
+
+    if looks_like_sha_prefix(ref):
+        matches = db.find_commits(conn, repo_id=repo_id, sha_prefix=ref)
+        if len(matches) == 1:
+            return commit_from_row(matches[0])
+
+    commit = normalize_commit(github.get_commit(repo_full_name, ref))
+    if commit["sha"]:
+        db.upsert_commits(conn, repo_id=repo_id, commits=[commit])
+    return commit
+
+
+def load_pull_request_commits(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    number: int,
+    since_commit: dict[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    """Return stored PR commits in order, optionally only those after `since_commit`.
+
+    A commit that belongs to the PR bounds the range by position; any other commit
+    falls back to its committer timestamp.
+    """
+
+    after_position: int | None = None
+    committed_since: str | None = None
+    if since_commit is not None:
+        after_position = db.get_pull_request_commit_position(
+            conn, repo_id=repo_id, pull_number=number, sha=since_commit["sha"]
+        )
+        if after_position is None:
+            committed_since = since_commit.get("committed_at") or ""
+
+    rows = db.list_pull_request_commits(
+        conn,
+        repo_id=repo_id,
+        pull_number=number,
+        after_position=after_position,
+        committed_since=committed_since,
+    )
+    return [commit_from_row(row) for row in rows]
+
+
+def load_review_threads(
+    conn: sqlite3.Connection,
+    *,
+    repo_id: int,
+    number: int,
+    author: str | None = None,
+    unresolved_only: bool = False,
+    file_path: str | None = None,
+    updated_since_ms: int | None = None,
+) -> list[dict[str, Any]]:
+    rows = db.list_review_threads(
+        conn,
+        repo_id=repo_id,
+        pull_number=number,
+        author=author,
+        unresolved_only=unresolved_only,
+        file_path=file_path,
+        updated_since_ms=updated_since_ms,
+    )
+    comments = db.list_review_thread_comments(conn, [str(row["id"]) for row in rows])
+    return [review_thread_from_row(row, comments[str(row["id"])]) for row in rows]
+
+
+@_tracked_sync("thread_refresh")
+def refresh_unresolved_review_threads(
+    conn: sqlite3.Connection,
+    open_github: Callable[[sqlite3.Connection, str], AbstractContextManager[GitHubClient]],
+    *,
+    on_error: Callable[[str, Exception], None] | None = None,
+) -> int:
+    """Re-probe every PR that can feed the inbox; return how many were refetched.
+
+    Targets are PRs with stored unresolved threads plus open PRs, so resolved
+    history is never polled. Each repository is committed independently.
+    """
+
+    targets: dict[str, list[tuple[int, int]]] = {}
+    for row in db.list_review_thread_refresh_targets(conn):
+        targets.setdefault(str(row["repo_full_name"]), []).append(
+            (int(row["repo_id"]), int(row["pull_number"]))
+        )
+
+    refreshed = 0
+    for repo_full_name, pulls in targets.items():
+        try:
+            with open_github(conn, repo_full_name) as github:
+                for repo_id, number in pulls:
+                    if sync_review_threads(
+                        conn,
+                        github,
+                        repo_full_name,
+                        repo_id=repo_id,
+                        number=number,
+                    ):
+                        refreshed += 1
+                    conn.commit()
+        except Exception as exc:
+            conn.rollback()
+            if on_error is not None:
+                on_error(repo_full_name, exc)
+
+    return refreshed
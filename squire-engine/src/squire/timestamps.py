@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MILLISECOND = timedelta(milliseconds=1)
+
+
+def parse_iso_datetime(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    normalized = value.replace("Z", "+00:00")
+    try:
+        return datetime.fromisoformat(normalized)
+    except ValueError:
+        return None
+
+
+def to_epoch_ms(value: str | datetime | None) -> int | None:
+    """Epoch milliseconds for an ISO timestamp (`Z` or offset form) or datetime.
+
+    Naive values (such as date-only legacy rows) are taken as UTC, like SQLite's
+    `julianday` does in the migration backfill.
+    """
+
+    parsed = parse_iso_datetime(value) if isinstance(value, str) else value
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (parsed - _EPOCH) // _MILLISECOND
@@ -0,0 +1,493 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+import atexit
+from itertools import groupby
+import json
+import logging
+import os
+from pathlib import Path
+import queue
+import random
+import threading
+import time
+from typing import Any, Protocol
+
+import httpx
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_REQUEST_MS = 1000.0
+DEFAULT_OTLP_ENDPOINT = "http://127.0.0.1:4318"
+MAX_SPANS_PER_TRACE = 10_000
+MAX_ATTRIBUTE_LENGTH = 500
+MAX_BREAKDOWN_LINES = 200
+TRACE_EXPORTERS = ("jsonl", "otlp")
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "start_ns",
+        "_started",
+        "duration_ns",
+        "attributes",
+        "error",
+    )
+
+    def __init__(self, trace: Trace, name: str, parent_id: int | None, attributes: dict) -> None:
+        self.trace = trace
+        self.span_id = random.getrandbits(64) or 1
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter_ns()
+        self.duration_ns: int | None = None
+        self.attributes = attributes
+        self.error: str | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        self.duration_ns = time.perf_counter_ns() - self._started
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.duration_ns or 0) / 1_000_000
+
+    @property
+    def category(self) -> str:
+        return self.name.split(".", 1)[0]
+
+    def to_dict(self) -> dict[str, Any]:
+        """One JSONL record; ids and timestamps follow OpenTelemetry naming."""
+
+        return {
+            "trace_id": self.trace.trace_id_hex,
+            "span_id": f"{self.span_id:016x}",
+            "parent_span_id": f"{self.parent_id:016x}" if self.parent_id else None,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.start_ns + (self.duration_ns or 0),
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": {key: _attribute_value(value) for key, value in self.attributes.items()},
+            "status": "error" if self.error else "ok",
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+def _attribute_value(value: Any) -> Any:
+    if isinstance(value, (bool, int, float)) or value is None:
+        return value
+    text = str(value)
+    return text if len(text) <= MAX_ATTRIBUTE_LENGTH else text[:MAX_ATTRIBUTE_LENGTH] + "…"
+
+
+class Trace:
+    def __init__(self) -> None:
+        self.trace_id = random.getrandbits(128) or 1
+        self.spans: list[Span] = []
+        self.dropped = 0
+        self.discard = False
+
+    @property
+    def trace_id_hex(self) -> str:
+        return f"{self.trace_id:032x}"
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    def add(self, span: Span) -> bool:
+        if len(self.spans) >= MAX_SPANS_PER_TRACE:
+            self.dropped += 1
+            return False
+        self.spans.append(span)
+        return True
+
+
+_current_span: ContextVar[Span | None] = ContextVar("squire_current_span", default=None)
+
+
+class _SpanScope:
+    __slots__ = ("_name", "_attributes", "_span", "_token")
+
+    def __init__(self, name: str, attributes: dict[str, Any]) -> None:
+        self._name = name
+        self._attributes = attributes
+
+    def __enter__(self) -> Span | None:
+        parent = _current_span.get()
+        span = Span(parent.trace, self._name, parent.span_id, self._attributes)
+        if not parent.trace.add(span):
+            self._span = None
+            return None
+        self._span = span
+        self._token = _current_span.set(span)
+        return span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        span = self._span
+        if span is None:
+            return
+        span.end()
+        if isinstance(exc, Exception):
+            span.error = f"{type(exc).__name__}: {exc}"
+        _current_span.reset(self._token)
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+
+_NOOP_SCOPE = _NoopScope()
+
+
+def span(name: str, **attributes: Any) -> _SpanScope | _NoopScope:
+    """Child span of the active trace; a shared no-op when nothing is being traced."""
+
+    if _current_span.get() is None:
+        return _NOOP_SCOPE
+    return _SpanScope(name, attributes)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+class TraceExporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+
+class JsonlTraceExporter:
+    """Append one JSON object per span to a local file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(
+            json.dumps(item.to_dict(), ensure_ascii=False, default=str) + "\n" for item in spans
+        )
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write(lines)
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(_attribute_value(value))}
+    return {"key": key, "value": typed}
+
+
+def otlp_payload(spans: list[Span]) -> dict[str, Any]:
+    """OTLP/HTTP JSON body (`ExportTraceServiceRequest`) for `spans`."""
+
+    items = []
+    for item in spans:
+        record = item.to_dict()
+        encoded: dict[str, Any] = {
+            "traceId": record["trace_id"],
+            "spanId": record["span_id"],
+            "name": item.name,
+            # SERVER for request roots, INTERNAL otherwise.
+            "kind": 2 if item.parent_id is None else 1,
+            "startTimeUnixNano": str(record["start_time_unix_nano"]),
+            "endTimeUnixNano": str(record["end_time_unix_nano"]),
+            "attributes": [
+                _otlp_attribute(key, value) for key, value in item.attributes.items()
+            ],
+            "status": {"code": 2, "message": item.error} if item.error else {"code": 1},
+        }
+        if record["parent_span_id"]:
+            encoded["parentSpanId"] = record["parent_span_id"]
+        items.append(encoded)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_otlp_attribute("service.name", "squire-engine")]},
+                "scopeSpans": [{"scope": {"name": "squire"}, "spans": items}],
+            }
+        ]
+    }
+
+
+class OtlpTraceExporter:
+    """POST spans as OTLP/HTTP JSON to `<endpoint>/v1/traces` (collector, Jaeger, Tempo)."""
+
+    def __init__(self, endpoint: str, *, timeout: float = 5.0) -> None:
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: list[Span]) -> None:
+        response = self._client.post(self.url, json=otlp_payload(spans))
+        response.raise_for_status()
+
+
+class BackgroundExporter:
+    """Run an exporter on a daemon thread so requests never wait on trace I/O.
+
+    Traces are dropped (and counted) when the queue is full.
+    """
+
+    def __init__(self, exporter: TraceExporter, *, max_queue: int = 1000) -> None:
+        self.exporter = exporter
+        self.dropped = 0
+        self._queue: queue.Queue[list[Span] | threading.Event] = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="squire-trace-export", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, spans: list[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until everything submitted so far has been exported."""
+
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            if isinstance(spans, threading.Event):
+                spans.set()
+                continue
+            try:
+                self.exporter.export(spans)
+            except Exception:
+                logger.warning("trace export failed", exc_info=True)
+
+
+def format_breakdown(trace: Trace) -> str:
+    """Per-category totals followed by the span tree with start offsets.
+
+    Consecutive sibling leaf spans with the same name (e.g. a run of SELECTs) are
+    collapsed into one line with a count.
+    """
+
+    root = trace.root
+    by_id = {item.span_id: item for item in trace.spans}
+    totals: dict[str, list[float]] = {}
+    children: dict[int | None, list[Span]] = {}
+    for item in trace.spans[1:]:
+        children.setdefault(item.parent_id, []).append(item)
+        # Nested spans of the same category would be counted twice.
+        parent = by_id.get(item.parent_id)
+        if parent is None or parent.category != item.category:
+            bucket = totals.setdefault(item.category, [0.0, 0])
+            bucket[0] += item.duration_ms
+            bucket[1] += 1
+
+    lines = [f"{root.name} {root.duration_ms:.1f} ms (trace {trace.trace_id_hex})"]
+    for category, (total, count) in sorted(totals.items(), key=lambda entry: -entry[1][0]):
+        lines.append(f"  {category}: {total:.1f} ms in {count} span(s)")
+
+    tree: list[str] = []
+
+    def walk(parent_id: int, depth: int) -> None:
+        siblings = children.get(parent_id, [])
+        groups = groupby(siblings, key=lambda s: (s.name, s.span_id in children or s.error))
+        for (name, expand), group in groups:
+            items = list(group) if not expand else None
+            for item in items[:1] if items else group:
+                offset = (item.start_ns - root.start_ns) / 1_000_000
+                if items and len(items) > 1:
+                    total = sum(entry.duration_ms for entry in items)
+                    label = f"{name} x{len(items)} {total:.1f} ms"
+                else:
+                    error = f" !{item.error}" if item.error else ""
+                    label = f"{name} {item.duration_ms:.1f} ms{error}"
+                tree.append(f"  {'  ' * depth}+{offset:.1f} ms {label}")
+                if expand:
+                    walk(item.span_id, depth + 1)
+
+    walk(root.span_id, 0)
+    if len(tree) > MAX_BREAKDOWN_LINES:
+        omitted = len(tree) - MAX_BREAKDOWN_LINES
+        tree = [*tree[:MAX_BREAKDOWN_LINES], f"  ... {omitted} more line(s)"]
+    lines.extend(tree)
+    if trace.dropped:
+        lines.append(f"  ({trace.dropped} span(s) dropped)")
+    return "\n".join(lines)
+
+
+class Tracer:
+    def __init__(
+        self,
+        *,
+        exporter: TraceExporter | None = None,
+        slow_threshold_ms: float = DEFAULT_SLOW_REQUEST_MS,
+        on_slow: Callable[[Trace], None] | None = None,
+    ) -> None:
+        self.exporter = BackgroundExporter(exporter) if exporter is not None else None
+        self.slow_threshold_ms = slow_threshold_ms
+        self._on_slow = on_slow or self._log_slow
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None or self.slow_threshold_ms > 0
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Trace]:
+        trace = Trace()
+        root = Span(trace, name, None, attributes)
+        trace.add(root)
+        token = _current_span.set(root)
+        try:
+            yield trace
+        except Exception as exc:
+            root.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            root.end()
+            _current_span.reset(token)
+            self.finish(trace)
+
+    def finish(self, trace: Trace) -> None:
+        if trace.discard:
+            return
+        if self.exporter is not None:
+            self.exporter.submit(trace.spans)
+        if 0 < self.slow_threshold_ms <= trace.root.duration_ms:
+            self._on_slow(trace)
+
+    def flush(self) -> None:
+        if self.exporter is not None:
+            self.exporter.flush()
+
+    @staticmethod
+    def _log_slow(trace: Trace) -> None:
+        logger.warning("slow request: %s", format_breakdown(trace))
+
+
+def _load_slow_threshold_ms() -> float:
+    raw = os.getenv("SQUIRE_SLOW_REQUEST_MS")
+    if raw is None or not raw.strip():
+        return DEFAULT_SLOW_REQUEST_MS
+    try:
+        return max(float(raw), 0.0)
+    except ValueError:
+        return DEFAULT_SLOW_REQUEST_MS
+
+
+def create_exporter() -> TraceExporter | None:
+    """Exporter named by `SQUIRE_TRACE_EXPORTER` (`jsonl`, `otlp`), or none."""
+
+    name = (os.getenv("SQUIRE_TRACE_EXPORTER") or "").strip().lower()
+    if not name:
+        return None
+    if name == "jsonl":
+        raw_path = (os.getenv("SQUIRE_TRACE_FILE") or "").strip()
+        if raw_path:
+            return JsonlTraceExporter(Path(raw_path).expanduser())
+        from .config import get_settings
+
+        return JsonlTraceExporter(get_settings().db_path.parent / "traces.jsonl")
+    if name == "otlp":
+        endpoint = (os.getenv("SQUIRE_TRACE_OTLP_ENDPOINT") or "").strip()
+        return OtlpTraceExporter(endpoint or DEFAULT_OTLP_ENDPOINT)
+    logger.warning(
+        "Unknown SQUIRE_TRACE_EXPORTER `%s` (expected one of %s); traces are not exported.",
+        name,
+        ", ".join(TRACE_EXPORTERS),
+    )
+    return None
+
+
+_tracer: Tracer | None = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(
+                exporter=create_exporter(),
+                slow_threshold_ms=_load_slow_threshold_ms(),
+            )
+        return _tracer
+
+
+def configure_tracer(tracer: Tracer | None) -> None:
+    """Replace the process-wide tracer (`None` re-reads the environment on next use)."""
+
+    global _tracer
+
+    with _tracer_lock:
+        _tracer = tracer
+
+
+def cli_tracing_enabled() -> bool:
+    return (os.getenv("SQUIRE_TRACE") or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+class TracingMiddleware:
+    """Root span per API request, named by method and route template.
+
+    Streamed responses (SSE) are neither exported nor reported as slow.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        tracer = get_tracer()
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        with tracer.trace(
+            method,
+            **{"http.method": method, "http.target": scope["path"]},
+        ) as trace:
+            root = trace.root
+
+            async def send_traced(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    for name, value in message.get("headers", ()):
+                        if name.lower() == b"content-type" and value.startswith(
+                            b"text/event-stream"
+                        ):
+                            trace.discard = True
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    root.name = f"{method} {route}"
+                    root.set_attribute("http.route", route)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """Daemon thread that runs `target` immediately and then every `interval` seconds."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        interval: float,
+        target: Callable[[], None],
+    ) -> None:
+        self.name = name
+        self.interval = interval
+        self._target = target
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        """Run the next iteration now instead of waiting for the interval."""
+
+        self._wake.set()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._target()
+            except Exception:
+                logger.exception("%s iteration failed", self.name)
+            self._wake.wait(self.interval)
+            self._wake.clear()
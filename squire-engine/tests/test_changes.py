@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from squire import db
+import squire.api as api_module
+import squire.cli as cli_module
+from squire.config import Settings
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def _upsert_pull(conn, repo_id: int, *, title: str, synced_at: str) -> int:
+    return db.upsert_pull_request(
+        conn,
+        repo_id=repo_id,
+        number=7,
+        title=title,
+        body=None,
+        author="dane-park",
+        state="open",
+        head_branch="feature/changes",
+        base_branch="main",
+        changed_files=1,
+        reviewers_json="[]",
+        created_at="2026-03-01T00:00:00Z",
+        updated_at="2026-03-01T00:00:00Z",
+        synced_at=synced_at,
+    )
+
+
+def test_change_feed_records_only_real_changes(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        repo_id, _ = db.upsert_repository(conn, "owner/repo")
+        pull_request_id = _upsert_pull(
+            conn, repo_id, title="Draft", synced_at="2026-03-01T00:00:00Z"
+        )
+        # Re-syncing identical data and re-setting the same status are no-ops.
+        _upsert_pull(conn, repo_id, title="Draft", synced_at="2026-03-02T00:00:00Z")
+        db.set_review_status(conn, pull_request_id=pull_request_id, status="pending")
+        db.set_review_status(conn, pull_request_id=pull_request_id, status="done")
+        db.set_review_status(conn, pull_request_id=pull_request_id, status="done")
+        review_id = db.insert_ai_review(
+            conn,
+            pull_request_id=pull_request_id,
+            file_path=None,
+            line_number=None,
+            severity="info",
+            body="좋습니다.",
+            agent="codex",
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    client = TestClient(api_module.app)
+    response = client.get("/changes", params={"after": 0})
+    assert response.status_code == 200, response.text
+    page = response.json()
+    assert [(item["entity"], item["op"]) for item in page["items"]] == [
+        ("pull_request", "insert"),
+        ("review_status", "update"),
+        ("local_review", "insert"),
+    ]
+    assert page["items"][2]["entity_id"] == review_id
+    assert page["items"][0]["repo"] == "owner/repo"
+    assert page["next_after"] == page["latest_seq"] == page["items"][-1]["seq"]
+
+    conn = db.connect(_settings_for(db_path))
+    try:
+        _upsert_pull(conn, repo_id, title="Ready", synced_at="2026-03-03T00:00:00Z")
+        conn.commit()
+    finally:
+        conn.close()
+
+    result = CliRunner().invoke(
+        cli_module.app,
+        ["changes", "--after", str(page["next_after"]), "--json"],
+    )
+    assert result.exit_code == 0, result.output
+    later = json.loads(result.output)
+    assert [(item["entity"], item["op"], item["number"]) for item in later["items"]] == [
+        ("pull_request", "update", 7)
+    ]
+    assert later["has_more"] is False
+
+    empty = client.get("/changes", params={"after": later["next_after"]}).json()
+    assert empty["items"] == []
+    assert empty["next_after"] == later["next_after"]
+
+
+def test_change_feed_paging_by_repo_and_pruning(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        repo_id, _ = db.upsert_repository(conn, "owner/repo")
+        other_id, _ = db.upsert_repository(conn, "owner/other")
+        for title in ("One", "Two", "Three"):
+            _upsert_pull(conn, repo_id, title=title, synced_at="2026-03-01T00:00:00Z")
+        _upsert_pull(conn, other_id, title="Elsewhere", synced_at="2026-03-01T00:00:00Z")
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    client = TestClient(api_module.app)
+    page = client.get("/changes", params={"repo": "owner/repo", "limit": 3}).json()
+    assert len(page["items"]) == 3
+    # Later changes in another repository are not more pages of this one.
+    assert page["has_more"] is False
+    assert page["latest_seq"] == page["next_after"]
+    assert page["truncated"] is False
+
+    conn = db.connect(_settings_for(db_path))
+    try:
+        conn.execute("UPDATE change_log SET changed_at = '2020-01-01T00:00:00Z' WHERE seq <= 2")
+        assert db.prune_change_log(conn, retention_days=30) == 2
+        conn.execute("UPDATE change_log SET changed_at = '2020-01-01T00:00:00Z'")
+        # The newest entry survives so `latest_seq` never moves backwards.
+        assert db.prune_change_log(conn, retention_days=30) == 1
+        conn.commit()
+    finally:
+        conn.close()
+
+    stale = client.get("/changes", params={"after": 1}).json()
+    assert stale["truncated"] is True
+    assert [item["seq"] for item in stale["items"]] == [4]
+    assert client.get("/changes", params={"after": 3}).json()["truncated"] is False
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+import squire.api as api_module
+from squire import config as config_module
+from squire.config import SettingsService
+
+
+def test_settings_are_cached_until_env_or_dotenv_changes(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("GITHUB_BASE_URL", raising=False)
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(tmp_path / "first.db"))
+    env_file = tmp_path / ".env"
+    env_file.write_text("GITHUB_BASE_URL=https://ghe.example.com/api/v3\n", encoding="utf-8")
+    service = SettingsService()
+    try:
+        first = service.get()
+        assert first.github_base_url == "https://ghe.example.com/api/v3"
+        assert service.get() is first
+        assert service.loads == 1
+
+        monkeypatch.setenv("SQUIRE_DB_PATH", str(tmp_path / "second.db"))
+        assert service.get().db_path == tmp_path / "second.db"
+        assert service.loads == 2
+
+        env_file.write_text("GITHUB_BASE_URL=https://ghe.example.com/api/v4\n", encoding="utf-8")
+        stat = env_file.stat()
+        os.utime(env_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert service.get().github_base_url == "https://ghe.example.com/api/v4"
+
+        # Dropping a key from `.env` also drops the value it had applied.
+        env_file.write_text("", encoding="utf-8")
+        assert service.reload().github_base_url == config_module.DEFAULT_GITHUB_BASE_URL
+        assert "GITHUB_BASE_URL" not in os.environ
+    finally:
+        config_module.load_environment()
+
+
+def test_config_endpoint_reports_settings_without_the_token(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(tmp_path / "squire.db"))
+    monkeypatch.setenv("GITHUB_TOKEN", "ghp_secret")
+
+    client = TestClient(api_module.app)
+    response = client.get("/config")
+
+    assert response.status_code == 200, response.text
+    payload = response.json()
+    assert payload["github_token"] == "set"
+    assert payload["db_path"] == str(tmp_path / "squire.db")
+    assert "ghp_secret" not in response.text
+
+    reloaded = client.post("/config/reload")
+    assert reloaded.status_code == 200
+    assert reloaded.json()["loads"] > payload["loads"]
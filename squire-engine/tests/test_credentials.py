@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from collections.abc import Collection
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+import pytest
+
+from squire import db
+import squire.api as api_module
+from squire.config import Settings
+from squire.credentials import (
+    CachedCredentialStore,
+    CredentialStoreUnavailableError,
+    EnvCredentialProvider,
+    MemoryCredentialProvider,
+    configure_credential_store,
+    env_var_for_account,
+)
+from squire.keychain import parse_dump_accounts
+
+
+class CountingProvider(MemoryCredentialProvider):
+    def __init__(self, tokens: dict[str, str]) -> None:
+        super().__init__(tokens)
+        self.calls: list[str] = []
+
+    def get(self, account: str) -> str | None:
+        self.calls.append(f"get:{account}")
+        return super().get(account)
+
+    def find_accounts(self, accounts: Collection[str]) -> set[str]:
+        self.calls.append(f"find:{len(accounts)}")
+        return super().find_accounts(accounts)
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def test_cached_store_expires_entries_and_invalidates_on_writes() -> None:
+    now = [0.0]
+    provider = CountingProvider({"owner/a": "token-a"})
+    store = CachedCredentialStore(provider, ttl=60, clock=lambda: now[0])
+
+    assert store.get_token("owner/a") == "token-a"
+    assert store.get_token("owner/b") is None
+    assert store.get_token("owner/a") == "token-a"
+    assert store.get_token("owner/b") is None
+    assert provider.calls == ["get:owner/a", "get:owner/b"]
+
+    # Lookups already answered count toward the bulk check.
+    assert store.accounts_with_tokens(["owner/a", "owner/b", "owner/c"]) == {"owner/a"}
+    assert provider.calls[-1] == "find:1"
+
+    store.set_token("owner/b", " token-b ")
+    assert store.has_token("owner/b")
+    assert store.get_token("owner/b") == "token-b"
+
+    store.delete_token("owner/a")
+    assert store.get_token("owner/a") is None
+
+    provider.tokens["owner/c"] = "token-c"
+    assert not store.has_token("owner/c")
+    now[0] = 61.0
+    assert store.has_token("owner/c")
+
+
+def test_env_provider_is_read_only() -> None:
+    provider = EnvCredentialProvider()
+    assert env_var_for_account("dane-park/squire.app") == "SQUIRE_GITHUB_TOKEN_DANE_PARK_SQUIRE_APP"
+    with pytest.raises(CredentialStoreUnavailableError):
+        provider.set("owner/repo", "token")
+
+
+def test_encrypted_file_provider_round_trips(tmp_path: Path) -> None:
+    pytest.importorskip("cryptography")
+    from squire.credentials import EncryptedFileCredentialProvider
+
+    path = tmp_path / "credentials.enc"
+    provider = EncryptedFileCredentialProvider(path)
+    provider.set("owner/repo", "secret-token")
+
+    assert b"secret-token" not in path.read_bytes()
+    assert path.with_suffix(".key").stat().st_mode & 0o777 == 0o600
+    reopened = EncryptedFileCredentialProvider(path)
+    assert reopened.get("owner/repo") == "secret-token"
+    assert reopened.find_accounts(["owner/repo", "owner/other"]) == {"owner/repo"}
+    reopened.delete("owner/repo")
+    assert EncryptedFileCredentialProvider(path).get("owner/repo") is None
+
+
+def test_parse_dump_accounts_reads_only_squire_items() -> None:
+    output = "\n".join(
+        [
+            'keychain: "/Users/dane/Library/Keychains/login.keychain-db"',
+            'class: "genp"',
+            "attributes:",
+            '    "acct"<blob>="owner/repo"',
+            '    "svce"<blob>="squire.github.token"',
+            'keychain: "/Users/dane/Library/Keychains/login.keychain-db"',
+            'class: "genp"',
+            "attributes:",
+            '    "acct"<blob>="dane"',
+            '    "svce"<blob>="other.service"',
+            'keychain: "/Users/dane/Library/Keychains/login.keychain-db"',
+            "attributes:",
+            '    "acct"<blob>=0x6F776E65722F6F74686572  "owner/other"',
+            '    "svce"<blob>="squire.github.token"',
+        ]
+    )
+    assert parse_dump_accounts(output) == {"owner/repo", "owner/other"}
+
+
+def test_repo_list_checks_tokens_in_one_bulk_lookup(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        for name in ("owner/a", "owner/b", "owner/c"):
+            db.upsert_repository(conn, name)
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    provider = CountingProvider({"owner/b": "token-b"})
+    configure_credential_store(CachedCredentialStore(provider))
+    try:
+        client = TestClient(api_module.app)
+        response = client.get("/repos")
+        assert response.status_code == 200, response.text
+        assert {
+            item["full_name"]: item["has_custom_github_token"] for item in response.json()
+        } == {"owner/a": False, "owner/b": True, "owner/c": False}
+        assert provider.calls == ["find:3"]
+    finally:
+        configure_credential_store(None)
+
+
+def test_repo_list_etag_changes_when_cached_token_presence_expires(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        db.upsert_repository(conn, "owner/a")
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    now = [0.0]
+    provider = CountingProvider({})
+    configure_credential_store(CachedCredentialStore(provider, ttl=60, clock=lambda: now[0]))
+    try:
+        client = TestClient(api_module.app)
+        first = client.get("/repos")
+        etag = first.headers["ETag"]
+        assert first.json()[0]["has_custom_github_token"] is False
+
+        # Another process stores a token; this process only sees it once the TTL expires.
+        provider.set("owner/a", "token-a")
+        assert client.get("/repos", headers={"If-None-Match": etag}).status_code == 304
+        now[0] = 61.0
+        refreshed = client.get("/repos", headers={"If-None-Match": etag})
+        assert refreshed.status_code == 200
+        assert refreshed.json()[0]["has_custom_github_token"] is True
+        assert refreshed.headers["ETag"] != etag
+    finally:
+        configure_credential_store(None)
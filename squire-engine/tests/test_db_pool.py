@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sqlite3
+import threading
+
+from fastapi.testclient import TestClient
+import pytest
+
+from squire import db
+import squire.api as api_module
+from squire.config import Settings
+from squire.pool import ConnectionPool, DatabasePools
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def test_connections_use_wal_and_readers_are_read_only(tmp_path: Path) -> None:
+    pools = DatabasePools(_settings_for(tmp_path / "squire.db"))
+    try:
+        with pools.writer.connection() as writer:
+            assert writer.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert writer.execute("PRAGMA synchronous").fetchone()[0] == 1
+            assert writer.execute("PRAGMA busy_timeout").fetchone()[0] == db.BUSY_TIMEOUT_MS
+            db.upsert_repository(writer, "owner/repo")
+
+            # A reader sees the last committed snapshot while the write is open.
+            with pools.reader.connection() as reader:
+                assert db.list_repositories(reader) == []
+                with pytest.raises(sqlite3.OperationalError):
+                    reader.execute("DELETE FROM repositories")
+            writer.commit()
+
+        with pools.reader.connection() as reader:
+            assert [row["full_name"] for row in db.list_repositories(reader)] == ["owner/repo"]
+    finally:
+        pools.close()
+
+
+def test_pool_reuses_connections_and_rolls_back_leftovers(tmp_path: Path) -> None:
+    settings = _settings_for(tmp_path / "squire.db")
+    opened: list[sqlite3.Connection] = []
+
+    def factory() -> sqlite3.Connection:
+        conn = db.connect(settings, check_same_thread=False)
+        opened.append(conn)
+        return conn
+
+    pool = ConnectionPool(factory, max_size=1)
+    with pool.connection() as conn:
+        db.upsert_repository(conn, "owner/uncommitted")
+    with pool.connection() as conn:
+        assert db.list_repositories(conn) == []
+
+    borrowed = threading.Event()
+    release = threading.Event()
+
+    def hold() -> None:
+        with pool.connection():
+            borrowed.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    borrowed.wait(5)
+    release.set()
+    with pool.connection() as conn:
+        assert conn is opened[0]
+    holder.join(5)
+    assert len(opened) == 1
+    pool.close()
+
+
+def test_api_lifespan_serves_reads_from_pool(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(tmp_path / "squire.db"))
+    monkeypatch.setenv("SQUIRE_THREAD_REFRESH_INTERVAL", "0")
+
+    with TestClient(api_module.app) as client:
+        assert api_module._db_pools is not None
+        assert client.get("/repos").json() == []
+        assert client.get("/repos").status_code == 200
+    assert api_module._db_pools is None
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from squire import db
+import squire.api as api_module
+from squire.config import Settings
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def _upsert_pull(conn, repo_id: int, number: int) -> int:
+    return db.upsert_pull_request(
+        conn,
+        repo_id=repo_id,
+        number=number,
+        title=f"PR {number}",
+        body=None,
+        author="dane-park",
+        state="open",
+        head_branch=f"feature/{number}",
+        base_branch="main",
+        changed_files=1,
+        reviewers_json="[]",
+        created_at="2026-03-01T00:00:00Z",
+        updated_at="2026-03-01T00:00:00Z",
+        synced_at="2026-03-01T00:00:00Z",
+    )
+
+
+def test_local_data_endpoints_answer_304_until_their_scope_changes(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        repo_id, _ = db.upsert_repository(conn, "owner/repo")
+        other_id, _ = db.upsert_repository(conn, "owner/other")
+        _upsert_pull(conn, repo_id, 1)
+        _upsert_pull(conn, repo_id, 2)
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+    monkeypatch.setattr(api_module, "github_token_accounts", lambda accounts: set())
+
+    client = TestClient(api_module.app)
+    urls = {
+        "repos": ("/repos", {}),
+        "pulls": ("/pulls", {"repo": "owner/repo"}),
+        "pull": ("/pulls/1", {"repo": "owner/repo"}),
+        "other_pull": ("/pulls/2", {"repo": "owner/repo"}),
+        "reviews": ("/pulls/1/local-reviews", {"repo": "owner/repo"}),
+    }
+    etags: dict[str, str] = {}
+    for name, (url, params) in urls.items():
+        response = client.get(url, params=params)
+        assert response.status_code == 200, response.text
+        etags[name] = response.headers["ETag"]
+        cached = client.get(url, params=params, headers={"If-None-Match": etags[name]})
+        assert cached.status_code == 304, name
+        assert cached.content == b""
+
+    # Query parameters are part of the tag.
+    closed = client.get(
+        "/pulls",
+        params={"repo": "owner/repo", "state": "closed"},
+        headers={"If-None-Match": etags["pulls"]},
+    )
+    assert closed.status_code == 200
+
+    conn = db.connect(_settings_for(db_path))
+    try:
+        _upsert_pull(conn, other_id, 9)
+        conn.commit()
+    finally:
+        conn.close()
+    for name in ("repos", "pulls", "pull", "reviews"):
+        url, params = urls[name]
+        response = client.get(url, params=params, headers={"If-None-Match": etags[name]})
+        assert response.status_code == 304, name
+
+    created = client.post(
+        "/pulls/1/local-reviews",
+        params={"repo": "owner/repo"},
+        json={"body": "재확인 부탁드립니다.", "severity": "warning"},
+    )
+    assert created.status_code == 200, created.text
+
+    changed = {
+        name
+        for name, (url, params) in urls.items()
+        if client.get(url, params=params, headers={"If-None-Match": etags[name]}).status_code
+        == 200
+    }
+    assert changed == {"pulls", "pull", "reviews"}
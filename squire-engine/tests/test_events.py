@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+import threading
+
+from squire import db
+import squire.api as api_module
+from squire.config import Settings
+from squire.events import EventBroadcaster, stream_events
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def _frame_event(frame: str) -> tuple[str, str, dict[str, object]]:
+    fields = dict(line.split(": ", 1) for line in frame.strip().splitlines())
+    return fields["id"], fields["event"], json.loads(fields["data"])
+
+
+def test_stream_replays_after_last_event_id_and_drops_lagging_clients() -> None:
+    async def scenario() -> None:
+        broadcaster = EventBroadcaster(client_queue_size=2)
+        first = broadcaster.publish("pull_request.upserted", {"number": 1})
+        broadcaster.publish("pull_request.upserted", {"number": 2})
+
+        stream = stream_events(broadcaster, last_event_id=first.id, heartbeat=5)
+        assert await anext(stream) == "retry: 3000\n\n"
+        assert _frame_event(await anext(stream))[2] == {"number": 2}
+
+        publisher = threading.Thread(
+            target=broadcaster.publish,
+            args=("review_status.changed", {"number": 3}),
+        )
+        publisher.start()
+        _, event_type, data = _frame_event(await anext(stream))
+        publisher.join()
+        assert (event_type, data) == ("review_status.changed", {"number": 3})
+        assert broadcaster.subscriber_count == 1
+
+        # A client that falls more than its queue behind is cut off after draining.
+        for number in (4, 5, 6):
+            broadcaster.publish("local_review.added", {"number": number})
+        await asyncio.sleep(0)
+        assert _frame_event(await anext(stream))[2] == {"number": 4}
+        last_id, _, data = _frame_event(await anext(stream))
+        assert data == {"number": 5}
+        try:
+            await anext(stream)
+        except StopAsyncIteration:
+            pass
+        else:
+            raise AssertionError("lagging stream should end")
+        assert broadcaster.subscriber_count == 0
+
+        resumed = stream_events(broadcaster, last_event_id=last_id, heartbeat=5)
+        await anext(resumed)
+        assert _frame_event(await anext(resumed))[2] == {"number": 6}
+        await resumed.aclose()
+
+        stale = stream_events(broadcaster, last_event_id="0000-12", heartbeat=5)
+        await anext(stale)
+        assert _frame_event(await anext(stale))[1] == "resync"
+        broadcaster.close()
+        assert [frame async for frame in stale] == []
+
+    asyncio.run(scenario())
+
+
+def test_change_feed_publishes_typed_events_for_new_changes(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        repo_id, _ = db.upsert_repository(conn, "owner/repo")
+        pull_request_id = db.upsert_pull_request(
+            conn,
+            repo_id=repo_id,
+            number=7,
+            title="이벤트",
+            body="",
+            author="dane-park",
+            state="open",
+            head_branch="feature",
+            base_branch="main",
+            changed_files=1,
+            reviewers_json="[]",
+            created_at="2026-03-01T00:00:00Z",
+            updated_at="2026-03-01T00:00:00Z",
+            synced_at="2026-03-01T00:00:00Z",
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    broadcaster = EventBroadcaster()
+    monkeypatch.setattr(api_module, "event_broadcaster", broadcaster)
+    monkeypatch.setattr(api_module, "_event_feed_after", None)
+
+    # The first pass only records the tip, so pre-existing history is not replayed.
+    api_module._publish_change_events()
+    assert api_module._event_feed_after is not None
+    assert api_module._event_feed_after > 0
+
+    conn = db.connect(_settings_for(db_path))
+    try:
+        db.insert_ai_review(
+            conn,
+            pull_request_id=pull_request_id,
+            file_path="src/app.py",
+            line_number=3,
+            severity="warning",
+            body="확인 필요",
+            agent="codex",
+        )
+        db.set_review_status(conn, pull_request_id=pull_request_id, status="done")
+        conn.commit()
+    finally:
+        conn.close()
+
+    api_module._publish_change_events()
+    api_module._publish_change_events()
+
+    async def collect() -> list[tuple[str, str, dict[str, object]]]:
+        stream = stream_events(broadcaster, last_event_id=f"{broadcaster.instance}-0")
+        await anext(stream)
+        frames = [_frame_event(await anext(stream)) for _ in range(2)]
+        await stream.aclose()
+        return frames
+
+    frames = asyncio.run(collect())
+    assert broadcaster.subscriber_count == 0
+    assert [event_type for _, event_type, _ in frames] == [
+        "local_review.added",
+        "review_status.changed",
+    ]
+    assert frames[0][2]["repo"] == "owner/repo"
+    assert frames[0][2]["number"] == 7
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from squire import db
+import squire.api as api_module
+import squire.cli as cli_module
+from squire.config import Settings
+from squire.content_store import BlobStore, git_blob_sha
+
+SHARED_CONTENT = b"def main():\n    return 42\n"
+BASE_CONTENT = b"def main():\n    return 0\n"
+
+
+class FakeContentsGitHubClient:
+    def __init__(self) -> None:
+        self.blob_fetches: list[str] = []
+        self.oid_lookups: list[tuple[str, str]] = []
+        self.blobs = {
+            git_blob_sha(SHARED_CONTENT): SHARED_CONTENT,
+            git_blob_sha(BASE_CONTENT): BASE_CONTENT,
+        }
+        self.trees = {
+            ("head-1", "src/main.py"): git_blob_sha(SHARED_CONTENT),
+            ("head-2", "src/main.py"): git_blob_sha(SHARED_CONTENT),
+            ("base-1", "src/main.py"): git_blob_sha(BASE_CONTENT),
+        }
+
+    def __enter__(self) -> "FakeContentsGitHubClient":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def get_pull_request(self, repo_full_name: str, number: int) -> dict[str, object]:
+        return {
+            "number": number,
+            "head": {"sha": f"head-{number}"},
+            "base": {"sha": "base-1"},
+        }
+
+    def get_blob_oid(self, repo_full_name: str, ref: str, path: str) -> str | None:
+        self.oid_lookups.append((ref, path))
+        return self.trees.get((ref, path))
+
+    def get_git_blob(self, repo_full_name: str, sha: str) -> bytes:
+        self.blob_fetches.append(sha)
+        return self.blobs[sha]
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def _seed_repo(db_path: Path, repo_full_name: str) -> None:
+    conn = db.connect(_settings_for(db_path))
+    try:
+        db.upsert_repository(conn, repo_full_name)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_blob_store_deduplicates_by_git_blob_sha(tmp_path: Path) -> None:
+    store = BlobStore(tmp_path / "blobs")
+
+    first = store.put(SHARED_CONTENT)
+    second = store.put(SHARED_CONTENT, expected_sha=first)
+
+    assert first == second == git_blob_sha(SHARED_CONTENT)
+    assert store.get(first) == SHARED_CONTENT
+    assert len(list((tmp_path / "blobs").rglob("*"))) == 2
+
+
+def test_cat_fetches_identical_blobs_once_across_prs(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "squire.db"
+    repo_full_name = "owner/repo"
+    _seed_repo(db_path, repo_full_name)
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    fake_github = FakeContentsGitHubClient()
+    monkeypatch.setattr(
+        cli_module,
+        "_open_github_client_for_repo",
+        lambda conn, repo: fake_github,
+    )
+
+    runner = CliRunner()
+    for number in (1, 2, 1):
+        result = runner.invoke(
+            cli_module.app,
+            ["cat", "src/main.py", "--pr", str(number), "--repo", repo_full_name],
+        )
+        assert result.exit_code == 0, result.output
+        assert result.output == SHARED_CONTENT.decode()
+
+    assert fake_github.blob_fetches == [git_blob_sha(SHARED_CONTENT)]
+    assert fake_github.oid_lookups == [("head-1", "src/main.py"), ("head-2", "src/main.py")]
+
+    missing = runner.invoke(
+        cli_module.app,
+        ["cat", "nope.py", "--pr", "1", "--repo", repo_full_name],
+    )
+    assert missing.exit_code == 1
+
+
+def test_contents_endpoint_serves_base_side(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "squire.db"
+    repo_full_name = "owner/repo"
+    _seed_repo(db_path, repo_full_name)
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    fake_github = FakeContentsGitHubClient()
+    monkeypatch.setattr(
+        api_module,
+        "open_github_client_for_repo",
+        lambda conn, repo: fake_github,
+    )
+
+    client = TestClient(api_module.app)
+    response = client.get(
+        "/pulls/1/contents",
+        params={"repo": repo_full_name, "path": "src/main.py", "side": "base"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.content == BASE_CONTENT
+    assert response.headers["x-squire-blob-sha"] == git_blob_sha(BASE_CONTENT)
+    assert response.headers["x-squire-commit-sha"] == "base-1"
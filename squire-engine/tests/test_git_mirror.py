@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from pathlib import Path
+import subprocess
+
+from squire import db
+from squire.config import Settings
+from squire.git_mirror import GitMirror, build_git_remote_url
+from squire.sync import sync_repository
+
+
+def _git(cwd: Path, *args: str) -> str:
+    result = subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        text=True,
+        capture_output=True,
+        check=True,
+        env={
+            "GIT_AUTHOR_NAME": "Squire Test",
+            "GIT_AUTHOR_EMAIL": "squire@example.com",
+            "GIT_COMMITTER_NAME": "Squire Test",
+            "GIT_COMMITTER_EMAIL": "squire@example.com",
+            "HOME": str(cwd),
+        },
+    )
+    return result.stdout.strip()
+
+
+def _seed_remote(path: Path) -> None:
+    path.mkdir()
+    _git(path, "init", "--quiet", "--initial-branch", "main")
+    (path / "app.py").write_text("print('hello')\n")
+    (path / "old_name.txt").write_text("line one\nline two\nline three\n")
+    _git(path, "add", ".")
+    _git(path, "commit", "--quiet", "-m", "initial")
+
+    _git(path, "checkout", "--quiet", "-b", "feature")
+    (path / "app.py").write_text("print('hello')\nprint('world')\n")
+    _git(path, "mv", "old_name.txt", "new_name.txt")
+    (path / "added.md").write_text("# notes\n")
+    _git(path, "add", ".")
+    _git(path, "commit", "--quiet", "-m", "feature")
+    _git(path, "update-ref", "refs/pull/7/head", "feature")
+    _git(path, "checkout", "--quiet", "main")
+
+
+def test_build_git_remote_url_for_public_and_enterprise_hosts() -> None:
+    assert (
+        build_git_remote_url("https://api.github.com", "owner/repo")
+        == "https://github.com/owner/repo.git"
+    )
+    assert (
+        build_git_remote_url("https://github.example.com/api/v3", "owner/repo")
+        == "https://github.example.com/owner/repo.git"
+    )
+
+
+def test_git_mirror_lists_files_and_diff_from_file_remote(tmp_path: Path) -> None:
+    remote = tmp_path / "remote"
+    _seed_remote(remote)
+
+    mirror = GitMirror(
+        tmp_path / "mirrors",
+        "owner/repo",
+        remote_url=remote.as_uri(),
+    )
+    files = {item["filename"]: item for item in mirror.list_pull_files(7, "main")}
+
+    assert set(files) == {"added.md", "app.py", "new_name.txt"}
+    assert files["app.py"]["status"] == "modified"
+    assert files["app.py"]["additions"] == 1
+    assert files["app.py"]["patch"].startswith("@@ -1 +1,2 @@")
+    assert files["new_name.txt"]["status"] == "renamed"
+    assert files["new_name.txt"]["previous_filename"] == "old_name.txt"
+    assert files["added.md"]["status"] == "added"
+    assert len(files["added.md"]["sha"]) == 40
+
+    diff_text = mirror.get_pull_diff(7, "main")
+    assert "diff --git a/app.py b/app.py" in diff_text
+    assert "+print('world')" in diff_text
+
+
+class FakePullGitHub:
+    def __init__(self, remote: Path) -> None:
+        self.remote = remote
+
+    def list_pull_requests(self, repo_full_name: str, *, state: str) -> list[dict[str, object]]:
+        return [{"number": 7}]
+
+    def get_pull_request(self, repo_full_name: str, number: int) -> dict[str, object]:
+        return {
+            "number": number,
+            "title": "Feature",
+            "state": "open",
+            "user": {"login": "octocat"},
+            "head": {"ref": "feature", "sha": _git(self.remote, "rev-parse", "feature")},
+            "base": {"ref": "main", "sha": _git(self.remote, "rev-parse", "main")},
+            "created_at": "2026-03-01T00:00:00Z",
+            "updated_at": "2026-03-01T00:00:00Z",
+        }
+
+
+def test_git_mirror_refetches_after_sync_records_a_new_head(tmp_path: Path) -> None:
+    remote = tmp_path / "remote"
+    _seed_remote(remote)
+    github = FakePullGitHub(remote)
+    conn = db.connect(
+        Settings(
+            github_token=None,
+            github_base_url="https://api.github.com",
+            db_path=tmp_path / "squire.db",
+        )
+    )
+    mirror = GitMirror(tmp_path / "mirrors", "owner/repo", remote_url=remote.as_uri())
+
+    def diff() -> str:
+        pull_request = db.get_pull_request_by_repo_and_number(conn, "owner/repo", 7)
+        return mirror.get_pull_diff(
+            7,
+            str(pull_request["base_branch"]),
+            head_sha=pull_request["head_sha"],
+            base_sha=pull_request["base_sha"],
+        )
+
+    try:
+        sync_repository(conn, github, "owner/repo")
+        assert "+print('world')" in diff()
+
+        _git(remote, "checkout", "--quiet", "feature")
+        (remote / "app.py").write_text("print('hello')\nprint('again')\n")
+        _git(remote, "commit", "--quiet", "-am", "push")
+        _git(remote, "update-ref", "refs/pull/7/head", "feature")
+
+        # Until a sync records the new head, the mirror serves its local refs.
+        assert "+print('again')" not in diff()
+        sync_repository(conn, github, "owner/repo", full_sync=True)
+        assert "+print('again')" in diff()
+    finally:
+        conn.close()
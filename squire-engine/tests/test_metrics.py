@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from pathlib import Path
+import re
+
+from fastapi.testclient import TestClient
+import httpx
+
+import squire.api as api_module
+from squire.github import GitHubClient, endpoint_family, token_fingerprint
+from squire.metrics import Counter, Histogram, MetricsRegistry
+
+
+def _sample(text: str, name: str, **labels: str) -> float | None:
+    for line in text.splitlines():
+        match = re.match(r"^([a-z_]+)(?:\{(.*)\})? (\S+)$", line)
+        if match is None or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+        if all(found.get(key) == value for key, value in labels.items()):
+            return float(match.group(3))
+    return None
+
+
+def test_registry_renders_prometheus_text_format() -> None:
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("demo_total", "Demo counter.", ("route",)))
+    histogram = registry.register(Histogram("demo_seconds", "Demo.", buckets=(0.1, 1.0)))
+
+    counter.labels('/say "hi"').inc()
+    counter.labels('/say "hi"').inc(2)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.labels().observe(value)
+
+    text = registry.render()
+    assert "# TYPE demo_total counter" in text
+    assert 'demo_total{route="/say \\"hi\\""} 3' in text
+    assert 'demo_seconds_bucket{le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{le="1"} 3' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 4' in text
+    assert "demo_seconds_sum 3.65" in text
+    assert "demo_seconds_count 4" in text
+
+
+def test_endpoint_family_drops_identifiers() -> None:
+    assert endpoint_family("repos/owner/repo/pulls/12/files") == "pulls/files"
+    assert endpoint_family("repos/owner/repo/compare/abc...def") == "compare"
+    assert endpoint_family("repos/owner/repo/git/blobs/0123abcd") == "git/blobs"
+    assert endpoint_family("repos/owner/repo/issues/comments/9/reactions") == (
+        "issues/comments/reactions"
+    )
+
+
+def test_metrics_endpoint_reports_routes_sqlite_and_github_calls(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(tmp_path / "squire.db"))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            json={"number": 5},
+            headers={"X-RateLimit-Remaining": "4321", "X-RateLimit-Resource": "core"},
+        )
+
+    github = GitHubClient(token="ghp_metrics", base_url="https://ghe.example.com/api/v3")
+    github._client = httpx.Client(
+        base_url="https://ghe.example.com/api/v3/",
+        transport=httpx.MockTransport(handler),
+    )
+    with github:
+        assert github.get_pull_request("owner/repo", 5) == {"number": 5}
+
+    client = TestClient(api_module.app)
+    assert client.get("/pulls/77", params={"repo": "owner/missing"}).status_code == 404
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert _sample(
+        text,
+        "squire_http_requests_total",
+        method="GET",
+        route="/pulls/{number}",
+        status="404",
+    )
+    assert _sample(
+        text,
+        "squire_http_request_duration_seconds_count",
+        method="GET",
+        route="/pulls/{number}",
+    )
+    assert _sample(text, "squire_http_requests_in_flight") == 1
+    assert _sample(text, "squire_sqlite_query_duration_seconds_count", statement="SELECT")
+    assert _sample(text, "squire_sqlite_connect_duration_seconds_count", mode="rw")
+    assert _sample(
+        text,
+        "squire_github_requests_total",
+        host="ghe.example.com",
+        endpoint="pulls",
+        method="GET",
+        status="200",
+    )
+    assert (
+        _sample(
+            text,
+            "squire_github_rate_limit_remaining",
+            token=token_fingerprint("ghp_metrics"),
+            resource="core",
+        )
+        == 4321
+    )
+    assert "ghp_metrics" not in text
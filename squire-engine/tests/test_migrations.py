@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sqlite3
+
+from squire import db
+from squire.config import Settings
+from squire.migrations import LATEST_VERSION, MIGRATIONS, migrate, schema_version
+from squire.timestamps import to_epoch_ms
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def test_connect_migrates_once_and_then_skips_ddl(tmp_path: Path) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        assert schema_version(conn) == LATEST_VERSION
+        statements: list[str] = []
+        conn.set_trace_callback(statements.append)
+        assert migrate(conn) == []
+        assert statements == ["PRAGMA user_version"]
+    finally:
+        conn.close()
+
+
+def test_legacy_database_is_upgraded_and_tokens_are_preserved(tmp_path: Path) -> None:
+    db_path = tmp_path / "squire.db"
+    legacy = sqlite3.connect(db_path)
+    legacy.executescript(
+        """
+        CREATE TABLE repositories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            full_name TEXT NOT NULL UNIQUE,
+            github_token TEXT,
+            is_active INTEGER NOT NULL DEFAULT 1 CHECK (is_active IN (0, 1)),
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            last_synced_at TEXT
+        );
+        INSERT INTO repositories (full_name, github_token, created_at, updated_at)
+        VALUES ('owner/repo', ' legacy-token ', '2026-01-01', '2026-01-01'),
+               ('owner/other', NULL, '2026-01-01', '2026-01-01');
+        """
+    )
+    legacy.close()
+
+    conn = db.connect(_settings_for(db_path))
+    try:
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(repositories)")}
+        assert "github_base_url" in columns
+        assert "github_token" not in columns
+        assert db.has_legacy_github_tokens(conn)
+        assert db.get_repository_legacy_github_token(conn, "owner/repo") == "legacy-token"
+        assert db.get_repository_legacy_github_token(conn, "owner/other") is None
+
+        assert db.clear_repository_legacy_github_token(conn, "owner/repo")
+        conn.commit()
+        assert not db.has_legacy_github_tokens(conn)
+    finally:
+        conn.close()
+
+
+def test_epoch_ms_backfill_orders_mixed_timestamp_formats(tmp_path: Path) -> None:
+    db_path = tmp_path / "squire.db"
+    old = sqlite3.connect(db_path)
+    old.execute("PRAGMA foreign_keys = ON")
+    for migration in MIGRATIONS:
+        if migration.version <= 12:
+            migration.apply(old)
+    old.execute("PRAGMA user_version = 12")
+    old.executescript(
+        """
+        INSERT INTO repositories (full_name, created_at, updated_at, last_synced_at)
+        VALUES ('owner/repo', '2026-01-01', '2026-01-01', '2026-03-02T09:30:00+00:00');
+        INSERT INTO pull_requests (
+            repo_id, number, title, author, state, head_branch, base_branch,
+            created_at, updated_at, synced_at
+        )
+        VALUES
+            (1, 1, 'GitHub format', 'a', 'open', 'h', 'main',
+             '2026-03-01T00:00:00Z', '2026-03-02T10:00:00Z', '2026-03-02T11:00:00+00:00'),
+            (1, 2, 'Offset format', 'a', 'open', 'h', 'main',
+             '2026-03-01T00:00:00Z', '2026-03-02T10:30:00+00:00', '2026-03-02T11:00:00+00:00'),
+            (1, 3, 'Non-UTC offset', 'a', 'open', 'h', 'main',
+             '2026-03-01T00:00:00Z', '2026-03-02T19:15:00+09:00', '2026-03-02T11:00:00+00:00');
+        """
+    )
+    old.commit()
+    old.close()
+
+    conn = db.connect(_settings_for(db_path))
+    try:
+        rows = conn.execute(
+            "SELECT number, updated_at, updated_at_ms FROM pull_requests ORDER BY number"
+        ).fetchall()
+        assert [row["updated_at_ms"] for row in rows] == [
+            to_epoch_ms(row["updated_at"]) for row in rows
+        ]
+        repository = db.get_repository(conn, "owner/repo")
+        assert repository["last_synced_at_ms"] == to_epoch_ms("2026-03-02T09:30:00Z")
+
+        # Text order would put `+09:00` (19:15 local, 10:15 UTC) last.
+        listed = db.list_pull_requests(conn, repo_full_name="owner/repo", state="all")
+        assert [row["number"] for row in listed] == [2, 3, 1]
+        since = db.list_pull_requests(
+            conn,
+            repo_full_name="owner/repo",
+            state="all",
+            updated_since_ms=to_epoch_ms("2026-03-02T10:15:00Z"),
+        )
+        assert [row["number"] for row in since] == [2, 3]
+    finally:
+        conn.close()
+
+
+def test_thread_comment_search_survives_vacuum_after_rekeying(tmp_path: Path) -> None:
+    db_path = tmp_path / "squire.db"
+    old = sqlite3.connect(db_path)
+    old.execute("PRAGMA foreign_keys = ON")
+    for migration in MIGRATIONS:
+        if migration.version <= 15:
+            migration.apply(old)
+    old.execute("PRAGMA user_version = 15")
+    old.executescript(
+        """
+        INSERT INTO repositories (full_name, created_at, updated_at)
+        VALUES ('owner/repo', '2026-01-01', '2026-01-01');
+        INSERT INTO review_threads (
+            id, repo_id, pull_number, is_resolved, is_outdated, synced_at
+        )
+        VALUES ('T1', 1, 7, 0, 0, '2026-03-01T00:00:00Z');
+        INSERT INTO review_thread_comments (id, thread_id, position, body)
+        VALUES ('C1', 'T1', 0, 'alpha retry loop'),
+               ('C2', 'T1', 1, 'bravo cache key'),
+               ('C3', 'T1', 2, 'charlie retry budget');
+        """
+    )
+    old.commit()
+    old.close()
+
+    conn = db.connect(_settings_for(db_path))
+    try:
+        conn.execute("DELETE FROM review_thread_comments WHERE id = 'C1'")
+        conn.commit()
+        conn.execute("VACUUM")
+
+        def search(term: str) -> list[str]:
+            rows = db.search_review_thread_comments(
+                conn, match=term, repo_full_name=None, state="all", limit=10
+            )
+            return [str(row["comment_id"]) for row in rows]
+
+        assert search("retry") == ["C3"]
+        assert search("cache") == ["C2"]
+        conn.execute(
+            "INSERT INTO review_thread_comments_fts (review_thread_comments_fts) "
+            "VALUES ('integrity-check')"
+        )
+    finally:
+        conn.close()
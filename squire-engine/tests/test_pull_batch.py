@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from squire import db
+import squire.api as api_module
+import squire.cli as cli_module
+from squire.config import Settings
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def _upsert_pull(conn, repo_id: int, number: int) -> int:
+    return db.upsert_pull_request(
+        conn,
+        repo_id=repo_id,
+        number=number,
+        title=f"PR {number}",
+        body=None,
+        author="dane-park",
+        state="open",
+        head_branch=f"feature/{number}",
+        base_branch="main",
+        changed_files=1,
+        reviewers_json="[]",
+        created_at="2026-03-01T00:00:00Z",
+        updated_at="2026-03-01T00:00:00Z",
+        synced_at="2026-03-01T00:00:00Z",
+    )
+
+
+def _statuses(db_path: Path) -> dict[int, str]:
+    conn = db.connect(_settings_for(db_path))
+    try:
+        rows = db.get_pull_requests_by_numbers(conn, "owner/repo", [1, 2, 3])
+    finally:
+        conn.close()
+    return {int(row["number"]): str(row["review_status"]) for row in rows}
+
+
+def test_batch_get_returns_details_statuses_and_reviews_for_many_pulls(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        repo_id, _ = db.upsert_repository(conn, "owner/repo")
+        first_id = _upsert_pull(conn, repo_id, 1)
+        _upsert_pull(conn, repo_id, 2)
+        _upsert_pull(conn, repo_id, 3)
+        db.insert_ai_reviews(
+            conn,
+            pull_request_id=first_id,
+            reviews=[
+                {
+                    "file_path": None,
+                    "line_number": None,
+                    "severity": severity,
+                    "body": body,
+                    "agent": "codex",
+                }
+                for severity, body in (("error", "널 체크 필요"), ("info", "이름 변경 제안"))
+            ],
+        )
+        db.set_review_status(conn, pull_request_id=first_id, status="in-progress")
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    client = TestClient(api_module.app)
+    params = {"repo": "owner/repo", "number": [2, 1, 99, 2]}
+    response = client.get("/pulls:batchGet", params=params)
+
+    assert response.status_code == 200, response.text
+    payload = response.json()
+    assert [item["pull_request"]["number"] for item in payload["items"]] == [2, 1]
+    assert payload["missing"] == [99]
+    assert [item["review_status"] for item in payload["items"]] == ["pending", "in-progress"]
+    assert payload["items"][0]["local_reviews"] == []
+    assert [review["body"] for review in payload["items"][1]["local_reviews"]] == [
+        "널 체크 필요",
+        "이름 변경 제안",
+    ]
+    cached = client.get(
+        "/pulls:batchGet",
+        params=params,
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert cached.status_code == 304
+
+    rejected = client.put(
+        "/pulls:batchReviewStatus",
+        params={"repo": "owner/repo"},
+        json={"items": [{"number": 2, "status": "done"}, {"number": 99, "status": "done"}]},
+    )
+    assert rejected.status_code == 404
+    assert "#99" in rejected.json()["detail"]
+    assert _statuses(db_path) == {1: "in-progress", 2: "pending", 3: "pending"}
+
+    updated = client.put(
+        "/pulls:batchReviewStatus",
+        params={"repo": "owner/repo"},
+        json={"items": [{"number": 2, "status": "done"}, {"number": 3, "status": "in-progress"}]},
+    )
+    assert updated.status_code == 200, updated.text
+    assert _statuses(db_path) == {1: "in-progress", 2: "done", 3: "in-progress"}
+    assert (
+        client.get(
+            "/pulls:batchGet",
+            params=params,
+            headers={"If-None-Match": response.headers["ETag"]},
+        ).status_code
+        == 200
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli_module.app,
+        ["review", "status", "1", "2", "3", "--repo", "owner/repo", "--set", "done"],
+    )
+    assert result.exit_code == 0, result.output
+    assert "#1, #2, #3" in result.output
+    assert _statuses(db_path) == {1: "done", 2: "done", 3: "done"}
+
+    missing = runner.invoke(
+        cli_module.app,
+        ["review", "status", "1", "42", "--repo", "owner/repo", "--set", "pending"],
+    )
+    assert missing.exit_code == 1
+    assert _statuses(db_path)[1] == "done"
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from squire import db
+import squire.api as api_module
+import squire.cli as cli_module
+from squire.config import Settings
+
+
+def _commit_payload(sha: str, parent: str | None, date: str, message: str) -> dict[str, object]:
+    return {
+        "sha": sha,
+        "parents": [{"sha": parent}] if parent else [],
+        "author": {"login": "dane-park"},
+        "commit": {
+            "message": message,
+            "author": {"name": "Dane Park", "date": date},
+            "committer": {"name": "Dane Park", "date": date},
+        },
+    }
+
+
+class FakeCommitsGitHubClient:
+    def __init__(self) -> None:
+        self.commits = [
+            _commit_payload("a" * 40, None, "2026-03-01T10:00:00Z", "첫 커밋"),
+            _commit_payload("b" * 40, "a" * 40, "2026-03-02T10:00:00Z", "두 번째 커밋"),
+        ]
+        self.calls: list[str] = []
+
+    def __enter__(self) -> "FakeCommitsGitHubClient":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def get_pull_request_activity(self, repo_full_name: str, number: int) -> dict[str, object]:
+        self.calls.append("activity")
+        return {
+            "viewer_login": "dane-park",
+            "updated_at": "2026-03-02T10:00:00Z",
+            "head_ref_oid": self.commits[-1]["sha"],
+        }
+
+    def list_pull_commits(self, repo_full_name: str, number: int) -> list[dict[str, object]]:
+        self.calls.append("list")
+        return list(self.commits)
+
+    def compare_commits(self, repo_full_name: str, base: str, head: str) -> dict[str, object]:
+        self.calls.append("compare")
+        shas = [item["sha"] for item in self.commits]
+        new_commits = self.commits[shas.index(base) + 1 :]
+        return {
+            "status": "ahead",
+            "total_commits": len(new_commits),
+            "commits": new_commits,
+        }
+
+    def get_commit(self, repo_full_name: str, ref: str) -> dict[str, object]:
+        self.calls.append("get_commit")
+        raise AssertionError(f"commit `{ref}` should resolve locally")
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def test_commits_are_cached_and_refreshed_incrementally(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    repo_full_name = "owner/repo"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        db.upsert_repository(conn, repo_full_name)
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    fake_github = FakeCommitsGitHubClient()
+    monkeypatch.setattr(
+        cli_module,
+        "_open_github_client_for_repo",
+        lambda conn, repo: fake_github,
+    )
+    monkeypatch.setattr(
+        api_module,
+        "open_github_client_for_repo",
+        lambda conn, repo: fake_github,
+    )
+
+    runner = CliRunner()
+    args = ["commits", "39", "--repo", repo_full_name, "--json"]
+    first = runner.invoke(cli_module.app, args)
+    second = runner.invoke(cli_module.app, args)
+
+    assert first.exit_code == 0, first.output
+    assert second.exit_code == 0, second.output
+    assert [item["sha"] for item in json.loads(second.output)["items"]] == [
+        "a" * 40,
+        "b" * 40,
+    ]
+    assert fake_github.calls == ["activity", "list", "activity"]
+
+    fake_github.commits.append(
+        _commit_payload("c" * 40, "b" * 40, "2026-03-03T10:00:00Z", "세 번째 커밋")
+    )
+    fake_github.calls.clear()
+    third = runner.invoke(cli_module.app, [*args, "--since", "aaaaaaa"])
+
+    assert third.exit_code == 0, third.output
+    payload = json.loads(third.output)
+    assert [item["sha"] for item in payload["items"]] == ["b" * 40, "c" * 40]
+    assert payload["items"][1]["parents"] == ["b" * 40]
+    assert fake_github.calls == ["activity", "compare"]
+
+    fake_github.calls.clear()
+    client = TestClient(api_module.app)
+    response = client.get(
+        "/pulls/39/commits",
+        params={"repo": repo_full_name, "since": "b" * 40},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["head_sha"] == "c" * 40
+    assert [item["message"] for item in response.json()["items"]] == ["세 번째 커밋"]
+    assert fake_github.calls == []
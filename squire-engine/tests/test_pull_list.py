@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from squire import db
+import squire.api as api_module
+import squire.cli as cli_module
+from squire.config import Settings
+from squire.sync import upsert_pull_request_from_github
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def _seed(db_path: Path) -> None:
+    conn = db.connect(_settings_for(db_path))
+    try:
+        repo_id, _ = db.upsert_repository(conn, "owner/repo")
+        # PRs 3 and 4 share a timestamp so the id tiebreak is exercised.
+        updated_day = {1: 1, 2: 2, 3: 3, 4: 3, 5: 5, 6: 6, 7: 7}
+        for number in range(1, 8):
+            pull_request_id = db.upsert_pull_request(
+                conn,
+                repo_id=repo_id,
+                number=number,
+                title=f"PR {number}",
+                body=None,
+                author="dane-park" if number % 2 else "someone-else",
+                state="open",
+                head_branch=f"feature/{number}",
+                base_branch="release" if number == 7 else "main",
+                changed_files=1,
+                reviewers_json=json.dumps(["reviewer-a"] if number in (2, 5) else []),
+                created_at="2026-03-01T00:00:00Z",
+                updated_at=f"2026-03-0{updated_day[number]}T00:00:00Z",
+                synced_at="2026-03-09T00:00:00Z",
+            )
+            db.replace_pull_request_reviewers(
+                conn,
+                pull_request_id=pull_request_id,
+                reviewers=["reviewer-a"] if number in (2, 5) else [],
+                updated_at="2026-03-09T00:00:00Z",
+            )
+            if number == 5:
+                db.set_review_status(conn, pull_request_id=pull_request_id, status="done")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_list_pages_with_keyset_cursor_and_filters(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "squire.db"
+    _seed(db_path)
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    client = TestClient(api_module.app)
+    seen: list[int] = []
+    cursor: str | None = None
+    while True:
+        params: dict[str, object] = {"repo": "owner/repo", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/pulls", params=params)
+        assert response.status_code == 200, response.text
+        seen.extend(item["number"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+    def numbers(**params: object) -> list[int]:
+        response = client.get("/pulls", params={"repo": "owner/repo", **params})
+        assert response.status_code == 200, response.text
+        return [item["number"] for item in response.json()]
+
+    assert numbers(author="someone-else") == [6, 4, 2]
+    assert numbers(reviewer="reviewer-a") == [5, 2]
+    assert numbers(review_status="done") == [5]
+    assert numbers(base="release") == [7]
+    assert numbers(updated_since="2026-03-05T00:00:00+00:00") == [7, 6, 5]
+    assert client.get("/pulls", params={"cursor": "not-a-cursor"}).status_code == 400
+
+    # Without `limit` or `cursor` the list stays unbounded for clients that never page.
+    monkeypatch.setattr(api_module, "PULLS_PAGE_SIZE", 2)
+    unbounded = client.get("/pulls", params={"repo": "owner/repo"})
+    assert len(unbounded.json()) == 7
+    assert "X-Next-Cursor" not in unbounded.headers
+
+    runner = CliRunner()
+    everything = runner.invoke(cli_module.app, ["list", "--repo", "owner/repo"])
+    assert everything.exit_code == 0, everything.output
+    assert len(everything.output.splitlines()) == 7
+    first = runner.invoke(cli_module.app, ["list", "--repo", "owner/repo", "--limit", "4"])
+    assert first.exit_code == 0, first.output
+    lines = first.output.splitlines()
+    assert [line.split()[0] for line in lines[:4]] == [
+        "owner/repo#7",
+        "owner/repo#6",
+        "owner/repo#5",
+        "owner/repo#4",
+    ]
+    next_cursor = lines[-1].removeprefix("next: --cursor ")
+    second = runner.invoke(
+        cli_module.app,
+        ["list", "--repo", "owner/repo", "--limit", "4", "--cursor", next_cursor],
+    )
+    assert second.exit_code == 0, second.output
+    assert [line.split()[0] for line in second.output.splitlines()] == [
+        "owner/repo#3",
+        "owner/repo#2",
+        "owner/repo#1",
+    ]
+
+
+def _github_detail(number: int, users: list[str], teams: list[str]) -> dict[str, object]:
+    return {
+        "number": number,
+        "title": f"PR {number}",
+        "state": "open",
+        "user": {"login": "dane-park"},
+        "head": {"ref": f"feature/{number}"},
+        "base": {"ref": "main"},
+        "requested_reviewers": [{"login": login} for login in users],
+        "requested_teams": [{"slug": slug} for slug in teams],
+        "created_at": "2026-03-01T00:00:00Z",
+        "updated_at": f"2026-03-0{number}T00:00:00Z",
+    }
+
+
+def test_reviewer_queue_tracks_github_review_requests(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        repo_id, _ = db.upsert_repository(conn, "owner/repo")
+        for detail in (
+            _github_detail(1, ["Me"], []),
+            _github_detail(2, ["someone"], ["platform"]),
+            _github_detail(3, ["me", "someone"], []),
+        ):
+            upsert_pull_request_from_github(
+                conn, repo_full_name="owner/repo", detail=detail, repo_id=repo_id
+            )
+        # The review request on PR 3 was fulfilled or withdrawn.
+        pull_request_id = upsert_pull_request_from_github(
+            conn,
+            repo_full_name="owner/repo",
+            detail=_github_detail(3, ["someone"], []),
+            repo_id=repo_id,
+        )
+        conn.commit()
+        states = {
+            row["reviewer"]: row["state"]
+            for row in db.list_pull_request_reviewers(conn, pull_request_id=pull_request_id)
+        }
+        assert states == {"me": "cleared", "someone": "requested"}
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    result = CliRunner().invoke(
+        cli_module.app,
+        ["list", "--repo", "owner/repo", "--reviewer", "me", "--reviewer", "team:platform"],
+    )
+    assert result.exit_code == 0, result.output
+    assert [line.split()[0] for line in result.output.splitlines()] == [
+        "owner/repo#2",
+        "owner/repo#1",
+    ]
+
+    response = TestClient(api_module.app).get(
+        "/pulls",
+        params={"repo": "owner/repo", "reviewer": "someone"},
+    )
+    assert [item["number"] for item in response.json()] == [3, 2]
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from squire import db
+import squire.api as api_module
+from squire.config import Settings
+from squire.content_encoding import negotiate_encoding
+
+
+class FakeCommentsGitHubClient:
+    def __init__(self, comments: list[dict[str, object]]) -> None:
+        self.comments = comments
+
+    def __enter__(self) -> "FakeCommentsGitHubClient":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def list_issue_comments(self, repo_full_name: str, number: int) -> list[dict[str, object]]:
+        return self.comments
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def test_negotiate_encoding_honours_q_values() -> None:
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip, deflate, br") == "gzip"
+    assert negotiate_encoding("gzip;q=0, br") is None
+    assert negotiate_encoding("br;q=1.0, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("*") in {"zstd", "gzip"}
+
+
+def test_large_json_responses_are_compressed_and_small_ones_are_not(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        db.upsert_repository(conn, "owner/repo")
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    comments = [
+        {"id": index, "body": f"리뷰 코멘트 {index}", "user": {"login": "dane-park"}}
+        for index in range(200)
+    ]
+    monkeypatch.setattr(
+        api_module,
+        "open_github_client_for_repo",
+        lambda conn, repo: FakeCommentsGitHubClient(comments),
+    )
+
+    client = TestClient(api_module.app)
+    response = client.get(
+        "/pulls/5/comments",
+        params={"repo": "owner/repo"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json() == comments
+
+    small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert small.status_code == 200
+    assert "content-encoding" not in small.headers
+
+    plain = client.get(
+        "/pulls/5/comments",
+        params={"repo": "owner/repo"},
+        headers={"Accept-Encoding": "identity"},
+    )
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == comments
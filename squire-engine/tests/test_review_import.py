@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from squire import db
+import squire.api as api_module
+import squire.cli as cli_module
+from squire.config import Settings
+from squire.review_import import parse_sarif_reviews
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def _seed(db_path: Path) -> int:
+    conn = db.connect(_settings_for(db_path))
+    try:
+        repo_id, _ = db.upsert_repository(conn, "owner/repo")
+        pull_request_id = db.upsert_pull_request(
+            conn,
+            repo_id=repo_id,
+            number=12,
+            title="Bulk import",
+            body=None,
+            author="dane-park",
+            state="open",
+            head_branch="feature/import",
+            base_branch="main",
+            changed_files=1,
+            reviewers_json="[]",
+            created_at="2026-03-01T00:00:00Z",
+            updated_at="2026-03-01T00:00:00Z",
+            synced_at="2026-03-01T00:00:00Z",
+        )
+        conn.commit()
+        return pull_request_id
+    finally:
+        conn.close()
+
+
+def _review_count(db_path: Path, pull_request_id: int) -> int:
+    conn = db.connect(_settings_for(db_path))
+    try:
+        return len(db.list_ai_reviews(conn, pull_request_id=pull_request_id))
+    finally:
+        conn.close()
+
+
+def test_review_import_ndjson_reports_invalid_rows(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "squire.db"
+    pull_request_id = _seed(db_path)
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    lines = [
+        json.dumps(
+            {
+                "file_path": "src/app.py",
+                "line_number": index + 1,
+                "severity": "warning",
+                "body": f"finding {index}",
+            }
+        )
+        for index in range(1000)
+    ]
+    lines.insert(10, json.dumps({"body": "", "severity": "warning"}))
+    lines.append("{not json")
+    source = tmp_path / "findings.ndjson"
+    source.write_text("\n".join(lines), encoding="utf-8")
+
+    result = CliRunner().invoke(
+        cli_module.app,
+        ["review", "import", "12", "--repo", "owner/repo", "--file", str(source), "--json"],
+    )
+
+    assert result.exit_code == 1, result.output
+    payload = json.loads(result.output)
+    assert payload["total"] == 1002
+    assert payload["inserted"] == 1000
+    assert [error["index"] for error in payload["errors"]] == [11, 1002]
+    assert _review_count(db_path, pull_request_id) == 1000
+
+
+def test_local_reviews_batch_endpoint_accepts_sarif(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "squire.db"
+    pull_request_id = _seed(db_path)
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    sarif = {
+        "version": "2.1.0",
+        "runs": [
+            {
+                "tool": {"driver": {"name": "semgrep"}},
+                "results": [
+                    {
+                        "ruleId": "py.sql-injection",
+                        "level": "error",
+                        "message": {"text": "Query built from user input."},
+                        "locations": [
+                            {
+                                "physicalLocation": {
+                                    "artifactLocation": {"uri": "src/db.py"},
+                                    "region": {"startLine": 42},
+                                }
+                            }
+                        ],
+                    },
+                    {"level": "note", "message": {"text": "Consider a docstring."}},
+                    {"level": "fatal", "message": {"text": "unknown level"}},
+                ],
+            }
+        ],
+    }
+    client = TestClient(api_module.app)
+    url = "/pulls/12/local-reviews:batch"
+
+    rejected = client.post(
+        url,
+        params={"repo": "owner/repo", "strict": "true"},
+        content=json.dumps(sarif),
+    )
+    assert rejected.status_code == 422, rejected.text
+    assert _review_count(db_path, pull_request_id) == 0
+
+    response = client.post(url, params={"repo": "owner/repo"}, content=json.dumps(sarif))
+    assert response.status_code == 200, response.text
+    assert response.json()["inserted"] == 2
+    assert [error["index"] for error in response.json()["errors"]] == [3]
+
+    reviews = client.get("/pulls/12/local-reviews", params={"repo": "owner/repo"}).json()
+    by_severity = {item["severity"]: item for item in reviews["items"]}
+    assert by_severity["error"]["body"] == "[py.sql-injection] Query built from user input."
+    assert (by_severity["error"]["file_path"], by_severity["error"]["line_number"]) == (
+        "src/db.py",
+        42,
+    )
+    assert by_severity["error"]["agent"] == "semgrep"
+    assert by_severity["info"]["file_path"] is None
+
+
+def test_sarif_with_malformed_objects_reports_row_errors() -> None:
+    document = {
+        "runs": [
+            {"tool": "x", "results": []},
+            {
+                "tool": {"driver": "x"},
+                "results": [
+                    {
+                        "message": {"text": "bad location"},
+                        "locations": [{"physicalLocation": "src/app.py"}],
+                    },
+                    {
+                        "message": {"text": "bad region"},
+                        "locations": [{"physicalLocation": {"region": 3}}],
+                    },
+                    {"message": {"text": "bad level"}, "level": ["error"]},
+                    {"message": {"text": "fine"}, "locations": [{}]},
+                ],
+            },
+            {"results": "nope"},
+        ]
+    }
+
+    batch = parse_sarif_reviews(document, default_agent="sarif")
+
+    assert [review["body"] for review in batch.reviews] == ["fine"]
+    assert batch.reviews[0]["agent"] == "sarif"
+    assert batch.errors == [
+        {"index": 1, "error": "`physicalLocation` must be an object"},
+        {"index": 2, "error": "`region` must be an object"},
+        {"index": 3, "error": "`level` must be one of error, warning, note, none"},
+    ]
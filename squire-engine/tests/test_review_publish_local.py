@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import httpx
 from typer.testing import CliRunner
 
 from squire import db
 import squire.cli as cli_module
 from squire.config import Settings
+from squire.diff_index import build_file_diff_index, get_pull_diff_index
 from squire.review_comments import resolve_inline_comment_target
 
 
@@ -16,6 +18,9 @@ class FakeReviewPublishGitHubClient:
         self.status_code_for_inline = status_code_for_inline
         self.inline_comments: list[dict[str, object]] = []
         self.issue_comments: list[dict[str, object]] = []
+        self.reviews: list[dict[str, object]] = []
+        self.drop_response_after_inline = False
+        self.server_error_after_issue_comment = False
 
     def __enter__(self) -> "FakeReviewPublishGitHubClient":
         return self
@@ -65,23 +70,64 @@ class FakeReviewPublishGitHubClient:
             "side": side,
         }
         self.inline_comments.append(payload)
+        if self.drop_response_after_inline:
+            self.drop_response_after_inline = False
+            raise httpx.ReadTimeout("connection dropped after write")
         return {
             "id": 9001,
             "html_url": "https://github.example.com/owner/repo/pull/42#discussion_r9001",
         }
 
+    def list_issue_comments(
+        self, repo_full_name: str, issue_number: int
+    ) -> list[dict[str, object]]:
+        return [
+            {"id": 7001 + index, "body": item["body"]}
+            for index, item in enumerate(self.issue_comments)
+        ]
+
+    def list_pull_review_comments(
+        self, repo_full_name: str, number: int
+    ) -> list[dict[str, object]]:
+        return [
+            {"id": 9001 + index, "body": item["body"]}
+            for index, item in enumerate(self.inline_comments)
+        ]
+
+    def create_pull_review(
+        self,
+        repo_full_name: str,
+        number: int,
+        *,
+        commit_id: str,
+        body: str,
+        comments: list[dict[str, object]],
+    ) -> dict[str, object]:
+        self.reviews.append(
+            {"commit_id": commit_id, "body": body, "comments": comments}
+        )
+        return {
+            "id": 5001,
+            "html_url": "https://github.example.com/owner/repo/pull/42#pullrequestreview-5001",
+        }
+
     def create_issue_comment(
         self,
         repo_full_name: str,
         issue_number: int,
         body: str,
     ) -> dict[str, object]:
+        if len(body) > 65536:
+            raise cli_module.GitHubError("Body is too long", status_code=422)
         payload = {
             "repo_full_name": repo_full_name,
             "issue_number": issue_number,
             "body": body,
         }
         self.issue_comments.append(payload)
+        if self.server_error_after_issue_comment:
+            self.server_error_after_issue_comment = False
+            raise cli_module.GitHubError("bad gateway", status_code=502)
         return {
             "id": 7001,
             "html_url": "https://github.example.com/owner/repo/pull/42#issuecomment-7001",
@@ -158,6 +204,37 @@ def test_resolve_inline_comment_target_prefers_right_side() -> None:
     assert target.side == "RIGHT"
 
 
+def test_file_diff_index_maps_lines_and_positions_across_hunks() -> None:
+    index = build_file_diff_index(
+        "src/main.py",
+        "@@ -1,3 +1,3 @@\n keep\n-old\n+new\n keep\n"
+        "@@ -20,2 +20,3 @@\n ctx\n+added\n ctx\n",
+    )
+
+    assert [hunk.new_start for hunk in index.hunks] == [1, 20]
+    assert index.match_line(2).side == "RIGHT"
+    assert index.match_line(2).position == 3
+    assert index.match_line(21).position == 7
+    assert index.match_line(10) is None
+
+    removed = build_file_diff_index("a.py", "@@ -5,2 +5,1 @@\n kept\n-gone\n")
+    assert removed.match_line(5).side == "RIGHT"
+    assert removed.match_line(6).side == "LEFT"
+    assert removed.match_line(6).position == 2
+
+
+def test_pull_diff_index_is_cached_per_head_and_base_sha() -> None:
+    pull_request = {"head": {"sha": "head-1"}, "base": {"sha": "base-1"}}
+    files = [{"filename": "src/main.py", "patch": "@@ -1 +1 @@\n-a\n+b\n"}]
+
+    first = get_pull_diff_index(pull_request, files)
+    second = get_pull_diff_index(pull_request, [])
+
+    assert first is not None
+    assert second is first
+    assert first.match_line("src/main.py", 1).side == "RIGHT"
+
+
 def test_review_publish_local_posts_inline_comment_when_diff_line_matches(
     tmp_path: Path,
     monkeypatch,
@@ -230,3 +307,345 @@ def test_review_publish_local_falls_back_to_pr_comment_when_line_unmapped(
     assert len(fake_github.inline_comments) == 0
     assert len(fake_github.issue_comments) == 1
     assert "src/main.py:99" in str(fake_github.issue_comments[0]["body"])
+
+
+def test_review_publish_local_batch_sends_one_review_and_one_summary(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    repo_full_name = "owner/repo"
+    _seed_review(
+        db_path,
+        repo_full_name=repo_full_name,
+        number=42,
+        file_path="src/main.py",
+        line_number=11,
+    )
+    conn = db.connect(_settings_for(db_path))
+    try:
+        pull_request = db.get_pull_request_by_repo_and_number(conn, repo_full_name, 42)
+        for line_number in (10, 99):
+            db.insert_ai_review(
+                conn,
+                pull_request_id=pull_request["id"],
+                file_path="src/main.py",
+                line_number=line_number,
+                severity="info",
+                body=f"line {line_number}",
+                agent="codex",
+            )
+        db.insert_ai_review(
+            conn,
+            pull_request_id=pull_request["id"],
+            file_path=None,
+            line_number=None,
+            severity="info",
+            body="전체 구조 의견",
+            agent="codex",
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+    monkeypatch.setenv("SQUIRE_PUBLISH_INTERVAL", "0")
+
+    fake_github = FakeReviewPublishGitHubClient(
+        patch="@@ -10,2 +10,3 @@\n context\n+new_value\n tail\n",
+    )
+    monkeypatch.setattr(
+        cli_module,
+        "_open_github_client_for_repo",
+        lambda conn, repo: fake_github,
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli_module.app,
+        ["review", "publish-local", "42", "--repo", repo_full_name, "--all", "--batch"],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert fake_github.inline_comments == []
+    assert len(fake_github.reviews) == 1
+    review = fake_github.reviews[0]
+    assert review["commit_id"] == "abc123def"
+    assert [(item["line"], item["side"]) for item in review["comments"]] == [
+        (11, "RIGHT"),
+        (10, "RIGHT"),
+    ]
+    assert len(fake_github.issue_comments) == 1
+    summary = str(fake_github.issue_comments[0]["body"])
+    assert "src/main.py:99" in summary
+    assert "전체 구조 의견" in summary
+
+
+def test_review_publish_local_never_reposts_after_interrupted_run(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    repo_full_name = "owner/repo"
+    first_id = _seed_review(
+        db_path,
+        repo_full_name=repo_full_name,
+        number=42,
+        file_path="src/main.py",
+        line_number=11,
+    )
+    conn = db.connect(_settings_for(db_path))
+    try:
+        pull_request = db.get_pull_request_by_repo_and_number(conn, repo_full_name, 42)
+        second_id = db.insert_ai_review(
+            conn,
+            pull_request_id=pull_request["id"],
+            file_path="src/main.py",
+            line_number=10,
+            severity="info",
+            body="두 번째 의견",
+            agent="codex",
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+    monkeypatch.setenv("SQUIRE_PUBLISH_INTERVAL", "0")
+
+    fake_github = FakeReviewPublishGitHubClient(
+        patch="@@ -10,2 +10,3 @@\n context\n+new_value\n tail\n",
+    )
+    fake_github.drop_response_after_inline = True
+    monkeypatch.setattr(
+        cli_module,
+        "_open_github_client_for_repo",
+        lambda conn, repo: fake_github,
+    )
+
+    runner = CliRunner()
+    args = ["review", "publish-local", "42", "--repo", repo_full_name, "--all"]
+    crashed = runner.invoke(cli_module.app, args)
+    # The timeout is reported, not raised; the other comment is still delivered.
+    assert crashed.exit_code == 1
+    assert isinstance(crashed.exception, SystemExit)
+    assert "1 of 2" in crashed.output
+    assert len(fake_github.inline_comments) == 2
+
+    rerun = runner.invoke(cli_module.app, args)
+    again = runner.invoke(cli_module.app, args)
+
+    assert rerun.exit_code == 0, rerun.output
+    assert again.exit_code == 0, again.output
+    assert [item["body"] for item in fake_github.inline_comments] == [
+        f"[AI Review]\n\n[warning] 경계값 확인 필요\n\n(agent=codex, local_review_id={first_id})",
+        f"[AI Review]\n\n[info] 두 번째 의견\n\n(agent=codex, local_review_id={second_id})",
+    ]
+
+    conn = db.connect(_settings_for(db_path))
+    try:
+        deliveries = db.list_review_publish_outbox(
+            conn, pull_request_id=pull_request["id"]
+        )
+    finally:
+        conn.close()
+    assert [(row["state"], row["delivery_kind"]) for row in deliveries] == [
+        ("delivered", "inline"),
+        ("delivered", "inline"),
+    ]
+
+
+def test_outbox_rows_are_claimed_once(tmp_path: Path) -> None:
+    db_path = tmp_path / "squire.db"
+    review_id = _seed_review(
+        db_path,
+        repo_full_name="owner/repo",
+        number=42,
+        file_path="src/main.py",
+        line_number=11,
+    )
+    first = db.connect(_settings_for(db_path))
+    second = db.connect(_settings_for(db_path))
+    try:
+        db.enqueue_review_publish(first, ai_review_ids=[review_id], prefix="", batch=False)
+        first.commit()
+        # Both drainers read the same due row before either claims it.
+        seen = [db.list_due_review_publish(conn, now=db.utcnow_iso()) for conn in (first, second)]
+        claims = [
+            (int(row["outbox_id"]), str(row["state"]), row["outbox_next_attempt_at"])
+            for row in seen[0]
+        ]
+        assert db.claim_review_publish(first, claims, lease_until="2999-01-01T00:00:00+00:00")
+        first.commit()
+        assert not db.claim_review_publish(
+            second, claims, lease_until="2999-01-01T00:00:00+00:00"
+        )
+        second.rollback()
+        # An in-flight row is not due again until its lease expires.
+        assert db.list_due_review_publish(second, now=db.utcnow_iso()) == []
+    finally:
+        first.close()
+        second.close()
+
+
+def test_review_publish_local_checks_github_before_resending_after_5xx(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    review_id = _seed_review(
+        db_path,
+        repo_full_name="owner/repo",
+        number=42,
+        file_path="src/other.py",
+        line_number=1,
+    )
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+    monkeypatch.setenv("SQUIRE_PUBLISH_INTERVAL", "0")
+    fake_github = FakeReviewPublishGitHubClient(patch=None)
+    fake_github.server_error_after_issue_comment = True
+    monkeypatch.setattr(cli_module, "_open_github_client_for_repo", lambda conn, repo: fake_github)
+
+    runner = CliRunner()
+    args = ["review", "publish-local", "42", "--repo", "owner/repo", "--all"]
+    failed = runner.invoke(cli_module.app, args)
+    assert failed.exit_code == 1
+
+    conn = db.connect(_settings_for(db_path))
+    try:
+        pull_request = db.get_pull_request_by_repo_and_number(conn, "owner/repo", 42)
+        (row,) = db.list_review_publish_outbox(conn, pull_request_id=pull_request["id"])
+    finally:
+        conn.close()
+    assert row["state"] == "sending"
+
+    rerun = runner.invoke(cli_module.app, args)
+    assert rerun.exit_code == 0, rerun.output
+    assert len(fake_github.issue_comments) == 1
+    assert f"local_review_id={review_id})" in str(fake_github.issue_comments[0]["body"])
+
+
+class FlakyIssueCommentGitHubClient(FakeReviewPublishGitHubClient):
+    """Answers every issue comment with a 502; only the last one actually lands."""
+
+    def __init__(self, *, server_errors: int) -> None:
+        super().__init__(patch=None)
+        self.server_errors = server_errors
+        self.calls: list[str] = []
+
+    def list_issue_comments(
+        self, repo_full_name: str, issue_number: int
+    ) -> list[dict[str, object]]:
+        self.calls.append("list")
+        return super().list_issue_comments(repo_full_name, issue_number)
+
+    def create_issue_comment(
+        self,
+        repo_full_name: str,
+        issue_number: int,
+        body: str,
+    ) -> dict[str, object]:
+        self.calls.append("post")
+        self.server_errors -= 1
+        if self.server_errors > 0:
+            raise cli_module.GitHubError("bad gateway", status_code=502)
+        super().create_issue_comment(repo_full_name, issue_number, body)
+        raise cli_module.GitHubError("bad gateway", status_code=502)
+
+
+def test_review_publish_local_reconciles_uncertain_rows_after_attempts_run_out(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    review_id = _seed_review(
+        db_path,
+        repo_full_name="owner/repo",
+        number=42,
+        file_path="src/other.py",
+        line_number=1,
+    )
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+    monkeypatch.setenv("SQUIRE_PUBLISH_INTERVAL", "0")
+    fake_github = FlakyIssueCommentGitHubClient(server_errors=5)
+    monkeypatch.setattr(cli_module, "_open_github_client_for_repo", lambda conn, repo: fake_github)
+
+    runner = CliRunner()
+    args = ["review", "publish-local", "42", "--repo", "owner/repo", "--all"]
+    for _ in range(5):
+        assert runner.invoke(cli_module.app, args).exit_code == 1
+    # The fifth 502 was a lie: the comment exists, but the row ran out of attempts.
+    assert fake_github.calls.count("post") == 5
+    assert len(fake_github.issue_comments) == 1
+
+    conn = db.connect(_settings_for(db_path))
+    try:
+        pull_request = db.get_pull_request_by_repo_and_number(conn, "owner/repo", 42)
+        (row,) = db.list_review_publish_outbox(conn, pull_request_id=pull_request["id"])
+    finally:
+        conn.close()
+    assert (row["state"], row["uncertain"]) == ("failed", 1)
+
+    fake_github.calls.clear()
+    rerun = runner.invoke(cli_module.app, args)
+    assert rerun.exit_code == 0, rerun.output
+    assert fake_github.calls == ["list"]
+    assert len(fake_github.issue_comments) == 1
+    assert f"local_review_id={review_id})" in str(fake_github.issue_comments[0]["body"])
+
+
+def test_review_publish_local_splits_oversize_summary(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "squire.db"
+    first_id = _seed_review(
+        db_path,
+        repo_full_name="owner/repo",
+        number=42,
+        file_path="src/other.py",
+        line_number=1,
+    )
+    conn = db.connect(_settings_for(db_path))
+    try:
+        pull_request = db.get_pull_request_by_repo_and_number(conn, "owner/repo", 42)
+        review_ids = [first_id]
+        for index in range(160):
+            review_ids.append(
+                db.insert_ai_review(
+                    conn,
+                    pull_request_id=pull_request["id"],
+                    file_path=None,
+                    line_number=None,
+                    severity="info",
+                    body=f"finding {index} " + "x" * 800,
+                    agent="codex",
+                )
+            )
+        review_ids.append(
+            db.insert_ai_review(
+                conn,
+                pull_request_id=pull_request["id"],
+                file_path=None,
+                line_number=None,
+                severity="error",
+                body="y" * 70000,
+                agent="codex",
+            )
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+    monkeypatch.setenv("SQUIRE_PUBLISH_INTERVAL", "0")
+    fake_github = FakeReviewPublishGitHubClient(patch=None)
+    monkeypatch.setattr(cli_module, "_open_github_client_for_repo", lambda conn, repo: fake_github)
+
+    result = CliRunner().invoke(
+        cli_module.app,
+        ["review", "publish-local", "42", "--repo", "owner/repo", "--all", "--batch"],
+    )
+
+    assert result.exit_code == 0, result.output
+    bodies = [str(item["body"]) for item in fake_github.issue_comments]
+    assert len(bodies) > 2
+    assert all(len(body) <= 65536 for body in bodies)
+    for review_id in review_ids:
+        marker = f"local_review_id={review_id})"
+        assert sum(marker in body for body in bodies) == 1
+    assert "…(truncated)" in bodies[-1]
@@ -5,7 +5,10 @@ from pathlib import Path
 
 from typer.testing import CliRunner
 
+from fastapi.testclient import TestClient
+
 from squire import db
+import squire.api as api_module
 import squire.cli as cli_module
 from squire.config import Settings
 from squire.github import build_graphql_url
@@ -13,6 +16,8 @@ from squire.github import build_graphql_url
 
 class FakeReviewThreadsGitHubClient:
     def __init__(self) -> None:
+        self.pr_updated_at = "2026-03-09T12:00:00Z"
+        self.thread_listings = 0
         self.threads = [
             {
                 "id": "thread-1",
@@ -99,11 +104,23 @@ class FakeReviewThreadsGitHubClient:
     def __exit__(self, *_: object) -> None:
         return None
 
+    def get_pull_request_activity(
+        self,
+        repo_full_name: str,
+        number: int,
+    ) -> dict[str, object]:
+        return {
+            "viewer_login": "dane-park",
+            "updated_at": self.pr_updated_at,
+            "head_ref_oid": "head-sha",
+        }
+
     def list_pull_review_threads(
         self,
         repo_full_name: str,
         number: int,
     ) -> dict[str, object]:
+        self.thread_listings += 1
         return {
             "viewer_login": "dane-park",
             "head_ref_oid": "head-sha",
@@ -247,3 +264,99 @@ def test_review_thread_show_outputs_json_payload(
     payload = json.loads(result.output)
     assert payload["thread"]["id"] == "thread-1"
     assert payload["thread"]["reply_count"] == 1
+
+
+def test_review_threads_are_served_from_store_until_pr_changes(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    repo_full_name = "owner/repo"
+    _seed_repo(db_path, repo_full_name)
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    fake_github = FakeReviewThreadsGitHubClient()
+    monkeypatch.setattr(
+        cli_module,
+        "_open_github_client_for_repo",
+        lambda conn, repo: fake_github,
+    )
+
+    runner = CliRunner()
+    args = ["review-threads", "39", "--repo", repo_full_name, "--json"]
+    first = runner.invoke(cli_module.app, args)
+    second = runner.invoke(cli_module.app, args)
+
+    assert first.exit_code == 0, first.output
+    assert second.exit_code == 0, second.output
+    assert json.loads(first.output) == json.loads(second.output)
+    assert fake_github.thread_listings == 1
+
+    fake_github.pr_updated_at = "2026-03-10T00:00:00Z"
+    fake_github.threads = fake_github.threads[:1]
+    third = runner.invoke(cli_module.app, args)
+
+    assert third.exit_code == 0, third.output
+    assert fake_github.thread_listings == 2
+    assert [item["id"] for item in json.loads(third.output)["items"]] == ["thread-1"]
+
+    client = TestClient(api_module.app)
+    response = client.get(
+        "/pulls/39/review-threads",
+        params={"repo": repo_full_name, "author": "DANE-PARK", "file": "src/main.py"},
+    )
+    assert response.status_code == 200, response.text
+    payload = response.json()
+    assert payload["viewer_login"] == "dane-park"
+    assert [item["id"] for item in payload["items"]] == ["thread-1"]
+    assert [item["id"] for item in payload["items"][0]["comments"]] == [
+        "comment-1",
+        "comment-2",
+    ]
+
+
+def test_inbox_collects_authored_and_mentioned_unresolved_threads(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    repo_full_name = "owner/repo"
+    _seed_repo(db_path, repo_full_name)
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    fake_github = FakeReviewThreadsGitHubClient()
+    mentioned = dict(fake_github.threads[1], id="thread-3", is_resolved=False)
+    mentioned["comments"] = [
+        dict(mentioned["comments"][0], id="comment-4", body="@Dane-Park 확인 부탁드려요.")
+    ]
+    monkeypatch.setattr(
+        cli_module,
+        "_open_github_client_for_repo",
+        lambda conn, repo: fake_github,
+    )
+
+    runner = CliRunner()
+    fetched = runner.invoke(
+        cli_module.app, ["review-threads", "39", "--repo", repo_full_name]
+    )
+    assert fetched.exit_code == 0, fetched.output
+
+    fake_github.threads.append(mentioned)
+    fake_github.pr_updated_at = "2026-03-10T00:00:00Z"
+    result = runner.invoke(cli_module.app, ["inbox", "--refresh", "--json"])
+
+    assert result.exit_code == 0, result.output
+    assert fake_github.thread_listings == 2
+    payload = json.loads(result.output)
+    assert payload["logins"] == ["dane-park"]
+    assert [(item["id"], item["reason"]) for item in payload["items"]] == [
+        ("thread-1", "author"),
+        ("thread-3", "mention"),
+    ]
+    assert payload["items"][0]["repo"] == repo_full_name
+    assert payload["items"][0]["number"] == 39
+
+    client = TestClient(api_module.app)
+    response = client.get("/inbox", params={"user": "someone-else"})
+    assert response.status_code == 200, response.text
+    assert [item["id"] for item in response.json()["items"]] == ["thread-3"]
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from squire import db
+import squire.api as api_module
+import squire.cli as cli_module
+from squire.config import Settings
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def _upsert_pull(conn, repo_id: int, number: int, *, title: str, body: str, state: str) -> int:
+    return db.upsert_pull_request(
+        conn,
+        repo_id=repo_id,
+        number=number,
+        title=title,
+        body=body,
+        author="dane-park",
+        state=state,
+        head_branch=f"feature/pr-{number}",
+        base_branch="main",
+        changed_files=1,
+        reviewers_json="[]",
+        created_at="2026-03-01T00:00:00Z",
+        updated_at="2026-03-01T00:00:00Z",
+        synced_at="2026-03-01T00:00:00Z",
+    )
+
+
+def _thread(body: str) -> dict[str, object]:
+    return {
+        "id": "thread-1",
+        "is_resolved": False,
+        "is_outdated": False,
+        "path": "src/cache.py",
+        "line": 7,
+        "original_line": 7,
+        "head_ref_oid": "head-sha",
+        "comment_count": 1,
+        "reply_count": 0,
+        "updated_at": "2026-03-02T00:00:00Z",
+        "root_comment_id": "comment-1",
+        "root_author": "reviewer",
+        "comments": [
+            {
+                "id": "comment-1",
+                "database_id": 1,
+                "url": "https://github.example.com/thread-1#comment-1",
+                "body": body,
+                "created_at": "2026-03-02T00:00:00Z",
+                "updated_at": "2026-03-02T00:00:00Z",
+                "author": "reviewer",
+                "reply_to_id": None,
+                "path": "src/cache.py",
+                "line": 7,
+                "original_line": 7,
+                "commit_oid": "head-sha",
+                "original_commit_oid": "head-sha",
+            }
+        ],
+    }
+
+
+def test_search_ranks_and_tracks_writes_through_triggers(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        repo_id, _ = db.upsert_repository(conn, "owner/repo")
+        other_id, _ = db.upsert_repository(conn, "owner/other")
+        first = _upsert_pull(
+            conn, repo_id, 1, title="Cache invalidation fix", body="LRU eviction", state="open"
+        )
+        _upsert_pull(conn, repo_id, 2, title="Docs", body="mentions cache once", state="closed")
+        _upsert_pull(conn, other_id, 3, title="Cache warmup", body=None, state="open")
+        db.insert_ai_review(
+            conn,
+            pull_request_id=first,
+            file_path="src/cache.py",
+            line_number=12,
+            severity="warning",
+            body="The eviction loop never frees stale entries.",
+            agent="codex",
+        )
+        db.upsert_review_thread(
+            conn,
+            repo_id=repo_id,
+            pull_number=1,
+            thread=_thread("Consider a bounded eviction policy here."),
+            synced_at="2026-03-02T00:00:00Z",
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli_module.app,
+        ["search", "cache", "--repo", "owner/repo", "--kind", "pull_request", "--json"],
+    )
+    assert result.exit_code == 0, result.output
+    items = json.loads(result.output)["items"]
+    # Title matches outweigh a single body mention.
+    assert [(item["kind"], item["number"]) for item in items] == [
+        ("pull_request", 1),
+        ("pull_request", 2),
+    ]
+    assert "**Cache**" in items[0]["snippet"]
+
+    result = runner.invoke(cli_module.app, ["search", "evict*", "--state", "open", "--json"])
+    assert result.exit_code == 0, result.output
+    kinds = sorted(item["kind"] for item in json.loads(result.output)["items"])
+    assert kinds == ["local_review", "pull_request", "thread_comment"]
+
+    # Updates and deletes flow through the triggers.
+    conn = db.connect(_settings_for(db_path))
+    try:
+        _upsert_pull(conn, repo_id, 1, title="Renamed", body="nothing relevant", state="open")
+        db.delete_review_threads(conn, ["thread-1"])
+        conn.commit()
+    finally:
+        conn.close()
+
+    client = TestClient(api_module.app)
+    response = client.get("/search", params={"q": "eviction"})
+    assert response.status_code == 200, response.text
+    assert [item["kind"] for item in response.json()["items"]] == ["local_review"]
+
+    response = client.get(
+        "/search",
+        params={"q": "feature/pr-3", "kind": "pull_request"},
+    )
+    assert response.status_code == 200, response.text
+    assert [item["repo"] for item in response.json()["items"]] == ["owner/other"]
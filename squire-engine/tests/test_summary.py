@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from squire import db
+import squire.api as api_module
+import squire.cli as cli_module
+from squire.config import Settings
+
+
+def _settings_for(db_path: Path) -> Settings:
+    return Settings(
+        github_token=None,
+        github_base_url="https://api.github.com",
+        db_path=db_path,
+    )
+
+
+def _upsert_pull(conn, repo_id: int, number: int, state: str) -> int:
+    return db.upsert_pull_request(
+        conn,
+        repo_id=repo_id,
+        number=number,
+        title=f"PR {number}",
+        body=None,
+        author="dane-park",
+        state=state,
+        head_branch=f"feature/{number}",
+        base_branch="main",
+        changed_files=1,
+        reviewers_json="[]",
+        created_at="2026-03-01T00:00:00Z",
+        updated_at=f"2026-03-0{number}T00:00:00Z",
+        synced_at="2026-03-09T00:00:00Z",
+    )
+
+
+def _recount(conn) -> list[tuple[str, str, str, int]]:
+    return [
+        tuple(row)
+        for row in conn.execute(
+            """
+            SELECT r.full_name, p.state, COALESCE(s.status, 'pending'), COUNT(*)
+            FROM pull_requests p
+            JOIN repositories r ON r.id = p.repo_id
+            LEFT JOIN pr_review_status s ON s.pull_request_id = p.id
+            GROUP BY 1, 2, 3
+            ORDER BY 1, 2, 3
+            """
+        ).fetchall()
+    ]
+
+
+def _counters(conn) -> list[tuple[str, str, str, int]]:
+    return [
+        (row["repo_full_name"], row["state"], row["review_status"], row["pull_count"])
+        for row in db.list_pull_request_counts(conn, repo_full_name=None)
+    ]
+
+
+def test_summary_counters_follow_every_write(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "squire.db"
+    conn = db.connect(_settings_for(db_path))
+    try:
+        repo_id, _ = db.upsert_repository(conn, "owner/repo")
+        other_id, _ = db.upsert_repository(conn, "owner/other")
+        first = _upsert_pull(conn, repo_id, 1, "open")
+        second = _upsert_pull(conn, repo_id, 2, "open")
+        _upsert_pull(conn, repo_id, 3, "closed")
+        _upsert_pull(conn, other_id, 4, "open")
+
+        db.set_review_status(conn, pull_request_id=first, status="in-progress")
+        db.set_review_status(conn, pull_request_id=first, status="done")
+        db.set_review_status(conn, pull_request_id=second, status="pending")
+        _upsert_pull(conn, repo_id, 1, "merged")
+        for severity in ("error", "warning", "error"):
+            db.insert_ai_review(
+                conn,
+                pull_request_id=first,
+                file_path=None,
+                line_number=None,
+                severity=severity,
+                body="확인이 필요합니다.",
+                agent="codex",
+            )
+        conn.commit()
+
+        assert _counters(conn) == _recount(conn)
+        review_counts = db.get_pull_request_review_counts(conn, pull_request_id=first)
+        assert (review_counts["review_count"], review_counts["error_count"]) == (3, 2)
+
+        conn.execute("DELETE FROM pr_review_status WHERE pull_request_id = ?", (first,))
+        assert _counters(conn) == _recount(conn)
+        db.set_review_status(conn, pull_request_id=first, status="done")
+        db.remove_repository(conn, "owner/other")
+        conn.commit()
+        assert _counters(conn) == _recount(conn)
+    finally:
+        conn.close()
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(db_path))
+
+    client = TestClient(api_module.app)
+    response = client.get("/summary")
+    assert response.status_code == 200, response.text
+    payload = response.json()
+    assert payload["total"] == 3
+    assert payload["repos"][0]["by_state"] == {"open": 1, "closed": 1, "merged": 1}
+    assert payload["repos"][0]["by_review_status"] == {
+        "pending": 2,
+        "in-progress": 0,
+        "done": 1,
+    }
+
+    pulls = client.get("/pulls", params={"repo": "owner/repo", "state": "all"}).json()
+    assert {item["number"]: item["local_review_count"] for item in pulls} == {1: 3, 2: 0, 3: 0}
+
+    result = CliRunner().invoke(cli_module.app, ["stats", "--json"])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == payload
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+import squire.api as api_module
+from squire import tracing
+from squire.tracing import JsonlTraceExporter, Span, Tracer, configure_tracer, otlp_payload
+
+
+class ListExporter:
+    def __init__(self) -> None:
+        self.traces: list[list[Span]] = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.traces.append(spans)
+
+
+def test_spans_nest_under_the_active_trace_and_export_as_jsonl(tmp_path: Path) -> None:
+    with tracing.span("sqlite.SELECT") as outside:
+        assert outside is None
+
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(exporter=JsonlTraceExporter(path), slow_threshold_ms=0)
+    with tracer.trace("squire sync", repo="owner/repo") as trace:
+        with tracing.span("github.pulls", **{"http.method": "GET"}):
+            with tracing.span("sqlite.INSERT"):
+                pass
+        try:
+            with tracing.span("keychain.find-generic-password"):
+                raise RuntimeError("locked")
+        except RuntimeError:
+            pass
+    tracer.flush()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [record["name"] for record in records] == [
+        "squire sync",
+        "github.pulls",
+        "sqlite.INSERT",
+        "keychain.find-generic-password",
+    ]
+    assert {record["trace_id"] for record in records} == {trace.trace_id_hex}
+    assert records[2]["parent_span_id"] == records[1]["span_id"]
+    assert records[3]["status"] == "error"
+
+    payload = otlp_payload(trace.spans)
+    spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert spans[0]["kind"] == 2 and "parentSpanId" not in spans[0]
+    assert spans[1]["attributes"] == [{"key": "http.method", "value": {"stringValue": "GET"}}]
+    assert spans[3]["status"]["code"] == 2
+
+    breakdown = tracing.format_breakdown(trace)
+    assert "github: " in breakdown and "keychain: " in breakdown
+    # A nested span of another category still gets its own total.
+    assert "sqlite: " in breakdown
+
+
+def test_middleware_traces_requests_and_reports_slow_ones(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("SQUIRE_DB_PATH", str(tmp_path / "squire.db"))
+    exporter = ListExporter()
+    slow: list[str] = []
+    tracer = Tracer(
+        exporter=exporter,
+        slow_threshold_ms=0.001,
+        on_slow=lambda trace: slow.append(tracing.format_breakdown(trace)),
+    )
+    configure_tracer(tracer)
+    try:
+        client = TestClient(api_module.app)
+        assert client.get("/pulls/7", params={"repo": "owner/missing"}).status_code == 404
+        tracer.flush()
+    finally:
+        configure_tracer(None)
+
+    (spans,) = exporter.traces
+    root = spans[0]
+    assert root.name == "GET /pulls/{number}"
+    assert root.attributes["http.status_code"] == 404
+    # Sync endpoints run in the threadpool; their spans still join the request trace.
+    queries = [span for span in spans if span.name == "sqlite.SELECT"]
+    assert queries
+    assert all(span.trace is root.trace for span in queries)
+    assert len(slow) == 1
+    assert slow[0].startswith("GET /pulls/{number}")